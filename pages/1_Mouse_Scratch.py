@@ -5,11 +5,12 @@ from src.core.config import get_root_path, get_data_path, get_models_path, requi
 from src.core.helpers.analysis_helper import create_and_start_analysis, fetch_last_lines_of_logs
 from src.core.helpers.download_utils import filter_and_zip_files
 from src.core.processing.mouse_scratch_video_processing import process_scratch_files
+from src.core.processing.reporting import StreamlitReporter, use_reporter
 from src.core.gpu.gpu_utils import display_gpu_usage
 from src.core.gpu.gpu_selector import setup_gpu_selection
 
 # 导入共享组件
-from src.ui.components import load_custom_css, render_sidebar, show_gpu_status, setup_working_directory
+from src.ui.components import load_custom_css, render_sidebar, show_gpu_status, setup_working_directory, export_csv_checkbox
 
 # 设置页面配置
 st.set_page_config(
@@ -108,6 +109,7 @@ with tab1:
         elif not selected_files:
             st.warning("⚠️ 请先选择要分析的视频文件 / Please select video files to analyze first")
         else:
+            export_csv = export_csv_checkbox()
             if st.button("🚀 开始GPU分析 / Start GPU Analysis", use_container_width=True):
                 try:
                     user_name = st.session_state.get('name', 'unknown_user')
@@ -115,7 +117,7 @@ with tab1:
                         web_log_file.write(f"\n{user_name}, {current_time}\n")
                     
                     with st.spinner("分析中... / Analyzing..."):
-                        create_and_start_analysis(folder_path, selected_files, config_path, gpu_count, current_time, selected_gpus)
+                        create_and_start_analysis(folder_path, selected_files, config_path, gpu_count, current_time, selected_gpus, save_as_csv=export_csv)
                         st.success("✅ 分析已开始！请查看日志了解进度 / Analysis started! Check logs for progress.")
                 except Exception as e:
                     st.error(f"❌ 分析启动失败 / Failed to start analysis: {e}")
@@ -148,7 +150,7 @@ with tab2:
         
         # 处理按钮
         if st.button("⚡ 处理分析结果 / Process Analysis Results", use_container_width=True):
-            with st.spinner("处理中 / Processing..."):
+            with st.spinner("处理中 / Processing..."), use_reporter(StreamlitReporter()):
                 process_scratch_files(folder_path, 0.999, 15, 35)
             st.success("✅ 结果处理完成 / Analysis results processed")
     else:
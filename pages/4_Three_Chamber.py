@@ -4,10 +4,11 @@ import datetime
 from src.core.config import get_root_path, get_data_path, get_models_path, require_authentication
 from src.core.helpers.analysis_helper import create_and_start_analysis, fetch_last_lines_of_logs
 from src.core.helpers.download_utils import filter_and_zip_files
+from src.core.processing.reporting import StreamlitReporter, use_reporter
 from src.core.processing.three_chamber_video_processing import process_tc_files
 
 # 导入共享组件
-from src.ui.components import render_sidebar, load_custom_css, show_gpu_status, setup_working_directory
+from src.ui.components import render_sidebar, load_custom_css, show_gpu_status, setup_working_directory, export_csv_checkbox
 
 # 设置页面配置
 st.set_page_config(
@@ -100,12 +101,13 @@ with tab1:
         if high_memory_usage:
             st.warning("⚠️ GPU显存占用率高，请稍后再试 / High GPU memory usage detected. Please wait before starting analysis.")
         else:
+            export_csv = export_csv_checkbox()
             if st.button("🚀 开始GPU分析 / Start GPU Analysis", use_container_width=True):
                 try:
                     user_name = st.session_state.get('name', 'unknown_user')
                     with open(web_log_file_path, "a", encoding='utf-8') as web_log_file:
                         web_log_file.write(f"\n{user_name}, {current_time}\n")
-                    create_and_start_analysis(folder_path, selected_files, config_path, gpu_count, current_time, selected_gpus)
+                    create_and_start_analysis(folder_path, selected_files, config_path, gpu_count, current_time, selected_gpus, save_as_csv=export_csv)
                     st.success("✅ 分析已开始！请查看日志了解进度 / Analysis started! Check logs for progress.")
                 except Exception as e:
                     st.error(f"❌ 分析启动失败 / Failed to start analysis: {e}")
@@ -125,7 +127,7 @@ with tab2:
         st.info(f"当前使用的模型 / Current model: {selected_model_name if 'selected_model_name' in locals() else 'Not selected'}")
         
         if st.button("⚡ 处理分析结果 / Process Analysis Results", use_container_width=True):
-            with st.spinner("处理中 / Processing..."):
+            with st.spinner("处理中 / Processing..."), use_reporter(StreamlitReporter()):
                 process_tc_files(folder_path, 0.999, 15, 35)
             st.success("✅ 结果处理完成 / Analysis results processed")
     else:
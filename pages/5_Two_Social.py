@@ -4,10 +4,20 @@ import datetime
 from src.core.config import get_root_path, get_data_path, get_models_path, require_authentication
 from src.core.helpers.analysis_helper import create_and_start_analysis, fetch_last_lines_of_logs
 from src.core.helpers.download_utils import filter_and_zip_files
-from src.core.processing.mouse_social_video_processing import process_mouse_social_video
+from src.core.processing.mouse_social_video_processing import (
+    SOCIAL_BODYPARTS,
+    SOCIAL_INDIVIDUALS,
+    process_mouse_social_video,
+    sweep_social_parameters,
+)
+from src.core.processing.pose_manifest import list_pose_files
+from src.core.processing.pose_store import load_pose
+from src.core.processing.reporting import StreamlitReporter, report, use_reporter
+from src.core.processing.streaming import DEFAULT_CHUNK_FRAMES
+from src.core.processing.sweep import parse_sweep_values, plot_sweep_heatmap
 
 # 导入共享组件
-from src.ui.components import render_sidebar, load_custom_css, show_gpu_status, setup_working_directory
+from src.ui.components import render_sidebar, load_custom_css, show_gpu_status, setup_working_directory, export_csv_checkbox
 
 # 设置页面配置
 st.set_page_config(
@@ -105,12 +115,13 @@ with tab1:
         st.warning("⚠️ GPU显存占用率高，请稍后再试 / High GPU memory usage detected. Please wait before starting analysis.")
     else:
         if folder_path and selected_files:  # 只在有选择文件时显示开始分析按钮
+            export_csv = export_csv_checkbox()
             if st.button("🚀 开始GPU分析 / Start GPU Analysis", use_container_width=True):
                 try:
                     user_name = st.session_state.get('name', 'unknown_user')
                     with open(web_log_file_path, "a", encoding='utf-8') as web_log_file:
                         web_log_file.write(f"\n{user_name}, {current_time}\n")
-                    create_and_start_analysis(folder_path, selected_files, config_path, gpu_count, current_time, selected_gpus)
+                    create_and_start_analysis(folder_path, selected_files, config_path, gpu_count, current_time, selected_gpus, save_as_csv=export_csv)
                     st.success("✅ 分析已开始！请查看日志了解进度 / Analysis started! Check logs for progress.")
                 except Exception as e:
                     st.error(f"❌ 分析启动失败 / Failed to start analysis: {e}")
@@ -155,41 +166,92 @@ with tab2:
                     step=1.0,
                     help="视频的帧率 / Frame rate of the video"
                 )
+            streaming = st.checkbox(
+                "长录像分块分析 / Chunked analysis for long recordings",
+                value=False,
+                help="按块读取和分析, 内存占用与录像时长无关 / Bounded memory for multi-hour recordings"
+            )
         
         if st.button("⚡ 处理分析结果 / Process Analysis Results", use_container_width=True):
-            # 查找所有以snapshot_110_el.csv结尾的文件
-            csv_files = []
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if file.endswith('snapshot_110_el.csv'):
-                        csv_files.append(os.path.join(root, file))
+            # 查找所有包含两只小鼠所需关键点的 _el 输出（.h5优先，回退.csv），不依赖scorer名称
+            csv_files = list_pose_files(
+                folder_path,
+                suffix='_el',
+                recursive=True,
+                bodyparts=SOCIAL_BODYPARTS,
+                individuals=SOCIAL_INDIVIDUALS
+            )
             
             if not csv_files:
-                st.warning("⚠️ 未找到符合条件的CSV文件 / No matching CSV files found")
+                st.warning("⚠️ 未找到符合条件的DLC输出文件 / No matching DLC output files found")
             else:
-                st.info(f"找到 {len(csv_files)} 个CSV文件需要处理 / Found {len(csv_files)} CSV files to process")
+                st.info(f"找到 {len(csv_files)} 个DLC输出文件需要处理 / Found {len(csv_files)} DLC output files to process")
                 
-                progress_bar = st.progress(0)
-                for i, csv_path in enumerate(csv_files):
-                    with st.spinner(f"处理文件 / Processing: {os.path.basename(csv_path)}"):
-                        # 获取对应的视频文件路径
-                        video_name = os.path.basename(csv_path).replace('DLC_Buctd-hrnetW48_SocialMar9shuffle1_detector_220_snapshot_110_el.csv', '.mp4')
-                        video_path = os.path.join(os.path.dirname(csv_path), video_name)
+                with use_reporter(StreamlitReporter()):
+                    report.progress(0, len(csv_files))
+                    for i, csv_path in enumerate(csv_files):
+                        with st.spinner(f"处理文件 / Processing: {os.path.basename(csv_path)}"):
+                            # 获取对应的视频文件路径
+                            video_name = os.path.basename(csv_path).split('DLC')[0] + '.mp4'
+                            video_path = os.path.join(os.path.dirname(csv_path), video_name)
                         
-                        # 直接处理文件
-                        process_mouse_social_video(
-                            video_path=video_path,
-                            threshold=likelihood_threshold,
-                            min_duration_sec=2.0,
-                            max_duration_sec=35.0,
-                            fps=fps
-                        )
-                        st.success(f"✅ 已处理 / Processed: {os.path.basename(csv_path)}")
+                            # 直接处理文件
+                            process_mouse_social_video(
+                                video_path=video_path,
+                                threshold=likelihood_threshold,
+                                min_duration_sec=2.0,
+                                max_duration_sec=35.0,
+                                fps=fps,
+                                chunk_frames=DEFAULT_CHUNK_FRAMES if streaming else None
+                            )
+                            st.success(f"✅ 已处理 / Processed: {os.path.basename(csv_path)}")
                         
-                        # 更新进度条
-                        progress_bar.progress((i + 1) / len(csv_files))
+                            # 更新进度条
+                            report.progress(i + 1, len(csv_files), os.path.basename(csv_path))
                     
                 st.success("✅ 所有文件处理完成 / All files processed")
+        
+        # 参数扫描: 同一文件只载入一次, 比较多组阈值下的行为段数和时长
+        with st.expander("🔬 参数扫描 / Parameter Sweep", expanded=False):
+            sweep_files = list_pose_files(
+                folder_path,
+                suffix='_el',
+                recursive=True,
+                bodyparts=SOCIAL_BODYPARTS,
+                individuals=SOCIAL_INDIVIDUALS
+            )
+            if not sweep_files:
+                st.warning("⚠️ 未找到符合条件的DLC输出文件 / No matching DLC output files found")
+            else:
+                sweep_path = st.selectbox(
+                    "扫描文件 / File to sweep",
+                    sweep_files,
+                    format_func=os.path.basename
+                )
+                col1, col2 = st.columns(2)
+                with col1:
+                    sweep_thresholds = st.text_input("置信度阈值 / Likelihood thresholds", "0.4, 0.6, 0.8")
+                    sweep_close = st.text_input("距离阈值(像素) / Distance thresholds (px)", "80, 100, 120")
+                with col2:
+                    sweep_facing = st.text_input("朝向阈值(度) / Facing thresholds (deg)", "45")
+                    sweep_min_durations = st.text_input("最小持续时间(秒) / Min durations (s)", "1, 2, 3")
+                
+                if st.button("🔬 运行参数扫描 / Run Sweep", use_container_width=True):
+                    try:
+                        with st.spinner("参数扫描中 / Sweeping parameters..."):
+                            sweep_df = sweep_social_parameters(
+                                load_pose(sweep_path, individuals=SOCIAL_INDIVIDUALS, bodyparts=SOCIAL_BODYPARTS),
+                                thresholds=parse_sweep_values(sweep_thresholds),
+                                close_thresholds=parse_sweep_values(sweep_close),
+                                facing_thresholds=parse_sweep_values(sweep_facing),
+                                min_durations_sec=parse_sweep_values(sweep_min_durations),
+                                fps=fps
+                            )
+                    except ValueError as e:
+                        st.error(str(e))
+                    else:
+                        st.dataframe(sweep_df)
+                        st.pyplot(plot_sweep_heatmap(sweep_df, x='threshold', y='close_threshold'))
     else:
         st.warning("⚠️ 请先在分析页面选择工作目录 / Please select a working directory in the analysis tab first")
 
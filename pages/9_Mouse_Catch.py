@@ -4,7 +4,12 @@ import datetime
 from src.core.config import get_root_path, get_data_path, get_models_path, require_authentication
 from src.core.helpers.analysis_helper import create_and_start_analysis, fetch_last_lines_of_logs
 from src.core.helpers.download_utils import filter_and_zip_files
-from src.core.processing.mouse_catch_video_processing import process_mouse_catch_video
+from src.core.processing.mouse_catch_video_processing import process_mouse_catch_video, sweep_catch_parameters
+from src.core.processing.pose_manifest import list_pose_files
+from src.core.processing.pose_store import load_pose, sniff_pose_schema
+from src.core.processing.reporting import StreamlitReporter, report, use_reporter
+from src.core.processing.streaming import DEFAULT_CHUNK_FRAMES
+from src.core.processing.sweep import parse_sweep_values, plot_sweep_heatmap
 from src.core.processing.trajectory_processing import (
     filter_low_likelihood,
     filter_extreme_jumps,
@@ -23,7 +28,7 @@ if 'name' not in st.session_state:
     st.session_state.name = "Anonymous User"
 
 # 导入共享组件
-from src.ui.components import render_sidebar, load_custom_css, show_gpu_status, setup_working_directory
+from src.ui.components import render_sidebar, load_custom_css, show_gpu_status, setup_working_directory, export_csv_checkbox
 
 # 设置页面配置
 st.set_page_config(
@@ -144,12 +149,13 @@ with tab1:
         st.warning("⚠️ GPU显存占用率高，请稍后再试 / High GPU memory usage detected. Please wait before starting analysis.")
     else:
         if folder_path and selected_files:  # 只在有选择文件时显示开始分析按钮
+            export_csv = export_csv_checkbox()
             if st.button("🚀 开始GPU分析 / Start GPU Analysis", use_container_width=True):
                 try:
                     user_name = st.session_state.get('name', 'unknown_user')
                     with open(web_log_file_path, "a", encoding='utf-8') as web_log_file:
                         web_log_file.write(f"\n{user_name}, {current_time}\n")
-                    create_and_start_analysis(folder_path, selected_files, config_path, gpu_count, current_time, selected_gpus)
+                    create_and_start_analysis(folder_path, selected_files, config_path, gpu_count, current_time, selected_gpus, save_as_csv=export_csv)
                     st.success("✅ 分析已开始！请查看日志了解进度 / Analysis started! Check logs for progress.")
                 except Exception as e:
                     st.error(f"❌ 分析启动失败 / Failed to start analysis: {e}")
@@ -183,6 +189,22 @@ with tab2:
                 step=0.05,
                 help="关键点检测置信度阈值 / Keypoint detection confidence threshold"
             )
+            streaming = st.checkbox(
+                "长录像分块分析 / Chunked analysis for long recordings",
+                value=False,
+                help="按块读取和分析, 内存占用与录像时长无关 / Bounded memory for multi-hour recordings"
+            )
+            bodyparts_text = st.text_input(
+                "分析的关键点 / Bodyparts to analyze",
+                value="",
+                help="逗号分隔, 如 left_paw,right_paw; 留空只分析第一个关键点 / Comma-separated; empty analyzes the first bodypart only"
+            )
+            catch_bodyparts = [bp.strip() for bp in bodyparts_text.split(",") if bp.strip()] or None
+            kalman = st.checkbox(
+                "Kalman 平滑 / Kalman smoothing",
+                value=False,
+                help="按置信度加权的 Kalman/RTS 平滑, 直接补齐缺失帧, 代替插值和 Savitzky-Golay 平滑 / Likelihood-weighted Kalman/RTS smoother replacing interpolation and Savitzky-Golay"
+            )
             
             st.info("其他参数已设置为最优默认值 / Other parameters are set to optimal default values")
             st.markdown("""
@@ -199,69 +221,105 @@ with tab2:
         st.markdown("### 开始处理 / Start Processing")
         
         if st.button("⚡ 处理分析结果 / Process Analysis Results", key="process_results_button", use_container_width=True):
-            # 查找所有以010.csv结尾的文件
-            csv_files = []
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if file.endswith('010.csv'):
-                        csv_files.append(os.path.join(root, file))
+            # 查找所有以010结尾的DLC输出（.h5优先，回退.csv）
+            csv_files = list_pose_files(folder_path, suffix='010', recursive=True)
             
             if not csv_files:
-                st.warning("⚠️ 未找到符合条件的CSV文件 / No matching CSV files found")
+                st.warning("⚠️ 未找到符合条件的DLC输出文件 / No matching DLC output files found")
             else:
-                st.info(f"找到 {len(csv_files)} 个CSV文件需要处理 / Found {len(csv_files)} CSV files to process")
+                st.info(f"找到 {len(csv_files)} 个DLC输出文件需要处理 / Found {len(csv_files)} DLC output files to process")
                 
-                progress_bar = st.progress(0)
-                for i, csv_path in enumerate(csv_files):
-                    with st.spinner(f"处理文件 / Processing: {os.path.basename(csv_path)}"):
-                        # 获取对应的视频文件路径
-                        file_basename = os.path.basename(csv_path)
-                        # 移除DLC相关部分
-                        if 'DLC' in file_basename:
-                            video_name = file_basename.split('DLC')[0] + '.mp4'
-                        else:
-                            # 如果文件名不包含DLC，则直接替换.csv为.mp4
-                            video_name = os.path.splitext(file_basename)[0] + '.mp4'
+                with use_reporter(StreamlitReporter()):
+                    report.progress(0, len(csv_files))
+                    for i, csv_path in enumerate(csv_files):
+                        with st.spinner(f"处理文件 / Processing: {os.path.basename(csv_path)}"):
+                            # 获取对应的视频文件路径
+                            file_basename = os.path.basename(csv_path)
+                            # 移除DLC相关部分
+                            if 'DLC' in file_basename:
+                                video_name = file_basename.split('DLC')[0] + '.mp4'
+                            else:
+                                # 如果文件名不包含DLC，则直接替换扩展名为.mp4
+                                video_name = os.path.splitext(file_basename)[0] + '.mp4'
                         
-                        video_path = os.path.join(os.path.dirname(csv_path), video_name)
+                            video_path = os.path.join(os.path.dirname(csv_path), video_name)
                         
-                        try:
-                            # 使用新的处理方法
-                            process_mouse_catch_video(
-                                video_path=video_path,
-                                csv_path=csv_path,
-                                threshold=likelihood_threshold
-                            )
+                            try:
+                                # 使用新的处理方法
+                                process_mouse_catch_video(
+                                    video_path=video_path,
+                                    csv_path=csv_path,
+                                    threshold=likelihood_threshold,
+                                    chunk_frames=DEFAULT_CHUNK_FRAMES if streaming else None,
+                                    bodyparts=catch_bodyparts,
+                                    smoother="kalman" if kalman else "savgol"
+                                )
                             
-                            # Display analysis results
-                            video_dir = os.path.dirname(video_path)
-                            video_name = os.path.splitext(os.path.basename(video_path))[0]
-                            results_dir = os.path.join(video_dir, f"{video_name}_results")
-                            figure_dir = os.path.join(results_dir, "figures")
+                                # Display analysis results
+                                video_dir = os.path.dirname(video_path)
+                                video_name = os.path.splitext(os.path.basename(video_path))[0]
+                                results_dir = os.path.join(video_dir, f"{video_name}_results")
+                                figure_dir = os.path.join(results_dir, "figures")
                             
-                            # Display charts and results
-                            st.subheader(f"Analysis Results - {video_name}")
+                                # Display charts and results
+                                st.subheader(f"Analysis Results - {video_name}")
                             
-                            analysis_png = os.path.join(figure_dir, "catch_analysis.png")
-                            if os.path.exists(analysis_png):
-                                st.image(analysis_png, caption="Catch Behavior Analysis")
+                                analysis_png = os.path.join(figure_dir, "catch_analysis.png")
+                                if os.path.exists(analysis_png):
+                                    st.image(analysis_png, caption="Catch Behavior Analysis")
                             
-                            results_csv = os.path.join(results_dir, "catch_analysis_results.csv")
-                            if os.path.exists(results_csv):
-                                results_df = pd.read_csv(results_csv)
-                                if not results_df.empty:
-                                    st.dataframe(results_df)
-                                else:
-                                    st.info("No valid catch behaviors detected")
+                                results_csv = os.path.join(results_dir, "catch_analysis_results.csv")
+                                if os.path.exists(results_csv):
+                                    results_df = pd.read_csv(results_csv)
+                                    if not results_df.empty:
+                                        st.dataframe(results_df)
+                                    else:
+                                        st.info("No valid catch behaviors detected")
                             
-                            st.success(f"✅ Processed: {os.path.basename(csv_path)}")
-                        except Exception as e:
-                            st.error(f"❌ 处理失败 / Processing failed: {os.path.basename(csv_path)} - {str(e)}")
+                                st.success(f"✅ Processed: {os.path.basename(csv_path)}")
+                            except Exception as e:
+                                st.error(f"❌ 处理失败 / Processing failed: {os.path.basename(csv_path)} - {str(e)}")
                         
-                        # 更新进度条
-                        progress_bar.progress((i + 1) / len(csv_files))
+                            # 更新进度条
+                            report.progress(i + 1, len(csv_files), os.path.basename(csv_path))
                     
                 st.success("✅ 所有文件处理完成 / All files processed")
+        
+        # 参数扫描: 同一文件只载入一次, 全部阈值组合在一次清洗中完成
+        with st.expander("🔬 参数扫描 / Parameter Sweep", expanded=False):
+            sweep_files = list_pose_files(folder_path, suffix='010', recursive=True)
+            if not sweep_files:
+                st.warning("⚠️ 未找到符合条件的DLC输出文件 / No matching DLC output files found")
+            else:
+                sweep_path = st.selectbox(
+                    "扫描文件 / File to sweep",
+                    sweep_files,
+                    format_func=os.path.basename
+                )
+                col1, col2 = st.columns(2)
+                with col1:
+                    sweep_thresholds = st.text_input("置信度阈值 / Likelihood thresholds", "0.4, 0.6, 0.8")
+                with col2:
+                    sweep_speeds = st.text_input("速度阈值(像素/帧) / Speed thresholds (px/frame)", "50, 100, 150")
+                
+                if st.button("🔬 运行参数扫描 / Run Sweep", use_container_width=True):
+                    try:
+                        with st.spinner("参数扫描中 / Sweeping parameters..."):
+                            # 与处理时相同, 默认扫描第一个关键点
+                            schema = sniff_pose_schema(sweep_path)
+                            bp = catch_bodyparts[0] if catch_bodyparts else schema.bodyparts[0]
+                            pose = load_pose(sweep_path, bodyparts=[bp], schema=schema)
+                            sweep_df = sweep_catch_parameters(
+                                {field: pose.get(bp, field) for field in ('x', 'y', 'likelihood')},
+                                thresholds=parse_sweep_values(sweep_thresholds),
+                                speed_thresholds=parse_sweep_values(sweep_speeds),
+                                smoother="kalman" if kalman else "savgol"
+                            )
+                    except (KeyError, ValueError) as e:
+                        st.error(str(e))
+                    else:
+                        st.dataframe(sweep_df)
+                        st.pyplot(plot_sweep_heatmap(sweep_df, x='threshold', y='speed_threshold'))
     else:
         st.warning("⚠️ 请先在分析页面选择工作目录 / Please select a working directory in the analysis tab first")
 
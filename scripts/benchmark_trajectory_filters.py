@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""轨迹过滤的逐帧循环与向量化实现的耗时对比
+Benchmark the per-frame trajectory filter loops against the vectorized masks.
+
+    python scripts/benchmark_trajectory_filters.py --frames 432000 --bodyparts 4
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from src.core.processing.trajectory_processing import (  # noqa: E402
+    extreme_jump_mask,
+    unreasonable_speed_mask,
+)
+
+
+def extreme_jumps_loop(x, y, extreme_dist):
+    x, y = x.copy(), y.copy()
+    for i in range(1, len(x)):
+        if np.isnan(x[i]) or np.isnan(x[i - 1]):
+            continue
+        if np.sqrt((x[i] - x[i - 1]) ** 2 + (y[i] - y[i - 1]) ** 2) > extreme_dist:
+            x[i] = np.nan
+            y[i] = np.nan
+    return x, y
+
+
+def unreasonable_speed_loop(x, y, max_speed_threshold):
+    x, y = x.copy(), y.copy()
+    for i in range(1, len(x) - 1):
+        if np.isnan(x[i]) or np.isnan(y[i]):
+            continue
+        if not np.isnan(x[i - 1]) and not np.isnan(y[i - 1]):
+            if np.sqrt((x[i] - x[i - 1]) ** 2 + (y[i] - y[i - 1]) ** 2) > max_speed_threshold:
+                x[i] = np.nan
+                y[i] = np.nan
+                continue
+        if not np.isnan(x[i + 1]) and not np.isnan(y[i + 1]):
+            if np.sqrt((x[i + 1] - x[i]) ** 2 + (y[i + 1] - y[i]) ** 2) > max_speed_threshold:
+                x[i] = np.nan
+                y[i] = np.nan
+    return x, y
+
+
+def make_tracks(n_frames: int, n_bodyparts: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.normal(0, 15, (n_frames, n_bodyparts)), axis=0) + 300
+    y = np.cumsum(rng.normal(0, 15, (n_frames, n_bodyparts)), axis=0) + 300
+    jumps = rng.random(x.shape) < 0.02
+    x[jumps] += rng.choice([-300.0, 300.0], size=jumps.sum())
+    x[rng.random(x.shape) < 0.05] = np.nan
+    return x, y
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=120 * 3600)
+    parser.add_argument("--bodyparts", type=int, default=1)
+    args = parser.parse_args()
+
+    x, y = make_tracks(args.frames, args.bodyparts)
+    print(f"{args.frames} frames x {args.bodyparts} bodyparts")
+
+    cases = [
+        ("filter_extreme_jumps", extreme_jumps_loop, extreme_jump_mask, {}, 200.0),
+        ("filter_unreasonable_speed", unreasonable_speed_loop, unreasonable_speed_mask, {}, 50.0),
+        (
+            "filter_unreasonable_speed (stateless)",
+            None,
+            unreasonable_speed_mask,
+            {"mode": "stateless"},
+            50.0,
+        ),
+    ]
+    for name, loop, vectorized, kwargs, threshold in cases:
+        vec_time, mask = timed(vectorized, x, y, threshold, **kwargs)
+        line = f"{name:40s} vectorized {vec_time * 1000:9.1f} ms"
+        if loop is not None:
+            loop_time = 0.0
+            for k in range(args.bodyparts):
+                elapsed, (lx, _) = timed(loop, x[:, k], y[:, k], threshold)
+                loop_time += elapsed
+                assert np.array_equal(mask[:, k], np.isnan(lx) & ~np.isnan(x[:, k]))
+            line += f"   loop {loop_time * 1000:9.1f} ms   speedup {loop_time / vec_time:6.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,8 +17,13 @@ def create_and_start_analysis(
     gpu_count: int,
     current_time: str,
     selected_gpus: Optional[List[int]] = None,
+    save_as_csv: bool = False,
 ) -> None:
-    """Spawn DeepLabCut analysis jobs across the requested GPUs."""
+    """Spawn DeepLabCut analysis jobs across the requested GPUs.
+
+    DLC always writes its native .h5 output, which the processing modules read
+    directly; ``save_as_csv`` additionally exports a CSV copy for external tools.
+    """
     try:
         gpu_indices = list(range(gpu_count)) if selected_gpus is None else list(selected_gpus)
         use_cpu = False
@@ -76,13 +81,13 @@ def create_and_start_analysis(
                 analyze_videos_code = (
                     f"deeplabcut.analyze_videos(r'{config_path}', {files_group}, "
                     "videotype='mp4', shuffle=1, trainingsetindex=0, "
-                    "save_as_csv=True)"
+                    f"save_as_csv={save_as_csv})"
                 )
             else:
                 analyze_videos_code = (
                     f"deeplabcut.analyze_videos(r'{config_path}', {files_group}, "
                     "videotype='mp4', shuffle=1, trainingsetindex=0, "
-                    f"gputouse={gpu_index}, save_as_csv=True)"
+                    f"gputouse={gpu_index}, save_as_csv={save_as_csv})"
                 )
             create_labeled_video_code = (
                 f"deeplabcut.create_labeled_video(r'{config_path}', {files_group})"
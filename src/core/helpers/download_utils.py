@@ -20,7 +20,9 @@ def filter_and_zip_files(folder_path: str, included_ext: Optional[List[str]] = N
         zip_path = os.path.join(folder_path, 'results.zip')
 
         with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for root, _, files in os.walk(folder_path):
+            for root, dirs, files in os.walk(folder_path):
+                # 跳过隐藏目录（如 .pose_cache 姿态缓存）
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
                 for file in files:
                     file_path = os.path.join(root, file)
                     ext = os.path.splitext(file)[1].lower()
@@ -31,7 +31,45 @@ from .mouse_swimming_video_processing import (
     detect_swimming_frames
 )
 
-from .mouse_social_video_processing import process_mouse_social_video, analyze_social_behavior, detect_social_frames
+from .mouse_social_video_processing import process_mouse_social_video, analyze_social_behavior, detect_social_frames, detect_group_social_frames, sweep_social_parameters
+
+from .social_geometry import NeighborGeometry, SocialGeometry, neighbor_geometry, neighbor_pairs, social_geometry
+
+from .pose_store import (
+    PoseData,
+    PoseSchema,
+    get_pose_schema,
+    load_pose,
+    resolve_pose_file,
+    sniff_pose_schema,
+)
+
+from .trajectory_pipeline import (
+    StageStats,
+    TrajectoryPipeline,
+    TrajectoryStage,
+    catch_pipeline,
+)
+
+from .intervals import IntervalSet, bout_intervals
+
+from .labels import LabelTable
+
+from .sweep import parse_sweep_values, plot_sweep_heatmap
+
+from .feature_cache import FeatureCache, pose_digest
+
+from .timeline import plot_timeline, set_time_axis, state_intervals
+
+from .reporting import Reporter, ReportEvent, StreamlitReporter, get_reporter, use_reporter
+
+from .pose_manifest import (
+    PoseManifest,
+    VideoOutputs,
+    find_pose_file,
+    get_manifest,
+    list_pose_files,
+)
 
 __all__ = [
     # 抓挠行为分析 / Scratch behavior analysis
@@ -65,5 +103,60 @@ __all__ = [
     # 社交行为分析 / Social behavior analysis
     'process_mouse_social_video',
     'analyze_social_behavior',
-    'detect_social_frames'
+    'detect_social_frames',
+    'detect_group_social_frames',
+    'sweep_social_parameters',
+    'SocialGeometry',
+    'NeighborGeometry',
+    'social_geometry',
+    'neighbor_pairs',
+    'neighbor_geometry',
+
+    # 姿态数据缓存 / Pose data cache
+    'PoseData',
+    'PoseSchema',
+    'load_pose',
+    'sniff_pose_schema',
+    'get_pose_schema',
+    'resolve_pose_file',
+
+    # DLC 输出清单 / DLC output manifest
+    'PoseManifest',
+    'VideoOutputs',
+    'get_manifest',
+    'find_pose_file',
+    'list_pose_files',
+
+    # 轨迹清洗流水线 / Trajectory cleaning pipeline
+    'TrajectoryPipeline',
+    'TrajectoryStage',
+    'StageStats',
+    'catch_pipeline',
+
+    # 行为标签编码 / Behavior label encoding
+    'LabelTable',
+
+    # 行为段区间运算 / Bout interval algebra
+    'IntervalSet',
+    'bout_intervals',
+
+    # 参数扫描 / Parameter sweeps
+    'parse_sweep_values',
+    'plot_sweep_heatmap',
+
+    # 逐帧特征缓存 / Frame feature cache
+    'FeatureCache',
+    'pose_digest',
+
+    # 行为时间线 / Behavior timelines
+    'plot_timeline',
+    'set_time_axis',
+    'state_intervals',
+
+    # 进度与诊断事件 / Progress and diagnostic events
+    'Reporter',
+    'ReportEvent',
+    'StreamlitReporter',
+    'get_reporter',
+    'use_reporter'
 ] 
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""逐帧状态到行为段的游程编码
+Run-length bout extraction from per-frame states.
+
+理毛、游泳、三箱和 CPP 共用的行为段提取: 对补齐两端的状态数组做一次
+np.diff 得到游程边界, 之后的间隔合并、时长过滤和每段汇总都是整段向量运算。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+
+# Bouts.reduce 支持的汇总方式
+_REDUCERS = {
+    "sum": np.add,
+    "min": np.minimum,
+    "max": np.maximum,
+}
+
+
+@dataclass(frozen=True)
+class Bouts:
+    """一组行为段, 帧区间为 [start, stop)
+    A set of bouts over half-open frame ranges ``[start, stop)``.
+
+    Attributes:
+        start: 每段的起始帧 / first frame of each bout
+        stop: 每段结束后的第一帧 / frame after the last frame of each bout
+        label: 每段的状态值 / state value of each bout
+    """
+
+    start: np.ndarray
+    stop: np.ndarray
+    label: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @property
+    def duration(self) -> np.ndarray:
+        """每段帧数 / Frames per bout."""
+        return self.stop - self.start
+
+    def select(self, keep: np.ndarray) -> "Bouts":
+        """按布尔掩码或索引取子集 / Subset by boolean mask or indices."""
+        return Bouts(self.start[keep], self.stop[keep], self.label[keep])
+
+    def filter_duration(
+        self, min_duration: Optional[int] = None, max_duration: Optional[int] = None
+    ) -> "Bouts":
+        """保留 min_duration <= 帧数 <= max_duration 的段 / Keep bouts within the duration bounds."""
+        keep = np.ones(len(self), dtype=bool)
+        if min_duration is not None:
+            keep &= self.duration >= min_duration
+        if max_duration is not None:
+            keep &= self.duration <= max_duration
+        return self.select(keep)
+
+    def bridge_gaps(self, max_gap: int) -> "Bouts":
+        """合并间隔不超过 max_gap 帧的相邻同类段
+        Merge consecutive bouts of the same label separated by at most ``max_gap`` frames.
+        """
+        if max_gap <= 0 or len(self) < 2:
+            return self
+        joined = (self.start[1:] - self.stop[:-1] <= max_gap) & (self.label[1:] == self.label[:-1])
+        first = np.concatenate(([True], ~joined))
+        last = np.concatenate((~joined, [True]))
+        return Bouts(self.start[first], self.stop[last], self.label[first])
+
+    def reduce(self, values: np.ndarray, how: str = "mean") -> np.ndarray:
+        """每段内的汇总值 / Per-bout reduction of a per-frame array.
+
+        Args:
+            values (np.ndarray): 逐帧数值
+            how (str): "mean", "sum", "min" 或 "max"
+        """
+        if how != "mean" and how not in _REDUCERS:
+            raise ValueError(f"未知的汇总方式 / Unknown reduction: {how}")
+        values = np.asarray(values)
+        if not len(self):
+            return np.empty(0, dtype=np.float64 if how == "mean" else values.dtype)
+        # reduceat 的每个区间为 [start[k], start[k + 1]), 需要按 stop 截断:
+        # 在 start / stop 交错的索引上归约, 只取偶数位置的结果
+        bounds = np.column_stack((self.start, self.stop)).ravel()
+        ufunc = np.add if how == "mean" else _REDUCERS[how]
+        padded = np.append(values, values[:1])  # stop 可以等于 len(values)
+        reduced = ufunc.reduceat(padded, bounds)[::2]
+        return reduced / self.duration if how == "mean" else reduced
+
+    def records(self, columns: Optional[Mapping[str, np.ndarray]] = None) -> List[Dict[str, Any]]:
+        """转为 analyze_* 输出的字典列表
+        Rows with start_frame / end_frame (exclusive) / duration plus extra per-bout columns.
+        """
+        table = {
+            "start_frame": self.start.tolist(),
+            "end_frame": self.stop.tolist(),
+            "duration": self.duration.tolist(),
+        }
+        for name, values in (columns or {}).items():
+            table[name] = np.asarray(values).tolist()
+        return [dict(zip(table, row)) for row in zip(*table.values())]
+
+
+def find_bouts(
+    states: np.ndarray,
+    valid: Optional[np.ndarray] = None,
+    background: Any = None,
+    max_gap: int = 0,
+) -> Bouts:
+    """逐帧状态的游程编码
+    Run-length encode per-frame states into bouts.
+
+    Args:
+        states (np.ndarray): 逐帧状态, 布尔或整数标签
+        valid (np.ndarray, optional): 有效帧掩码; 无效帧沿用前一有效帧的状态,
+            既不结束也不开始一段, 第一个有效帧之前的帧不属于任何段
+        background: 不计为行为段的状态; 布尔状态默认为 False
+        max_gap (int): 合并间隔不超过该帧数的相邻同类段
+
+    Returns:
+        Bouts: 按时间排序的行为段
+
+    Example:
+        >>> find_bouts(np.array([0, 1, 1, 0, 1], dtype=bool)).records()
+        [{'start_frame': 1, 'end_frame': 3, 'duration': 2}, {'start_frame': 4, 'end_frame': 5, 'duration': 1}]
+    """
+    states = np.asarray(states)
+    if background is None and states.dtype == bool:
+        background = False
+    n_frames = len(states)
+    first = 0
+    if valid is not None:
+        valid = np.asarray(valid, dtype=bool)
+        valid_idx = np.flatnonzero(valid)
+        if not len(valid_idx):
+            return Bouts(*(np.empty(0, dtype=np.intp),) * 2, states[:0])
+        # 无效帧取前一个有效帧的状态
+        filled = np.maximum.accumulate(np.where(valid, np.arange(n_frames), 0))
+        states = states[filled]
+        first = valid_idx[0]
+
+    # 相邻帧状态变化处即为游程边界, 两端补齐后一次 np.diff
+    change = np.flatnonzero(states[first + 1:] != states[first:-1]) + first + 1
+    bounds = np.concatenate(([first], change, [n_frames])) if n_frames else np.zeros(1, np.intp)
+    bouts = Bouts(bounds[:-1], bounds[1:], states[bounds[:-1]])
+    if background is not None:
+        bouts = bouts.select(bouts.label != background)
+    return bouts.bridge_gaps(max_gap)
@@ -0,0 +1,139 @@
+"""与阈值无关的逐帧特征缓存
+Cache of threshold-independent per-frame features.
+
+距离、朝向角、速度等特征只取决于姿态文件本身 (以及帧率等少数参数),
+按 "姿态文件内容哈希 + 特征版本 + 参数" 作为键保存为 .npy 内存映射文件。
+用户只修改分类阈值时直接读取缓存, 只重做判定、平滑和段合并。
+
+Example:
+    >>> cache = FeatureCache(cache_dir, pose_path, version=1, params={"fps": 30.0})
+    >>> features = cache.load()
+    >>> if features is None:
+    ...     features = cache.save(compute_features(pose_path))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+from .streaming import FrameArrayStore
+
+# 结果目录下的特征缓存子目录
+FEATURE_CACHE_DIRNAME = ".feature_cache"
+
+_META_NAME = "features.json"
+
+
+def pose_digest(path: str) -> str:
+    """姿态文件内容的 SHA-1 (按路径、大小和修改时间记忆)
+    Content hash of a pose file, memoized on path, size and mtime.
+    """
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+    return _file_digest(abs_path, stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _file_digest(abs_path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha1()
+    with open(abs_path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """一个姿态文件的逐帧特征缓存
+    Per-frame feature cache for one pose file.
+
+    Args:
+        directory (str): 缓存目录, 通常为结果目录下的 .feature_cache
+        pose_path (str): 姿态文件路径, 其内容哈希是缓存键的一部分
+        version (int): 特征版本, 特征的计算方式改变时递增
+        params (Mapping[str, Any], optional): 影响特征的其他参数 (如帧率),
+            需可被 JSON 序列化
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        pose_path: str,
+        version: int,
+        params: Optional[Mapping[str, Any]] = None,
+    ):
+        self.directory = directory
+        self.pose_path = pose_path
+        self.version = version
+        self.params = dict(params or {})
+
+    @property
+    def key(self) -> str:
+        """缓存键 / Cache key."""
+        payload = json.dumps(
+            {
+                "pose": pose_digest(self.pose_path),
+                "version": self.version,
+                "params": self.params,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def path(self) -> str:
+        """当前键对应的缓存子目录 / Directory holding the arrays for the current key."""
+        return os.path.join(self.directory, self.key)
+
+    def load(self) -> Optional[Dict[str, np.ndarray]]:
+        """读取缓存, 未命中或不完整时返回 None
+        Load the cached arrays as read-only memory maps, or None on a miss.
+        """
+        path = self.path
+        try:
+            with open(os.path.join(path, _META_NAME), "r", encoding="utf-8") as handle:
+                names = json.load(handle)["arrays"]
+            return {
+                name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                for name in names
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def writer(self) -> FrameArrayStore:
+        """在临时目录中逐块写入特征, 写完后调用 commit
+        A store to fill chunk by chunk; call :meth:`commit` when done.
+        """
+        tmp = self.path + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        return FrameArrayStore(tmp)
+
+    def commit(self, store: FrameArrayStore) -> Dict[str, np.ndarray]:
+        """把 writer 中的数组移入缓存, 并清理同一目录下的旧键
+        Publish a filled store under the current key and drop stale entries.
+        """
+        store.flush()
+        with open(os.path.join(store.directory, _META_NAME), "w", encoding="utf-8") as handle:
+            json.dump({"arrays": list(store.arrays)}, handle)
+        store.arrays.clear()
+        path = self.path
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(store.directory, path)
+        for name in os.listdir(self.directory):
+            if name != self.key:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        return self.load()
+
+    def save(self, arrays: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """保存整段数组 / Save in-memory arrays."""
+        store = self.writer()
+        for name, values in arrays.items():
+            values = np.asarray(values)
+            store.create(name, len(values), values.dtype)[:] = values
+        return self.commit(store)
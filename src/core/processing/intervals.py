@@ -0,0 +1,233 @@
+"""行为段的区间集合运算
+Interval-set algebra for behavior bouts.
+
+IntervalSet 用排好序、互不重叠的 [start, stop) 帧区间表示一组行为段,
+并、交、差和缝合间隔都是对端点数组的整段向量运算, 例如
+"鼠1快速移动时的交互" 即 interaction & fast_moving,
+"药物侧以外的理毛" 即 grooming - drug_side。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class IntervalSet:
+    """排好序、互不重叠的半开帧区间集合
+    A normalized set of half-open frame intervals ``[start, stop)``.
+
+    构造时按起点排序, 合并重叠或首尾相接的区间并丢弃空区间。
+
+    Args:
+        start (array-like): 区间起点 / interval starts
+        stop (array-like): 区间终点 (不含) / interval stops (exclusive)
+
+    Example:
+        >>> grooming = IntervalSet([0, 50], [30, 90])
+        >>> drug = IntervalSet([20], [60])
+        >>> (grooming - drug).start, (grooming - drug).stop
+        (array([ 0, 60]), array([20, 90]))
+    """
+
+    __slots__ = ("start", "stop")
+
+    def __init__(self, start=(), stop=()):
+        start = np.asarray(start, dtype=np.int64).ravel()
+        stop = np.asarray(stop, dtype=np.int64).ravel()
+        if start.shape != stop.shape:
+            raise ValueError("start 与 stop 长度不一致 / start and stop lengths differ")
+        keep = stop > start
+        start, stop = start[keep], stop[keep]
+        if len(start) > 1:
+            order = np.argsort(start, kind="stable")
+            start, stop = start[order], stop[order]
+            reach = np.maximum.accumulate(stop)
+            # 起点超过之前所有区间的最远终点时开始新区间, 相接的区间也合并
+            first = np.concatenate(([True], start[1:] > reach[:-1]))
+            last = np.concatenate((first[1:], [True]))
+            start, stop = start[first], reach[last]
+        self.start = start
+        self.stop = stop
+
+    # ---------- 构造 ----------
+    @classmethod
+    def from_mask(cls, mask: np.ndarray) -> "IntervalSet":
+        """布尔逐帧掩码中为 True 的游程 / Runs of True in a per-frame mask."""
+        padded = np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0]))
+        edges = np.diff(padded)
+        return cls(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        start: str = "start_frame",
+        stop: str = "end_frame",
+        inclusive: bool = False,
+    ) -> "IntervalSet":
+        """由 analyze_* 输出的结果表构造
+        Build from a bout table; ``inclusive=True`` when ``stop`` is the last frame of a bout.
+        """
+        if df.empty:
+            return cls()
+        stops = df[stop].to_numpy()
+        return cls(df[start].to_numpy(), stops + 1 if inclusive else stops)
+
+    # ---------- 基本属性 ----------
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({len(self)} intervals, {self.total} frames)"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return np.array_equal(self.start, other.start) and np.array_equal(self.stop, other.stop)
+
+    __hash__ = None
+
+    @property
+    def duration(self) -> np.ndarray:
+        """每个区间的帧数 / Frames per interval."""
+        return self.stop - self.start
+
+    @property
+    def total(self) -> int:
+        """覆盖的总帧数 / Total frames covered."""
+        return int(self.duration.sum())
+
+    def mask(self, n_frames: int) -> np.ndarray:
+        """展开为逐帧布尔掩码 / Expand to a per-frame boolean mask."""
+        edges = np.zeros(n_frames + 1, dtype=np.int64)
+        np.add.at(edges, np.minimum(self.start, n_frames), 1)
+        np.add.at(edges, np.minimum(self.stop, n_frames), -1)
+        return np.cumsum(edges[:-1]) > 0
+
+    # ---------- 集合运算 ----------
+    def _overlap(self, other: "IntervalSet", depth: int) -> "IntervalSet":
+        """被至少 depth 个输入覆盖的部分 (两个集合各自已不重叠)"""
+        points = np.concatenate((self.start, other.start, self.stop, other.stop))
+        delta = np.repeat([1, -1], len(self) + len(other))
+        # 同一位置先结束再开始, 使相接的区间不算重叠
+        order = np.lexsort((delta, points))
+        points, coverage = points[order], np.cumsum(delta[order])
+        enter = np.flatnonzero(coverage >= depth)
+        return IntervalSet(points[enter], points[enter + 1])
+
+    def __or__(self, other: "IntervalSet") -> "IntervalSet":
+        """并集 / Union."""
+        return IntervalSet(
+            np.concatenate((self.start, other.start)), np.concatenate((self.stop, other.stop))
+        )
+
+    def __and__(self, other: "IntervalSet") -> "IntervalSet":
+        """交集 / Intersection."""
+        if not len(self) or not len(other):
+            return IntervalSet()
+        return self._overlap(other, 2)
+
+    def __sub__(self, other: "IntervalSet") -> "IntervalSet":
+        """差集 / Difference."""
+        if not len(self) or not len(other):
+            return self
+        return self & other.complement(int(self.start[0]), int(self.stop[-1]))
+
+    def complement(self, lo: int, hi: int) -> "IntervalSet":
+        """[lo, hi) 内未被覆盖的部分 / Uncovered part of ``[lo, hi)``."""
+        start = np.clip(np.concatenate(([lo], self.stop)), lo, hi)
+        stop = np.clip(np.concatenate((self.start, [hi])), lo, hi)
+        return IntervalSet(start, stop)
+
+    def close_gaps(self, max_gap: int) -> "IntervalSet":
+        """合并间隔不超过 max_gap 帧的相邻区间 / Merge intervals separated by ``max_gap`` frames or fewer."""
+        if max_gap <= 0 or len(self) < 2:
+            return self
+        joined = self.start[1:] - self.stop[:-1] <= max_gap
+        first = np.concatenate(([True], ~joined))
+        last = np.concatenate((~joined, [True]))
+        return IntervalSet(self.start[first], self.stop[last])
+
+    def filter_duration(
+        self, min_frames: Optional[int] = None, max_frames: Optional[int] = None
+    ) -> "IntervalSet":
+        """保留 min_frames <= 帧数 <= max_frames 的区间 / Keep intervals within the duration bounds."""
+        keep = np.ones(len(self), dtype=bool)
+        if min_frames is not None:
+            keep &= self.duration >= min_frames
+        if max_frames is not None:
+            keep &= self.duration <= max_frames
+        return IntervalSet(self.start[keep], self.stop[keep])
+
+    # ---------- 统计 ----------
+    def mean(self, values: np.ndarray) -> float:
+        """覆盖帧上的均值, 即各区间均值按时长加权; NaN 帧不计入
+        Mean of a per-frame array over covered frames (the duration-weighted mean of bout means),
+        ignoring NaN frames.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if not len(self):
+            return float("nan")
+        if self.start[0] < 0 or self.stop[-1] > len(values):
+            raise ValueError(
+                f"区间 [{self.start[0]}, {self.stop[-1]}) 超出数组长度 {len(values)} / "
+                "intervals extend beyond the values array"
+            )
+        # 有效值之和与有效帧数各自取前缀和, 区间外的 NaN 不影响区间内的均值
+        valid = ~np.isnan(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(valid)))
+        n_valid = (counts[self.stop] - counts[self.start]).sum()
+        if not n_valid:
+            return float("nan")
+        return float((sums[self.stop] - sums[self.start]).sum() / n_valid)
+
+    def summary(self, fps: Optional[float] = None) -> Dict[str, float]:
+        """区间数、总时长、平均时长和按时长加权的平均时长
+        Count, total, mean and duration-weighted mean bout length (seconds if ``fps`` is given).
+        """
+        duration = self.duration.astype(np.float64)
+        scale = 1.0 / fps if fps else 1.0
+        total = float(duration.sum())
+        return {
+            "count": len(self),
+            "total": total * scale,
+            "mean_duration": float(duration.mean()) * scale if len(self) else 0.0,
+            "weighted_mean_duration": float(np.square(duration).sum() / total) * scale
+            if total else 0.0,
+        }
+
+
+def bout_intervals(
+    results_df: pd.DataFrame,
+    labels: Sequence[str],
+    label_column: Optional[str] = None,
+    inclusive: bool = False,
+) -> Dict[str, IntervalSet]:
+    """analyze_* 结果表中每类行为的区间集合
+    ``{label: IntervalSet}`` for the bouts in an analysis result table.
+
+    区间不随结果表保存, 按需从 (可能已过滤或拼接的) 表中计算, 因此总与表的行一致。
+    Intervals are derived on demand rather than stored on the table, so
+    they always match its current rows.
+
+    Args:
+        results_df (pd.DataFrame): 含 start_frame / end_frame 的结果表
+        labels (Sequence[str]): 行为名称; label_column 为空时只能有一个, 整张表都属于它
+        label_column (str, optional): 区分行为类别的列
+        inclusive (bool): end_frame 是否为段的最后一帧 (而非之后一帧)
+    """
+    if label_column is None:
+        (label,) = labels
+        return {label: IntervalSet.from_frame(results_df, inclusive=inclusive)}
+    if results_df.empty:
+        return {label: IntervalSet() for label in labels}
+    return {
+        label: IntervalSet.from_frame(
+            results_df[results_df[label_column] == label], inclusive=inclusive
+        )
+        for label in labels
+    }
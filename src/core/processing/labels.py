@@ -0,0 +1,77 @@
+"""逐帧行为标签的紧凑编码
+Compact integer encoding for per-frame behavior labels.
+
+逐帧行为数组只保存 int8 编码 (每帧 1 字节), 比较、计数都是整数运算;
+只在写结果表或画图时通过 LabelTable 还原为文字标签。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+LABEL_DTYPE = np.int8
+
+
+@dataclass(frozen=True)
+class LabelTable:
+    """标签编码表: 第 i 个标签的编码为 i
+    Label table: the i-th label is stored as code i.
+
+    Attributes:
+        labels: 按编码顺序排列的标签 / labels in code order
+
+    Example:
+        >>> table = LabelTable(("interaction", "proximity", "none"))
+        >>> codes = table.full(5, "none")
+        >>> codes[2:4] = table.code("interaction")
+        >>> table.counts(codes)
+        {'interaction': 2, 'proximity': 0, 'none': 3}
+    """
+
+    labels: Tuple[str, ...]
+
+    def __post_init__(self):
+        object.__setattr__(self, "labels", tuple(self.labels))
+        if len(set(self.labels)) != len(self.labels):
+            raise ValueError(f"标签重复 / Duplicate labels: {self.labels}")
+        if len(self.labels) > np.iinfo(LABEL_DTYPE).max + 1:
+            raise ValueError(f"标签过多 / Too many labels for int8: {len(self.labels)}")
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def code(self, label: str) -> int:
+        """单个标签的编码 / Code of one label."""
+        try:
+            return self.labels.index(label)
+        except ValueError:
+            raise ValueError(f"未知的标签 / Unknown label: {label!r}") from None
+
+    def full(self, n_frames: int, label: str) -> np.ndarray:
+        """全部为 label 的编码数组 / Code array filled with ``label``."""
+        return np.full(n_frames, self.code(label), dtype=LABEL_DTYPE)
+
+    def encode(self, values: Sequence) -> np.ndarray:
+        """文字标签数组转为编码; 已是整数编码的数组原样返回 (转为 int8)
+        Encode labels; integer arrays are treated as codes already.
+        """
+        values = np.asarray(values)
+        if values.dtype.kind in "iu":
+            if values.size and (values.min() < 0 or values.max() >= len(self.labels)):
+                raise ValueError("编码超出标签表范围 / Codes out of range")
+            return values.astype(LABEL_DTYPE, copy=False)
+        uniques, inverse = np.unique(values.astype(object), return_inverse=True)
+        lookup = np.array([self.code(label) for label in uniques], dtype=LABEL_DTYPE)
+        return lookup[inverse].reshape(values.shape)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """编码还原为文字标签 (object 数组) / Decode codes to an object array of labels."""
+        return np.asarray(self.labels, dtype=object)[np.asarray(codes)]
+
+    def counts(self, codes: np.ndarray) -> Dict[str, int]:
+        """每个标签的帧数 / Frame count per label, in table order."""
+        counts = np.bincount(np.asarray(codes, dtype=np.intp), minlength=len(self.labels))
+        return {label: int(count) for label, count in zip(self.labels, counts)}
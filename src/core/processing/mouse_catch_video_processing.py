@@ -2,27 +2,35 @@ import os
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import streamlit as st
-from scipy.signal import butter, filtfilt, savgol_filter, find_peaks
-from collections import Counter
-import time
+from scipy.signal import savgol_filter
+import tempfile
 import traceback
-from matplotlib.ticker import FuncFormatter
 from scipy.interpolate import interp1d
-from typing import Optional
+from typing import Dict, Mapping, Optional, Sequence, Tuple, Union
 
+from .pose_manifest import find_pose_file
+from .pose_store import POSE_CACHE_DIRNAME, load_pose, sniff_pose_schema
+from .reporting import report
+from .sweep import bout_summary
+from .trajectory_pipeline import catch_pipeline
+from .streaming import (
+    FrameArrayStore,
+    ValidIndexCursor,
+    bracket_valid_points,
+    iter_frame_chunks
+)
 from .trajectory_processing import (
     filter_low_likelihood,
     filter_extreme_jumps,
     filter_unreasonable_speed,
     filter_unreasonable_position,
-    interpolate_missing_points,
-    smooth_trajectory,
     detect_grab_trajectories,
-    plot_trajectory_with_events,
     format_timestamp
 )
 
+# 清洗流水线前四步 (过滤) 的提示文字
+CATCH_STAGE_LABELS = ('置信度过滤', '位置过滤', '极端跳变过滤', '速度过滤')
+
 def process_mouse_catch_video(
     video_path: str,
     csv_path: Optional[str] = None,
@@ -30,349 +38,625 @@ def process_mouse_catch_video(
     speed_threshold: float = 100.0,  # 速度阈值参数，单位：像素/帧
     min_duration_sec: float = 0.5,   # 最小持续时间，默认0.5秒
     max_duration_sec: float = 1.0,   # 最大持续时间，默认1秒
-    fps: float = 120.0               # 帧率，默认120fps
+    fps: float = 120.0,              # 帧率，默认120fps
+    chunk_frames: Optional[int] = None,  # 分块流式分析的每块帧数
+    bodyparts: Optional[Sequence[str]] = None,  # 要分析的关键点, 默认第一个
+    smoother: str = "savgol"  # 平滑方式: "savgol" 或 "kalman"
 ):
     """
     X
     
     Args:
         video_path (str): 原始视频文件路径。
-        csv_path (str, optional): CSV文件路径。如果未提供，将自动查找与视频同名的CSV文件。
+        csv_path (str, optional): DLC输出文件路径（.h5 或 .csv）。如果未提供，将自动查找与视频同名的输出文件（优先H5）。
         threshold (float): 关键点置信度阈值(如0.6)。
         speed_threshold (float): 两帧之间最大允许的速度阈值(像素/帧)。
         min_duration_sec (float): 最小持续时间(秒)。
         max_duration_sec (float): 最大持续时间(秒)。
         fps (float): 视频帧率。
+        chunk_frames (int, optional): 分块流式分析的每块帧数，用于超长录像；
+            逐帧结果写入 .pose_cache 下的内存映射文件。默认整段载入内存。
+        bodyparts (Sequence[str], optional): 要分析的关键点（如多只爪子），默认只分析
+            文件中的第一个关键点；多个关键点在一次向量化清洗中同时处理，
+            结果分别保存到结果目录下以关键点命名的子目录。
+        smoother (str): "savgol"（插值 + Savitzky-Golay，默认）或 "kalman"
+            （Kalman/RTS 平滑，按置信度加权并直接补齐缺失帧）。
     """
     try:
         video_dir = os.path.dirname(video_path)
         video_name = os.path.splitext(os.path.basename(video_path))[0]
         
-        # 1. 确定CSV文件路径
+        # 1. 确定DLC输出文件路径（优先H5，回退CSV）
         if csv_path is None:
-            csv_files = [f for f in os.listdir(video_dir) if f.startswith(video_name) and f.endswith('.csv')]
-            if not csv_files:
-                st.error(f"未找到对应的CSV文件 / No corresponding CSV file for: {video_name}")
+            csv_path = find_pose_file(video_path)
+            if csv_path is None:
+                report.error(f"未找到对应的DLC输出文件 / No corresponding DLC output for: {video_name}")
                 return
-            csv_path = os.path.join(video_dir, csv_files[0])
         
         if not os.path.exists(csv_path):
-            st.error(f"指定的CSV文件不存在: {csv_path} / Specified CSV file does not exist")
+            report.error(f"指定的文件不存在: {csv_path} / Specified file does not exist")
             return
         
-        st.info(f"正在处理CSV文件: {os.path.basename(csv_path)} / Processing CSV file")
+        report.info(f"正在处理文件: {os.path.basename(csv_path)} / Processing file")
         
-        # 读取CSV文件
+        # 读取DLC输出：先只读表头识别格式，再单次解析所需列（经姿态缓存）
         try:
-            # 首先尝试直接读取，不指定header
-            df = pd.read_csv(csv_path)
-            
-            # 检查是否为DLC格式
-            if 'bodyparts' in df.iloc[0].values and 'coords' in df.iloc[1].values:
-                st.success("检测到DLC格式CSV / Detected DLC format CSV")
-                
-                # 提取实际的数据，跳过前3行header
-                data_df = pd.read_csv(csv_path, skiprows=3)
-                
-                # 获取x, y, likelihood列的索引
-                x_idx = 1  # 第二列是x坐标
-                y_idx = 2  # 第三列是y坐标
-                likelihood_idx = 3  # 第四列是likelihood
-                
-                # 提取坐标数据
-                x = data_df.iloc[:, x_idx].values.astype(float)
-                y = data_df.iloc[:, y_idx].values.astype(float)
-                likelihood = data_df.iloc[:, likelihood_idx].values.astype(float)
-                
-                # 创建模拟的DataFrame结构以适配现有代码
-                analysis_df = pd.DataFrame({
-                    'x': x,
-                    'y': y,
-                    'likelihood': likelihood
-                })
-                
-                st.success("成功提取坐标数据 / Successfully extracted coordinate data")
-            else:
-                st.error("不是标准的DLC格式CSV文件 / Not a standard DLC format CSV file")
+            try:
+                schema = sniff_pose_schema(csv_path)
+            except ValueError:
+                report.error("不是标准的DLC格式文件 / Not a standard DLC format file")
                 return
-                
+            report.success("检测到DLC格式数据 / Detected DLC format data")
+
+            # 默认只分析第一个关键点; 指定多个关键点时一次清洗全部关键点
+            bodyparts = list(bodyparts) if bodyparts else [schema.bodyparts[0]]
+            missing = [bp for bp in bodyparts if bp not in schema.bodyparts]
+            if missing:
+                report.error(f"文件中没有这些关键点 / Bodyparts not in file: {', '.join(missing)}")
+                return
+            if chunk_frames is None:
+                pose = load_pose(csv_path, bodyparts=bodyparts, schema=schema)
+                columns = {
+                    field: np.stack(
+                        [pose.get(bp, field).astype(float) for bp in bodyparts], axis=1
+                    )
+                    for field in ('x', 'y', 'likelihood')
+                }
+            else:
+                # 不做投影, 保持内存映射, 由 analyze_catch_behavior 按块读取
+                pose = load_pose(csv_path, schema=schema, chunk_rows=chunk_frames)
+                frame_root = os.path.join(
+                    os.path.dirname(csv_path), POSE_CACHE_DIRNAME, f"{video_name}_frames"
+                )
+
+            report.success("成功提取坐标数据 / Successfully extracted coordinate data")
+
         except Exception as e:
-            st.error(f"读取CSV文件失败: {str(e)} / Failed to read CSV file: {str(e)}")
+            report.error(f"读取文件失败: {str(e)} / Failed to read file: {str(e)}")
             return
         
         # 2. 数据预处理和分析
-        st.info("开始数据分析 / Starting data analysis")
-        results_df, analysis_context = analyze_catch_behavior(
-            analysis_df,
+        report.info("开始数据分析 / Starting data analysis")
+        analysis_params = dict(
             threshold=threshold,
             speed_threshold=speed_threshold,
             min_duration_sec=min_duration_sec,
             max_duration_sec=max_duration_sec,
-            fps=fps
+            fps=fps,
+            smoother=smoother
         )
+        if chunk_frames is None:
+            analyses = analyze_catch_bodyparts(columns, bodyparts, **analysis_params)
+        else:
+            analyses = {}
+            for bp in bodyparts:
+                analyses[bp] = analyze_catch_behavior(
+                    {field: pose.get(bp, field) for field in ('x', 'y', 'likelihood')},
+                    chunk_frames=chunk_frames,
+                    frame_dir=frame_root if len(bodyparts) == 1 else os.path.join(frame_root, bp),
+                    **analysis_params
+                )
         
-        if results_df.empty and not analysis_context:
-            st.warning("分析未产生有效结果，无法继续 / Analysis did not produce valid results")
-            return
-        
-        # 3. 保存分析数据
-        results_dir = os.path.join(video_dir, f"{video_name}_results")
-        os.makedirs(results_dir, exist_ok=True)
-        
-        # 创建轨迹数据目录
-        trajectories_dir = os.path.join(results_dir, "trajectories")
-        os.makedirs(trajectories_dir, exist_ok=True)
+        # 3. 保存和显示结果; 多个关键点时各自存到结果目录下的子目录
+        results_root = os.path.join(video_dir, f"{video_name}_results")
+        for bp, (results_df, analysis_context) in analyses.items():
+            if len(analyses) > 1:
+                report.heading(f"🐾 {bp}")
+                results_dir = os.path.join(results_root, bp)
+            else:
+                results_dir = results_root
+            if results_df.empty and not analysis_context:
+                report.warning("分析未产生有效结果，无法继续 / Analysis did not produce valid results")
+                continue
+            _save_catch_results(results_df, analysis_context, results_dir, fps)
+    
+    except Exception as e:
+        report.error(f"处理视频失败 / Failed to process video: {str(e)}")
+        report.error(traceback.format_exc())
+
+def _save_catch_results(results_df, analysis_context, results_dir, fps):
+    """
+    保存单个关键点的分析结果、逐段轨迹和图表, 并在页面中显示。
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    
+    # 创建轨迹数据目录
+    trajectories_dir = os.path.join(results_dir, "trajectories")
+    os.makedirs(trajectories_dir, exist_ok=True)
+    
+    # 即使结果为空，也保存一个空的结果文件
+    if not results_df.empty:
+        results_df.to_csv(os.path.join(results_dir, "catch_analysis_results.csv"), index=False)
+        report.success(f"已保存分析结果到CSV / Analysis results saved to CSV")
         
-        # 即使结果为空，也保存一个空的结果文件
-        if not results_df.empty:
-            results_df.to_csv(os.path.join(results_dir, "catch_analysis_results.csv"), index=False)
-            st.success(f"已保存分析结果到CSV / Analysis results saved to CSV")
+        # 保存每个轨迹的详细数据
+        for i, result in enumerate(analysis_context.get('results', []), 1):
+            start_f = result['start_frame']
+            end_f = result['end_frame']
             
-            # 保存每个轨迹的详细数据
-            for i, result in enumerate(analysis_context.get('results', []), 1):
-                start_f = result['start_frame']
-                end_f = result['end_frame']
-                
-                # 提取轨迹段的x,y坐标
-                trajectory_data = pd.DataFrame({
-                    'frame': range(start_f, end_f + 1),
-                    'time': [f/fps for f in range(start_f, end_f + 1)],
-                    'x': analysis_context['x_smooth'][start_f:end_f + 1],
-                    'y': analysis_context['y_smooth'][start_f:end_f + 1]
-                })
-                
-                # 保存轨迹数据
-                trajectory_file = os.path.join(trajectories_dir, f"trajectory_{i}.csv")
-                trajectory_data.to_csv(trajectory_file, index=False)
+            # 提取轨迹段的x,y坐标
+            trajectory_data = pd.DataFrame({
+                'frame': range(start_f, end_f + 1),
+                'time': [f/fps for f in range(start_f, end_f + 1)],
+                'x': analysis_context['x_smooth'][start_f:end_f + 1],
+                'y': analysis_context['y_smooth'][start_f:end_f + 1]
+            })
             
-            # 验证轨迹文件数量与分析结果数量是否一致
-            trajectory_files = [f for f in os.listdir(trajectories_dir) if f.startswith('trajectory_') and f.endswith('.csv')]
-            if len(trajectory_files) != len(results_df):
-                st.warning(f"⚠️ 轨迹文件数量({len(trajectory_files)})与分析结果数量({len(results_df)})不一致！")
-            else:
-                st.success(f"已保存{len(analysis_context.get('results', []))}个轨迹的详细数据，与分析结果数量一致")
-        else:
-            empty_df = pd.DataFrame(columns=[
-                'start_time', 'peak_time', 'end_time',
-                'start_frame', 'peak_frame', 'end_frame',
-                'trajectory_distance', 'horizontal_displacement',
-                'average_speed', 'lift_height', 'left_to_right_distance',
-                'left_to_right_speed', 'left_to_right_acceleration_mean',
-                'left_to_right_acceleration_max', 'left_to_right_smoothness',
-                'right_to_left_distance', 'right_to_left_speed',
-                'right_to_left_acceleration_mean', 'right_to_left_acceleration_max',
-                'right_to_left_smoothness', 'max_height', 'duration',
-                'start_pos_x', 'start_pos_y', 'end_pos_x', 'end_pos_y'
-            ])
-            empty_df.to_csv(os.path.join(results_dir, "catch_analysis_results.csv"), index=False)
-            st.warning("保存了空的分析结果 / Saved empty analysis results")
+            # 保存轨迹数据
+            trajectory_file = os.path.join(trajectories_dir, f"trajectory_{i}.csv")
+            trajectory_data.to_csv(trajectory_file, index=False)
         
-        # 4. 生成可视化图表
-        figure_dir = os.path.join(results_dir, "figures")
-        os.makedirs(figure_dir, exist_ok=True)
-        
-        try:
-            plot_analysis_results(
-                analysis_context,
-                figure_dir=figure_dir,
-                fps=fps
-            )
-            st.success("已生成可视化图表 / Visualization charts generated")
-        except Exception as vis_error:
-            st.error(f"生成可视化失败: {str(vis_error)} / Failed to generate visualizations")
-        
-        # 5. 在Streamlit中显示可视化
-        st.success(f"分析完成! / Analysis done. 结果已保存至 {results_dir}")
-        st.subheader("📊 分析结果 / Analysis Results")
-        
-        # 显示图表
-        trajectory_png = os.path.join(figure_dir, "catch_trajectory.png")
-        velocity_png = os.path.join(figure_dir, "catch_velocity.png")
-        height_png = os.path.join(figure_dir, "catch_height.png")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            if os.path.exists(trajectory_png):
-                st.image(trajectory_png, caption="抓取轨迹 / Catch Trajectory")
-            else:
-                st.info("未生成轨迹图 / No trajectory chart generated")
-                
-            if os.path.exists(height_png):
-                st.image(height_png, caption="高度变化 / Height Change")
-            else:
-                st.info("未生成高度图 / No height chart generated")
-        with col2:
-            if os.path.exists(velocity_png):
-                st.image(velocity_png, caption="速度分析 / Velocity Analysis")
-            else:
-                st.info("未生成速度图 / No velocity chart generated")
-        
-        # 显示结果表格
-        if not results_df.empty:
-            st.subheader("🎯 抓取行为分析结果 / Catch Behavior Analysis")
-            st.dataframe(results_df)
+        # 验证轨迹文件数量与分析结果数量是否一致
+        trajectory_files = [f for f in os.listdir(trajectories_dir) if f.startswith('trajectory_') and f.endswith('.csv')]
+        if len(trajectory_files) != len(results_df):
+            report.warning(f"⚠️ 轨迹文件数量({len(trajectory_files)})与分析结果数量({len(results_df)})不一致！")
         else:
-            st.warning("未发现有效的抓取行为 / No valid catch behaviors detected")
+            report.success(f"已保存{len(analysis_context.get('results', []))}个轨迹的详细数据，与分析结果数量一致")
+    else:
+        empty_df = pd.DataFrame(columns=[
+            'start_time', 'peak_time', 'end_time',
+            'start_frame', 'peak_frame', 'end_frame',
+            'trajectory_distance', 'horizontal_displacement',
+            'average_speed', 'lift_height', 'left_to_right_distance',
+            'left_to_right_speed', 'left_to_right_acceleration_mean',
+            'left_to_right_acceleration_max', 'left_to_right_smoothness',
+            'right_to_left_distance', 'right_to_left_speed',
+            'right_to_left_acceleration_mean', 'right_to_left_acceleration_max',
+            'right_to_left_smoothness', 'max_height', 'duration',
+            'start_pos_x', 'start_pos_y', 'end_pos_x', 'end_pos_y'
+        ])
+        empty_df.to_csv(os.path.join(results_dir, "catch_analysis_results.csv"), index=False)
+        report.warning("保存了空的分析结果 / Saved empty analysis results")
     
-    except Exception as e:
-        st.error(f"处理视频失败 / Failed to process video: {str(e)}")
-        st.error(traceback.format_exc())
+    # 4. 生成可视化图表
+    figure_dir = os.path.join(results_dir, "figures")
+    os.makedirs(figure_dir, exist_ok=True)
+    
+    try:
+        plot_analysis_results(
+            analysis_context,
+            figure_dir=figure_dir,
+            fps=fps
+        )
+        report.success("已生成可视化图表 / Visualization charts generated")
+    except Exception as vis_error:
+        report.error(f"生成可视化失败: {str(vis_error)} / Failed to generate visualizations")
+    
+    # 5. 发出显示事件 (由订阅的页面渲染)
+    report.success(f"分析完成! / Analysis done. 结果已保存至 {results_dir}")
+    report.heading("📊 分析结果 / Analysis Results")
+    
+    # 显示图表
+    trajectory_png = os.path.join(figure_dir, "catch_trajectory.png")
+    velocity_png = os.path.join(figure_dir, "catch_velocity.png")
+    height_png = os.path.join(figure_dir, "catch_height.png")
+    
+    report.images([
+        [(trajectory_png, "抓取轨迹 / Catch Trajectory",
+          "未生成轨迹图 / No trajectory chart generated"),
+         (height_png, "高度变化 / Height Change",
+          "未生成高度图 / No height chart generated")],
+        [(velocity_png, "速度分析 / Velocity Analysis",
+          "未生成速度图 / No velocity chart generated")]
+    ])
+    
+    # 显示结果表格
+    if not results_df.empty:
+        report.heading("🎯 抓取行为分析结果 / Catch Behavior Analysis")
+        report.table(results_df)
+    else:
+        report.warning("未发现有效的抓取行为 / No valid catch behaviors detected")
 
 def analyze_catch_behavior(
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, Mapping[str, np.ndarray]],
     threshold: float,
     speed_threshold: float,
     min_duration_sec: float,
     max_duration_sec: float,
-    fps: float = 120.0
+    fps: float = 120.0,
+    chunk_frames: Optional[int] = None,
+    frame_dir: Optional[str] = None,
+    smoother: str = "savgol"
 ):
     """
     分析抓取行为数据，包括预处理、轨迹提取和运动参数计算。
     
     Args:
-        df: 包含x, y, likelihood列的DataFrame
+        df: 包含x, y, likelihood列的DataFrame, 或 {列名: 一维数组} 映射(可为内存映射数组)
         threshold: 置信度阈值
         speed_threshold: 速度阈值（像素/秒）
         min_duration_sec: 最小持续时间（秒）
         max_duration_sec: 最大持续时间（秒）
         fps: 视频帧率
+        chunk_frames: 分块流式分析的每块帧数；各步骤按块处理并带光环帧，
+            结果与整段处理一致，逐帧数组写入 frame_dir 下的内存映射文件
+        frame_dir: 流式分析的逐帧数组目录，默认使用临时目录
+        smoother: "savgol"（插值 + Savitzky-Golay）或 "kalman"（Kalman/RTS 平滑，
+            直接补齐缺失帧）；分块流式分析只支持 "savgol"
     """
     try:
-        # 记录原始帧数
-        original_frames = len(df)
-        st.info(f"原始帧数: {original_frames} (总时长: {original_frames/fps:.2f}秒)")
-        
         # 1. 数据预处理
         # 检查必要的列是否存在
         required_columns = ['x', 'y', 'likelihood']
-        if not all(col in df.columns for col in required_columns):
-            st.error(f"缺少必要的列: {', '.join(required_columns)}")
+        if not all(col in df for col in required_columns):
+            report.error(f"缺少必要的列: {', '.join(required_columns)}")
             return pd.DataFrame(), {}
         
-        # 第一步：过滤低置信度点
-        df_filtered = filter_low_likelihood(df, threshold)
-        st.info(f"置信度过滤后有效点数: {df_filtered['x'].notna().sum()}")
+        # 记录原始帧数
+        original_frames = len(df['x'])
+        report.info(f"原始帧数: {original_frames} (总时长: {original_frames/fps:.2f}秒)")
+        
+        if chunk_frames is not None:
+            if smoother != "savgol":
+                report.warning("分块分析只支持 Savitzky-Golay 平滑 / Chunked analysis uses Savitzky-Golay smoothing")
+            smooth = clean_catch_trajectory_streaming(
+                df, threshold, speed_threshold, fps, chunk_frames, frame_dir
+            )
+            df_smooth = {'x': smooth['x_smooth'], 'y': smooth['y_smooth']}
+        else:
+            df_smooth = _clean_catch_trajectory(df, threshold, speed_threshold, fps, smoother)
+            smooth = None
+        
+        return _catch_results(df_smooth['x'], df_smooth['y'], fps, chunk_frames, smooth)
+        
+    except Exception as e:
+        report.error(f"数据处理失败: {str(e)}")
+        report.error(traceback.format_exc())
+        return pd.DataFrame(), {}
+
+def analyze_catch_bodyparts(
+    columns: Mapping[str, np.ndarray],
+    bodyparts: Sequence[str],
+    threshold: float,
+    speed_threshold: float,
+    min_duration_sec: float,
+    max_duration_sec: float,
+    fps: float = 120.0,
+    smoother: str = "savgol"
+) -> Dict[str, Tuple[pd.DataFrame, dict]]:
+    """
+    多个关键点（如多只爪子）的抓取分析：所有关键点在同一个 (frames, bodyparts, 2)
+    缓冲区上一次完成清洗，再逐个关键点检测抓取事件。结果与对每个关键点分别
+    调用 analyze_catch_behavior 一致。
+    
+    Args:
+        columns: {'x', 'y', 'likelihood': (frames, bodyparts) 数组}
+        bodyparts: 各列对应的关键点名称
+        threshold, speed_threshold, min_duration_sec, max_duration_sec, fps, smoother:
+            同 analyze_catch_behavior
+    
+    Returns:
+        Dict[str, Tuple[pd.DataFrame, dict]]: {关键点: (results_df, analysis_context)}
+    """
+    try:
+        required_columns = ['x', 'y', 'likelihood']
+        if not all(col in columns for col in required_columns):
+            report.error(f"缺少必要的列: {', '.join(required_columns)}")
+            return {}
+        
+        original_frames = len(columns['x'])
+        report.info(f"原始帧数: {original_frames} (总时长: {original_frames/fps:.2f}秒), "
+                f"关键点数: {len(bodyparts)}")
         
-        # 第二步：过滤不合理位置点
-        df_filtered = filter_unreasonable_position(df_filtered)
-        st.info(f"位置过滤后有效点数: {df_filtered['x'].notna().sum()}")
+        cleaned = _clean_catch_trajectory(columns, threshold, speed_threshold, fps, smoother)
+        x_smooth = np.asarray(cleaned['x']).reshape(original_frames, -1)
+        y_smooth = np.asarray(cleaned['y']).reshape(original_frames, -1)
+        return {
+            bp: _catch_results(
+                np.ascontiguousarray(x_smooth[:, k]), np.ascontiguousarray(y_smooth[:, k]), fps
+            )
+            for k, bp in enumerate(bodyparts)
+        }
         
-        # 第三步：粗过滤极端跳变
-        df_filtered = filter_extreme_jumps(df_filtered, extreme_dist=200.0)
-        st.info(f"极端跳变过滤后有效点数: {df_filtered['x'].notna().sum()}")
+    except Exception as e:
+        report.error(f"数据处理失败: {str(e)}")
+        report.error(traceback.format_exc())
+        return {}
+
+def _catch_results(
+    x_smooth: np.ndarray,
+    y_smooth: np.ndarray,
+    fps: float,
+    chunk_frames: Optional[int] = None,
+    smooth: Optional[Dict[str, np.ndarray]] = None
+):
+    """
+    在清洗后的单个关键点轨迹上检测抓取事件并计算运动参数。
+    
+    Returns:
+        (results_df, analysis_context)
+    """
+    # 第七步：检测抓取事件
+    events = _detect_catch_events(x_smooth, y_smooth, fps, chunk_frames)
+    x_smooth = np.asarray(x_smooth)
+    y_smooth = np.asarray(y_smooth)
+    
+    # 生成结果数据
+    results = []
+    for event in events:
+        start_f = event['i_start']
+        end_f = event['i_end']
+        duration = (end_f - start_f) / fps
         
-        # 第四步：过滤不合理速度
-        df_filtered = filter_unreasonable_speed(df_filtered, speed_threshold, fps)
-        st.info(f"速度过滤后有效点数: {df_filtered['x'].notna().sum()}")
+        # 提取轨迹段
+        x_vals = np.asarray(x_smooth[start_f:end_f+1])
+        y_vals = np.asarray(y_smooth[start_f:end_f+1])
+        # 找到实际的峰值（最高点）
+        peak_idx = np.argmin(y_vals)  # y坐标最小值对应最高点
+        peak_frame = start_f + peak_idx
+        peak_t = peak_frame / fps
+        peak_timestamp = format_timestamp(peak_t)
         
-        # 第五步：插值处理
-        df_interpolated = interpolate_missing_points(df_filtered)
+        # 计算运动参数
+        distance = np.abs(x_vals[-1] - x_vals[0])
+        height_change = np.max(np.abs(y_vals - y_vals[0]))
         
-        # 第六步：平滑处理
-        df_smooth = smooth_trajectory(df_interpolated, window_length=7, polyorder=2)
+        # 计算水平位移和平均速度
+        horizontal_displacement = np.abs(x_vals[-1] - x_vals[0])
+        average_speed = distance / duration if duration > 0 else 0
         
-        # 第七步：检测抓取事件
-        events = detect_grab_trajectories(
-            df_smooth, 
-            fps=fps,
-            barrier_region=(330, 450, 250, 400),
-            start_region=(200, 300, 350, 450),
-            max_back_time=0.5,
-            max_forward_time=0.2
-        )
+        # 计算抬起高度（相对于起始点的最大高度变化）
+        lift_height = np.abs(np.min(y_vals) - y_vals[0])  # y坐标向下为正，所以用min
         
-        # 生成结果数据
-        results = []
-        for event in events:
-            start_f = event['i_start']
-            end_f = event['i_end']
-            duration = (end_f - start_f) / fps
-            
-            # 提取轨迹段
-            segment = df_smooth.iloc[start_f:end_f+1]
-            x_vals = segment['x'].values
-            y_vals = segment['y'].values
-            
-            # 找到实际的峰值（最高点）
-            peak_idx = np.argmin(y_vals)  # y坐标最小值对应最高点
-            peak_frame = start_f + peak_idx
-            peak_t = peak_frame / fps
-            peak_timestamp = format_timestamp(peak_t)
-            
-            # 计算运动参数
-            distance = np.abs(x_vals[-1] - x_vals[0])
-            height_change = np.max(np.abs(y_vals - y_vals[0]))
-            
-            # 计算水平位移和平均速度
-            horizontal_displacement = np.abs(x_vals[-1] - x_vals[0])
-            average_speed = distance / duration if duration > 0 else 0
-            
-            # 计算抬起高度（相对于起始点的最大高度变化）
-            lift_height = np.abs(np.min(y_vals) - y_vals[0])  # y坐标向下为正，所以用min
-            
-            # 计算速度和加速度
-            speeds = np.sqrt(np.diff(x_vals)**2 + np.diff(y_vals)**2) * fps
-            mean_speed = np.mean(speeds)
-            max_speed = np.max(speeds)
-            
-            accelerations = np.diff(speeds) * fps
-            mean_acc = np.mean(accelerations)
-            max_acc = np.max(np.abs(accelerations))
-            
-            # 计算平滑度
-            if len(accelerations) > 2:
-                smoothness = -np.log(np.mean(np.square(np.diff(accelerations))))
-            else:
-                smoothness = 0
-            
-            result = {
-                'start_time': format_timestamp(event['start_time']),
-                'peak_time': peak_timestamp,
-                'end_time': format_timestamp(event['end_time']),
-                'start_frame': start_f,
-                'peak_frame': peak_frame,
-                'end_frame': end_f,
-                'trajectory_distance': distance,
-                'horizontal_displacement': horizontal_displacement,
-                'average_speed': average_speed,
-                'lift_height': lift_height,
-                'left_to_right_distance': distance,
-                'left_to_right_speed': mean_speed,
-                'left_to_right_acceleration_mean': mean_acc,
-                'left_to_right_acceleration_max': max_acc,
-                'left_to_right_smoothness': smoothness,
-                'right_to_left_distance': 0.0,
-                'right_to_left_speed': 0.0,
-                'right_to_left_acceleration_mean': 0.0,
-                'right_to_left_acceleration_max': 0.0,
-                'right_to_left_smoothness': 0.0,
-                'max_height': height_change,
-                'duration': duration,
-                'start_pos_x': x_vals[0],
-                'start_pos_y': y_vals[0],
-                'end_pos_x': x_vals[-1],
-                'end_pos_y': y_vals[-1]
-            }
-            results.append(result)
+        # 计算速度和加速度
+        speeds = np.sqrt(np.diff(x_vals)**2 + np.diff(y_vals)**2) * fps
+        mean_speed = np.mean(speeds)
+        max_speed = np.max(speeds)
+        
+        accelerations = np.diff(speeds) * fps
+        mean_acc = np.mean(accelerations)
+        max_acc = np.max(np.abs(accelerations))
+        
+        # 计算平滑度
+        if len(accelerations) > 2:
+            smoothness = -np.log(np.mean(np.square(np.diff(accelerations))))
+        else:
+            smoothness = 0
         
-        # 创建分析上下文
-        analysis_context = {
-            'x_smooth': df_smooth['x'].values,
-            'y_smooth': df_smooth['y'].values,
-            'speeds_smooth': np.diff(df_smooth['x'].values) * fps,  # 简化为x方向速度
-            'accelerations_smooth': np.diff(np.diff(df_smooth['x'].values)) * fps * fps,
-            'events': [(e['i_start'], e['i_end'], (e['i_end'] - e['i_start'])/fps, 
-                       df_smooth['x'].values[e['i_end']] - df_smooth['x'].values[e['i_start']]) 
-                      for e in events],
-            'results': results
+        result = {
+            'start_time': format_timestamp(event['start_time']),
+            'peak_time': peak_timestamp,
+            'end_time': format_timestamp(event['end_time']),
+            'start_frame': start_f,
+            'peak_frame': peak_frame,
+            'end_frame': end_f,
+            'trajectory_distance': distance,
+            'horizontal_displacement': horizontal_displacement,
+            'average_speed': average_speed,
+            'lift_height': lift_height,
+            'left_to_right_distance': distance,
+            'left_to_right_speed': mean_speed,
+            'left_to_right_acceleration_mean': mean_acc,
+            'left_to_right_acceleration_max': max_acc,
+            'left_to_right_smoothness': smoothness,
+            'right_to_left_distance': 0.0,
+            'right_to_left_speed': 0.0,
+            'right_to_left_acceleration_mean': 0.0,
+            'right_to_left_acceleration_max': 0.0,
+            'right_to_left_smoothness': 0.0,
+            'max_height': height_change,
+            'duration': duration,
+            'start_pos_x': x_vals[0],
+            'start_pos_y': y_vals[0],
+            'end_pos_x': x_vals[-1],
+            'end_pos_y': y_vals[-1]
         }
-            
-        return pd.DataFrame(results), analysis_context
+        results.append(result)
+    
+    # 创建分析上下文
+    if smooth is not None:
+        speeds_smooth = smooth['speeds_smooth']
+        accelerations_smooth = smooth['accelerations_smooth']
+    else:
+        speeds_smooth = np.diff(x_smooth) * fps  # 简化为x方向速度
+        accelerations_smooth = np.diff(np.diff(x_smooth)) * fps * fps
+    analysis_context = {
+        'x_smooth': x_smooth,
+        'y_smooth': y_smooth,
+        'speeds_smooth': speeds_smooth,
+        'accelerations_smooth': accelerations_smooth,
+        'events': [(e['i_start'], e['i_end'], (e['i_end'] - e['i_start'])/fps, 
+                   x_smooth[e['i_end']] - x_smooth[e['i_start']]) 
+                  for e in events],
+        'results': results
+    }
+    
+    return pd.DataFrame(results), analysis_context
+
+def _detect_catch_events(
+    x_smooth: np.ndarray,
+    y_smooth: np.ndarray,
+    fps: float,
+    chunk_frames: Optional[int] = None
+) -> list:
+    """
+    用抓取实验的挡板和起点区域检测抓取事件。
+    """
+    return detect_grab_trajectories(
+        {'x': x_smooth, 'y': y_smooth}, 
+        fps=fps,
+        barrier_region=(330, 450, 250, 400),
+        start_region=(200, 300, 350, 450),
+        max_back_time=0.5,
+        max_forward_time=0.2,
+        chunk_frames=chunk_frames
+    )
+
+def sweep_catch_parameters(
+    df: Union[pd.DataFrame, Mapping[str, np.ndarray]],
+    thresholds: Sequence[float],
+    speed_thresholds: Sequence[float],
+    fps: float = 120.0,
+    smoother: str = "savgol"
+) -> pd.DataFrame:
+    """
+    抓取分析的参数扫描: 单个关键点的轨迹复制为每组 (置信度阈值, 速度阈值) 一列,
+    各列的阈值作为数组传给清洗流水线, 一次完成全部参数组合的清洗,
+    再逐列检测抓取事件。每行与 analyze_catch_behavior 在对应参数下的结果一致。
+    
+    Args:
+        df: 包含 x, y, likelihood 列的 DataFrame, 或 {列名: 一维数组} 映射
+        thresholds: 置信度阈值
+        speed_thresholds: 速度阈值（像素/帧）
+        fps: 视频帧率
+        smoother: 同 analyze_catch_behavior
+    
+    Returns:
+        pd.DataFrame: 每组参数一行, 含 n_bouts（抓取次数）/ total_duration_s / mean_duration_s
+    """
+    grid = [(t, s) for t in thresholds for s in speed_thresholds]
+    n_combos = len(grid)
+    result = catch_pipeline(
+        np.array([t for t, _ in grid], dtype=float),
+        np.array([s for _, s in grid], dtype=float),
+        smoother
+    ).run(*(
+        np.repeat(np.asarray(df[field], dtype=float)[:, None], n_combos, axis=1)
+        for field in ('x', 'y', 'likelihood')
+    ))
+    x_smooth = np.asarray(result.x).reshape(-1, n_combos)
+    y_smooth = np.asarray(result.y).reshape(-1, n_combos)
+    
+    rows = []
+    for k, (threshold, speed_threshold) in enumerate(grid):
+        events = _detect_catch_events(
+            np.ascontiguousarray(x_smooth[:, k]), np.ascontiguousarray(y_smooth[:, k]), fps
+        )
+        durations = np.array([e['i_end'] - e['i_start'] for e in events], dtype=np.int64)
+        rows.append({
+            'threshold': threshold,
+            'speed_threshold': speed_threshold,
+            **bout_summary(durations, fps)
+        })
+    return pd.DataFrame(rows)
+
+def _clean_catch_trajectory(
+    df: Union[pd.DataFrame, Mapping[str, np.ndarray]],
+    threshold: float,
+    speed_threshold: float,
+    fps: float,
+    smoother: str = "savgol"
+) -> Dict[str, np.ndarray]:
+    """
+    整段执行轨迹清洗: 置信度、位置、极端跳变、速度过滤, 然后插值和平滑
+    (smoother="kalman" 时用 Kalman/RTS 平滑一步完成)。
+    x / y / likelihood 可为 (frames,) 或 (frames, bodyparts), 多个关键点一次处理。
+    """
+    # 全部步骤在同一缓冲区上原地执行
+    result = catch_pipeline(threshold, speed_threshold, smoother).run(
+        np.asarray(df['x'], dtype=float),
+        np.asarray(df['y'], dtype=float),
+        np.asarray(df['likelihood'], dtype=float)
+    )
+    for stats, label in zip(result.stats, CATCH_STAGE_LABELS):
+        report.info(f"{label}后有效点数: {stats.valid}")
+    return {'x': result.x, 'y': result.y}
+
+
+def clean_catch_trajectory_streaming(
+    df: Union[pd.DataFrame, Mapping[str, np.ndarray]],
+    threshold: float,
+    speed_threshold: float,
+    fps: float,
+    chunk_frames: int,
+    frame_dir: Optional[str] = None,
+    window_length: int = 7,
+    polyorder: int = 2
+) -> Dict[str, np.ndarray]:
+    """
+    按块执行与 _clean_catch_trajectory 相同的清洗步骤, 逐帧结果写入内存映射数组。
+    
+    1. 过滤: 极端跳变和速度过滤依赖前一帧的过滤结果, 跨块携带上一块末帧;
+       速度过滤还需要下一帧, 每块向后多读一帧。
+    2. 插值和平滑: 用块两侧最近的两个有效点插值 (与整段线性插值/外推一致),
+       每块两侧多读 window_length 帧做 Savitzky-Golay 平滑。
+    3. 速度和加速度: 每块向后多读两帧做差分。
+    
+    Returns:
+        Dict[str, np.ndarray]: x_smooth, y_smooth, speeds_smooth, accelerations_smooth
+    """
+    columns = {col: np.asarray(df[col]) for col in ('x', 'y', 'likelihood')}
+    n_frames = len(columns['x'])
+    if frame_dir is None:
+        frame_dir = tempfile.mkdtemp(prefix="dlc_catch_frames_")
+    store = FrameArrayStore(frame_dir)
+    filtered = {coord: store.create(f'{coord}_filtered', n_frames) for coord in ('x', 'y')}
+    
+    # 第一至四步：过滤
+    counts = np.zeros(4, dtype=np.int64)
+    prev_jump = None    # 上一块末帧极端跳变过滤后的 (x, y)
+    prev_speed = None   # 上一块末帧速度过滤后的 (x, y)
+    for chunk in iter_frame_chunks(n_frames, chunk_frames, halo_after=1):
+        n_core = chunk.stop - chunk.start
+        block = pd.DataFrame({
+            col: np.asarray(values[chunk.lo:chunk.hi], dtype=float)
+            for col, values in columns.items()
+        })
+        block = filter_low_likelihood(block, threshold)
+        counts[0] += block['x'].iloc[:n_core].notna().sum()
+        block = filter_unreasonable_position(block)[['x', 'y']]
+        counts[1] += block['x'].iloc[:n_core].notna().sum()
         
-    except Exception as e:
-        st.error(f"数据处理失败: {str(e)}")
-        st.error(traceback.format_exc())
-        return pd.DataFrame(), {}
+        jumped = filter_extreme_jumps(
+            pd.concat([prev_jump, block], ignore_index=True) if prev_jump is not None else block,
+            extreme_dist=200.0
+        )
+        if prev_jump is not None:
+            jumped = jumped.iloc[1:].reset_index(drop=True)
+        prev_jump = jumped.iloc[[n_core - 1]]
+        counts[2] += jumped['x'].iloc[:n_core].notna().sum()
+        
+        # 首尾两行 (上一块末帧 / 下一块首帧) 只作参照, 不被修改
+        speed_input = jumped if prev_speed is None else pd.concat([prev_speed, jumped], ignore_index=True)
+        speed_out = filter_unreasonable_speed(speed_input, speed_threshold, fps)
+        if prev_speed is not None:
+            speed_out = speed_out.iloc[1:]
+        speed_out = speed_out.iloc[:n_core].reset_index(drop=True)
+        prev_speed = speed_out.iloc[[n_core - 1]]
+        counts[3] += speed_out['x'].notna().sum()
+        
+        for coord in ('x', 'y'):
+            filtered[coord][chunk.start:chunk.stop] = speed_out[coord].values
+    
+    for count, label in zip(counts, CATCH_STAGE_LABELS):
+        report.info(f"{label}后有效点数: {count}")
+    
+    # 第五、六步：插值和平滑
+    n_valid = {coord: 0 for coord in ('x', 'y')}
+    for chunk in iter_frame_chunks(n_frames, chunk_frames):
+        for coord in ('x', 'y'):
+            n_valid[coord] += int(np.count_nonzero(~np.isnan(filtered[coord][chunk.start:chunk.stop])))
+    smooth = {coord: store.create(f'{coord}_smooth', n_frames) for coord in ('x', 'y')}
+    cursors = {coord: ValidIndexCursor(filtered[coord], keep=2) for coord in ('x', 'y')}
+    for chunk in iter_frame_chunks(n_frames, chunk_frames, window_length, window_length):
+        for coord in ('x', 'y'):
+            series = np.array(filtered[coord][chunk.lo:chunk.hi])
+            # 有效点不足两个时与整段处理一样不插值, 序列含 NaN 也不平滑
+            if n_valid[coord] >= 2:
+                xp, fp = bracket_valid_points(series, chunk.lo, chunk.hi, cursors[coord])
+                f = interp1d(xp, fp, kind='linear', fill_value="extrapolate")
+                series = f(np.arange(chunk.lo, chunk.hi))
+                if n_frames >= window_length:
+                    series = savgol_filter(series, window_length, polyorder)
+            smooth[coord][chunk.start:chunk.stop] = series[chunk.core]
+    
+    # 速度和加速度 (简化为x方向)
+    speeds = store.create('speeds_smooth', max(n_frames - 1, 0))
+    accelerations = store.create('accelerations_smooth', max(n_frames - 2, 0))
+    for chunk in iter_frame_chunks(n_frames, chunk_frames, halo_after=2):
+        dx = np.diff(np.asarray(smooth['x'][chunk.lo:chunk.hi]))
+        stop = max(min(chunk.stop, n_frames - 1), chunk.start)
+        speeds[chunk.start:stop] = dx[:stop - chunk.start] * fps
+        stop = max(min(chunk.stop, n_frames - 2), chunk.start)
+        accelerations[chunk.start:stop] = np.diff(dx)[:stop - chunk.start] * fps * fps
+    
+    store.flush()
+    return {
+        'x_smooth': smooth['x'],
+        'y_smooth': smooth['y'],
+        'speeds_smooth': speeds,
+        'accelerations_smooth': accelerations
+    }
 
 def plot_analysis_results(analysis_context, figure_dir, fps=120.0):
     """
@@ -487,8 +771,8 @@ def plot_analysis_results(analysis_context, figure_dir, fps=120.0):
                            bbox_inches='tight', dpi=300)
             plt.close(fig)
             
-            st.info(f"Detected {valid_catches} valid catch behaviors")
+            report.info(f"Detected {valid_catches} valid catch behaviors")
         else:
-            st.warning("Insufficient trajectory data")
+            report.warning("Insufficient trajectory data")
     except Exception as e:
-        st.error(f"Failed to generate analysis charts: {str(e)}")
+        report.error(f"Failed to generate analysis charts: {str(e)}")
@@ -1,7 +1,15 @@
 import os
 import pandas as pd
 import numpy as np
-import streamlit as st
+
+from .bouts import find_bouts
+from .intervals import bout_intervals
+from .pose_manifest import find_pose_file, get_manifest
+from .pose_store import PoseData, load_pose
+from .reporting import report
+
+# 梳理分析使用的关键点
+GROOMING_BODYPARTS = ['nose', 'leftPaw', 'rightPaw', 'mouth']
 
 def process_mouse_grooming_video(video_path, threshold=0.999, min_duration=15, max_duration=35):
     """
@@ -15,14 +23,14 @@ def process_mouse_grooming_video(video_path, threshold=0.999, min_duration=15, m
         max_duration (int): 最大持续时间（帧）
     """
     try:
-        # 获取CSV文件路径
-        csv_path = os.path.splitext(video_path)[0] + 'DLC_resnet50_Mouse_GroomingFeb24shuffle1_500000.csv'
-        if not os.path.exists(csv_path):
-            st.error(f"未找到CSV文件 / CSV file not found: {csv_path}")
+        # 按表头中的关键点查找DLC输出（优先H5，回退CSV），不依赖scorer名称
+        pose_path = find_pose_file(video_path, bodyparts=GROOMING_BODYPARTS)
+        if pose_path is None:
+            report.error(f"未找到包含所需关键点的DLC输出 / No DLC output with the required bodyparts for: {video_path}")
             return
             
-        # 读取CSV文件
-        df = pd.read_csv(csv_path, header=[1, 2])
+        # 读取姿态数据
+        df = load_pose(pose_path, bodyparts=GROOMING_BODYPARTS)
         
         # 处理数据
         results = analyze_grooming_behavior(df, threshold, min_duration, max_duration)
@@ -31,31 +39,40 @@ def process_mouse_grooming_video(video_path, threshold=0.999, min_duration=15, m
         save_results(results, os.path.splitext(video_path)[0] + '_analysis.csv')
         
     except Exception as e:
-        st.error(f"处理视频失败 / Failed to process video: {str(e)}")
+        report.error(f"处理视频失败 / Failed to process video: {str(e)}")
 
-def analyze_grooming_behavior(df, threshold, min_duration, max_duration):
+def analyze_grooming_behavior(df, threshold, min_duration, max_duration, pipeline=None, intervals=False):
     """
     分析梳理行为
     Analyze grooming behavior
     
     Args:
-        df (pd.DataFrame): 原始数据
+        df (pd.DataFrame | PoseData): 原始数据或按关键点投影的姿态数据
         threshold (float): 置信度阈值
         min_duration (int): 最小持续时间
         max_duration (int): 最大持续时间
+        pipeline (TrajectoryPipeline, optional): 检测前对所有关键点执行的轨迹清洗流水线
+        intervals (bool): 是否同时返回每类行为的区间集合, 见 bout_intervals
         
     Returns:
-        pd.DataFrame: 分析结果
+        pd.DataFrame: 分析结果; intervals=True 时返回 (分析结果, {行为: IntervalSet})
     """
     # 提取关键点坐标和置信度
-    points = ['nose', 'leftPaw', 'rightPaw', 'mouth']
-    coords = {}
-    for point in points:
-        coords[point] = {
-            'x': df[point]['x'].values,
-            'y': df[point]['y'].values,
-            'likelihood': df[point]['likelihood'].values
-        }
+    points = GROOMING_BODYPARTS
+    if isinstance(df, PoseData):
+        coords = df.coords(points)
+    else:
+        coords = {}
+        for point in points:
+            coords[point] = {
+                'x': df[point]['x'].values,
+                'y': df[point]['y'].values,
+                'likelihood': df[point]['likelihood'].values
+            }
+    
+    # 可选的轨迹清洗 (所有关键点一次处理)
+    if pipeline is not None:
+        coords = pipeline.clean_coords(coords)
     
     # 检测梳理行为
     grooming_frames = detect_grooming_frames(coords, threshold)
@@ -63,7 +80,10 @@ def analyze_grooming_behavior(df, threshold, min_duration, max_duration):
     # 分析行为持续时间
     grooming_bouts = analyze_bout_duration(grooming_frames, min_duration, max_duration)
     
-    return pd.DataFrame(grooming_bouts)
+    results = pd.DataFrame(grooming_bouts)
+    if intervals:
+        return results, bout_intervals(results, ['grooming'])
+    return results
 
 def detect_grooming_frames(coords, threshold):
     """
@@ -103,7 +123,7 @@ def detect_grooming_frames(coords, threshold):
     
     return grooming_frames
 
-def analyze_bout_duration(grooming_frames, min_duration, max_duration):
+def analyze_bout_duration(grooming_frames, min_duration, max_duration, max_gap=0):
     """
     分析行为持续时间
     Analyze behavior bout duration
@@ -112,37 +132,13 @@ def analyze_bout_duration(grooming_frames, min_duration, max_duration):
         grooming_frames (np.array): 梳理行为的帧
         min_duration (int): 最小持续时间
         max_duration (int): 最大持续时间
+        max_gap (int): 合并间隔不超过该帧数的相邻片段, 默认不合并
         
     Returns:
         list: 行为片段列表
     """
-    bouts = []
-    start_frame = None
-    
-    for i in range(len(grooming_frames)):
-        if grooming_frames[i]:
-            if start_frame is None:
-                start_frame = i
-        elif start_frame is not None:
-            duration = i - start_frame
-            if min_duration <= duration <= max_duration:
-                bouts.append({
-                    'start_frame': start_frame,
-                    'end_frame': i,
-                    'duration': duration
-                })
-            start_frame = None
-            
-    if start_frame is not None:
-        duration = len(grooming_frames) - start_frame
-        if min_duration <= duration <= max_duration:
-            bouts.append({
-                'start_frame': start_frame,
-                'end_frame': len(grooming_frames),
-                'duration': duration
-            })
-
-    return bouts
+    bouts = find_bouts(grooming_frames, max_gap=max_gap)
+    return bouts.filter_duration(min_duration, max_duration).records()
 
 def save_results(results, output_path):
     """
@@ -155,9 +151,9 @@ def save_results(results, output_path):
     """
     try:
         results.to_csv(output_path, index=False)
-        st.success(f"结果已保存 / Results saved: {output_path}")
+        report.success(f"结果已保存 / Results saved: {output_path}")
     except Exception as e:
-        st.error(f"保存结果失败 / Failed to save results: {str(e)}")
+        report.error(f"保存结果失败 / Failed to save results: {str(e)}")
 
 def process_grooming_files(folder_path, threshold=0.999, min_duration=15, max_duration=35):
     """
@@ -171,17 +167,18 @@ def process_grooming_files(folder_path, threshold=0.999, min_duration=15, max_du
         max_duration (int): 最大持续时间
     """
     try:
-        # 获取所有视频文件
-        video_files = [f for f in os.listdir(folder_path) if f.endswith('.mp4')]
+        # 从文件夹清单获取所有视频文件（不含DLC标注视频）
+        video_files = get_manifest(folder_path).videos()
         
         if not video_files:
-            st.warning("未找到视频文件 / No video files found")
+            report.warning("未找到视频文件 / No video files found")
             return
             
         # 处理每个视频
-        for video_file in video_files:
-            video_path = os.path.join(folder_path, video_file)
+        report.progress(0, len(video_files))
+        for done, video_path in enumerate(video_files, 1):
             process_mouse_grooming_video(video_path, threshold, min_duration, max_duration)
+            report.progress(done, len(video_files), os.path.basename(video_path))
             
     except Exception as e:
-        st.error(f"处理文件夹失败 / Failed to process folder: {str(e)}") 
+        report.error(f"处理文件夹失败 / Failed to process folder: {str(e)}") 
@@ -1,25 +1,31 @@
 import os
 import pandas as pd
 import numpy as np
-import streamlit as st
+
+from .pose_manifest import list_pose_files
+from .pose_store import load_pose
+from .reporting import report
 
 def process_mouse_scratch_video(file_path, folder_path, paw_probability_threshold=0.99999, min_distance=10, max_distance=25):
     """处理小鼠抓挠视频的分析结果
     Process mouse scratch video analysis results
     
     Args:
-        file_path (str): CSV文件路径
+        file_path (str): DLC输出文件路径（.h5 或 .csv）
         folder_path (str): 输出文件夹路径
         paw_probability_threshold (float): 爪子位置概率阈值
         min_distance (float): 最小移动距离
         max_distance (float): 最大移动距离
     """
     try:
-        # 读取CSV文件，跳过前三行
-        data = pd.read_csv(file_path, skiprows=3, header=None)
+        # 通过姿态缓存读取，列布局与跳过前三行表头的CSV一致（第0列为帧号）
+        pose = load_pose(file_path)
+        data = pd.DataFrame(pose.values.reshape(pose.n_frames, -1))
+        data.columns = range(1, data.shape[1] + 1)
+        data.insert(0, 0, np.arange(pose.n_frames))
         
         if data.empty:
-            st.warning(f"文件中没有数据 / No data in file: {file_path}")
+            report.warning(f"文件中没有数据 / No data in file: {file_path}")
             return None
             
         # 计算爪子在连续帧之间的移动距离
@@ -36,7 +42,7 @@ def process_mouse_scratch_video(file_path, folder_path, paw_probability_threshol
         data = data[(data[4] >= min_distance) & (data[4] <= max_distance)]
         
         if data.empty:
-            st.warning(f"过滤后没有有效数据 / No valid data after filtering: {file_path}")
+            report.warning(f"过滤后没有有效数据 / No valid data after filtering: {file_path}")
             return None
             
         # 保存过滤后的数据
@@ -47,7 +53,7 @@ def process_mouse_scratch_video(file_path, folder_path, paw_probability_threshol
         try:
             data[5] = data[5].astype(int)
         except ValueError as e:
-            st.error(f"时间转换错误 / Error converting time: {str(e)}")
+            report.error(f"时间转换错误 / Error converting time: {str(e)}")
             return None
             
         # 计算每分钟的得分
@@ -66,12 +72,12 @@ def process_mouse_scratch_video(file_path, folder_path, paw_probability_threshol
         scores_5min_intervals_file_path = os.path.join(folder_path, f"{base_file_name}_filtered_5min_intervals.csv")
         scores_5min_intervals.to_csv(scores_5min_intervals_file_path, header=False)
         
-        st.success(f"✅ 处理完成 / Processing completed: {os.path.basename(file_path)}")
+        report.success(f"✅ 处理完成 / Processing completed: {os.path.basename(file_path)}")
         return (paw_probability_threshold, min_distance, max_distance, 
                 filtered_file_path, scores_per_minute_file_path, scores_5min_intervals_file_path)
                 
     except Exception as e:
-        st.error(f"处理文件失败 / Failed to process file: {str(e)}")
+        report.error(f"处理文件失败 / Failed to process file: {str(e)}")
         return None
 
 def process_scratch_files(folder_path, paw_probability_threshold=0.99999, min_distance=10, max_distance=25):
@@ -85,12 +91,11 @@ def process_scratch_files(folder_path, paw_probability_threshold=0.99999, min_di
         max_distance (float): 最大移动距离
     """
     try:
-        # 查找所有以"00000.csv"结尾的文件
-        file_paths = [os.path.join(folder_path, f) for f in os.listdir(folder_path) 
-                     if f.endswith("00000.csv")]
+        # 查找所有以"00000"结尾的DLC输出（同名时优先H5）
+        file_paths = list_pose_files(folder_path, suffix="00000")
         
         if not file_paths:
-            st.warning("未找到分析结果文件 / No analysis result files found")
+            report.warning("未找到分析结果文件 / No analysis result files found")
             return
             
         # 处理每个文件
@@ -108,11 +113,11 @@ def process_scratch_files(folder_path, paw_probability_threshold=0.99999, min_di
                 
         # 显示处理结果
         if processed_files_list:
-            st.success(f"✅ 成功处理 {len(processed_files_list)} 个文件 / Successfully processed {len(processed_files_list)} files")
+            report.success(f"✅ 成功处理 {len(processed_files_list)} 个文件 / Successfully processed {len(processed_files_list)} files")
             for result in processed_files_list:
-                st.write(result)
+                report.write(result)
         else:
-            st.warning("没有成功处理的文件 / No files were successfully processed")
+            report.warning("没有成功处理的文件 / No files were successfully processed")
             
     except Exception as e:
-        st.error(f"处理文件夹失败 / Failed to process folder: {str(e)}") 
\ No newline at end of file
+        report.error(f"处理文件夹失败 / Failed to process folder: {str(e)}") 
\ No newline at end of file
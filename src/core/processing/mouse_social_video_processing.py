@@ -2,12 +2,53 @@ import os
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-import streamlit as st
-from typing import Any, Dict, List, Optional
-from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Union
+import tempfile
 import time
 import traceback
-from matplotlib.ticker import FuncFormatter
+
+from .feature_cache import FEATURE_CACHE_DIRNAME, FeatureCache
+from .intervals import bout_intervals
+from .labels import LABEL_DTYPE, LabelTable
+from .pose_manifest import find_pose_file
+from .pose_store import POSE_CACHE_DIRNAME, PoseData, load_pose
+from .reporting import report
+from .social_geometry import (
+    NEIGHBOR_METHODS,
+    SocialGeometry,
+    neighbor_geometry,
+    pairwise_distance,
+    social_geometry,
+    vector_angle,
+)
+from .streaming import (
+    FrameArrayStore,
+    ValidIndexCursor,
+    bracket_valid_points,
+    iter_frame_chunks,
+    write_frame_csv
+)
+from .sweep import bout_summary
+from .timeline import plot_timeline, set_time_axis, state_intervals
+
+# 社交分析使用的个体和关键点
+SOCIAL_INDIVIDUALS = ['individual1', 'individual2']
+SOCIAL_BODYPARTS = ['Mouth', 'left-ear', 'right-ear']
+
+# 帧级判定阈值: 嘴部距离(像素)和朝向角(度)
+SOCIAL_CLOSE_THRESHOLD = 100.0
+SOCIAL_FACING_THRESHOLD = 45.0
+
+# 帧级行为标签, 逐帧数组保存为 int8 编码
+SOCIAL_LABELS = ('interaction', 'proximity', 'none')
+SOCIAL_LABEL_TABLE = LabelTable(SOCIAL_LABELS)
+
+# 与阈值无关、可缓存的逐帧特征; 计算方式改变时递增 SOCIAL_FEATURE_VERSION
+SOCIAL_FEATURES = (
+    'min_likelihood', 'distance', 'mouse1_angle', 'mouse2_angle',
+    'speeds_mouse1', 'speeds_mouse2', 'mouse1_x', 'mouse1_y', 'mouse2_x', 'mouse2_y'
+)
+SOCIAL_FEATURE_VERSION = 1
 
 # ---------------------------------------
 # 1. 行为分析主入口
@@ -17,33 +58,65 @@ def process_mouse_social_video(
     threshold: float = 0.999,
     min_duration_sec: float = 2.0,
     max_duration_sec: float = 35.0,
-    fps: float = 30.0
+    fps: float = 30.0,
+    chunk_frames: Optional[int] = None,
+    use_feature_cache: bool = True
 ):
     """
     处理小鼠社交行为视频的分析结果, 并进行平滑、可视化和持续时间分析。
     
     Args:
-        video_path (str): 原始视频文件路径, 用于匹配同名 _el.csv.
+        video_path (str): 原始视频文件路径, 用于匹配同名 _el.h5 / _el.csv.
         threshold (float): 关键点置信度阈值(如0.999).
         min_duration_sec (float): 最小持续时间(秒), 默认2秒.
         max_duration_sec (float): 最大持续时间(秒), 默认35秒(可自行拆分).
         fps (float): 视频帧率, 默认30帧/秒.
+        chunk_frames (int, optional): 分块流式分析的每块帧数, 用于超长录像;
+            逐帧结果写入 .pose_cache 下的内存映射文件. 默认整段载入内存.
+        use_feature_cache (bool): 把与阈值无关的逐帧特征缓存到结果目录下的
+            .feature_cache, 只修改阈值时不再重新计算.
     """
     try:
         video_dir = os.path.dirname(video_path)
         video_name = os.path.splitext(os.path.basename(video_path))[0]
         
-        # 1. 寻找对应 _el.csv
-        csv_files = [
-            f for f in os.listdir(video_dir)
-            if f.startswith(video_name) and f.endswith('_el.csv')
-        ]
-        if not csv_files:
-            st.error(f"未找到对应的 CSV 文件 / No corresponding CSV file for: {video_name}")
+        # 1. 寻找对应 _el.h5 (回退 _el.csv)，按表头中的个体和关键点匹配，不依赖scorer名称
+        pose_path = find_pose_file(
+            video_path,
+            suffix='_el',
+            bodyparts=SOCIAL_BODYPARTS,
+            individuals=SOCIAL_INDIVIDUALS
+        )
+        if pose_path is None:
+            report.error(f"未找到对应的 DLC 输出文件 / No corresponding DLC output for: {video_name}")
             return
         
-        csv_path = os.path.join(video_dir, csv_files[0])
-        df = pd.read_csv(csv_path, header=[0,1,2,3])
+        feature_cache = None
+        if use_feature_cache:
+            feature_cache = FeatureCache(
+                os.path.join(video_dir, f"{video_name}_results", FEATURE_CACHE_DIRNAME),
+                pose_path,
+                version=SOCIAL_FEATURE_VERSION,
+                params={'fps': fps}
+            )
+        
+        # 特征已缓存时不再读取姿态文件
+        if feature_cache is not None and feature_cache.load() is not None:
+            df = None
+        elif chunk_frames is None:
+            df = load_pose(
+                pose_path,
+                individuals=SOCIAL_INDIVIDUALS,
+                bodyparts=SOCIAL_BODYPARTS
+            )
+        else:
+            # 不做投影, 保持内存映射, 缓存按块建立
+            df = load_pose(pose_path, chunk_rows=chunk_frames)
+        frame_dir = None
+        if chunk_frames is not None:
+            frame_dir = os.path.join(
+                os.path.dirname(pose_path), POSE_CACHE_DIRNAME, f"{video_name}_frames"
+            )
         
         # 2. 分析行为并保存结果
         results_df, analysis_context = analyze_social_behavior(
@@ -51,7 +124,10 @@ def process_mouse_social_video(
             threshold=threshold,
             min_duration_sec=min_duration_sec,
             max_duration_sec=max_duration_sec,
-            fps=fps
+            fps=fps,
+            chunk_frames=chunk_frames,
+            frame_dir=frame_dir,
+            feature_cache=feature_cache
         )
         
         # 3. 保存分析数据
@@ -66,12 +142,13 @@ def process_mouse_social_video(
         plot_analysis_results(
             analysis_context, 
             figure_dir=figure_dir,
-            interaction_threshold=100.0
+            interaction_threshold=100.0,
+            fps=fps
         )
         
-        # 5. 在 Streamlit 中显示可视化
-        st.success(f"分析完成! / Analysis done. 结果已保存至 {results_dir}")
-        st.subheader("📊 分析结果 / Analysis Results")
+        # 5. 发出显示事件 (由订阅的页面渲染)
+        report.success(f"分析完成! / Analysis done. 结果已保存至 {results_dir}")
+        report.heading("📊 分析结果 / Analysis Results")
         
         # 显示图表
         timeline_png = os.path.join(figure_dir, "behavior_timeline.png")
@@ -79,115 +156,329 @@ def process_mouse_social_video(
         trajectory_png = os.path.join(figure_dir, "movement_trajectories.png")
         heatmap_png = os.path.join(figure_dir, "position_heatmaps.png")
         
-        col1, col2 = st.columns(2)
-        with col1:
-            if os.path.exists(timeline_png):
-                st.image(timeline_png, caption="行为时间线 / Behavior Timeline")
-            if os.path.exists(trajectory_png):
-                st.image(trajectory_png, caption="运动轨迹 / Movement Trajectories")
-        with col2:
-            if os.path.exists(distribution_png):
-                st.image(distribution_png, caption="行为分布 / Behavior Distribution")
-            if os.path.exists(heatmap_png):
-                st.image(heatmap_png, caption="位置热力图 / Position Heatmaps")
+        report.images([
+            [(timeline_png, "行为时间线 / Behavior Timeline", None),
+             (trajectory_png, "运动轨迹 / Movement Trajectories", None)],
+            [(distribution_png, "行为分布 / Behavior Distribution", None),
+             (heatmap_png, "位置热力图 / Position Heatmaps", None)]
+        ])
         
         # 显示结果表格
         if not results_df.empty:
-            st.subheader("🎯 检测到的行为片段 / Detected Behavior Bouts")
-            st.dataframe(results_df)
+            report.heading("🎯 检测到的行为片段 / Detected Behavior Bouts")
+            report.table(results_df)
     
     except Exception as e:
-        st.error(f"处理视频失败 / Failed to process video: {str(e)}")
+        report.error(f"处理视频失败 / Failed to process video: {str(e)}")
 
 
 # ---------------------------------------
 # 2. 社交行为分析主函数
 # ---------------------------------------
 def analyze_social_behavior(
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, PoseData],
     threshold: float,
     min_duration_sec: float,
     max_duration_sec: float,
-    fps: float
+    fps: float,
+    chunk_frames: Optional[int] = None,
+    frame_dir: Optional[str] = None,
+    feature_cache: Optional[FeatureCache] = None
 ):
     """
     分析社交行为(帧级判定 + 滑动窗口平滑 + 行为段合并).
-    返回: (持续时间统计结果DataFrame, {distance数组, angle数组...})
+    df 可以是 DLC 多级表头 DataFrame, 也可以是按个体/关键点投影后的 PoseData.
+    指定 chunk_frames 时按块流式处理, 每块两侧带平滑窗口和合并间隔的光环帧,
+    行为段与整段处理完全一致, 逐帧数组写入 frame_dir 下的内存映射文件.
+    指定 feature_cache 时, 与阈值无关的特征 (SOCIAL_FEATURES) 命中缓存则直接读取,
+    否则计算后写入缓存; 修改阈值后只重做判定、平滑和段合并.
+    返回: (持续时间统计结果DataFrame, {distance数组, angle数组..., intervals})
+    其中 intervals 为每类行为段的区间集合 {行为: IntervalSet}.
+    """
+    features = feature_cache.load() if feature_cache is not None else None
+    if features is not None:
+        report.info("使用缓存的逐帧特征 / Using cached frame features")
+        if chunk_frames is None:
+            features = {name: np.array(values) for name, values in features.items()}
+    else:
+        coords = _social_coords(df, chunk_frames)
+        if chunk_frames is not None:
+            # 流式模式: 逐块计算帧级数组, 不在内存中保留整段数据
+            if frame_dir is None:
+                frame_dir = tempfile.mkdtemp(prefix="dlc_social_frames_")
+            store = None
+            if feature_cache is not None:
+                try:
+                    store = feature_cache.writer()
+                except OSError:
+                    feature_cache = None
+            if store is None:
+                store = FrameArrayStore(frame_dir)
+            stream_social_features(coords, fps, chunk_frames, store)
+            features = feature_cache.commit(store) if feature_cache is not None else store.arrays
+        else:
+            # 1) 与阈值无关的帧级特征: 距离、角度、速度和位置
+            features = compute_social_features(coords, fps)
+            if feature_cache is not None:
+                try:
+                    feature_cache.save(features)
+                except OSError:
+                    # 缓存目录不可写时只用内存数据
+                    pass
+    
+    # 2) 帧级判定和滑动窗口平滑(减少单帧抖动), 默认为0.5秒窗口
+    raw_frames = classify_social_frames(features, threshold, fps, chunk_frames, frame_dir)
+    
+    # 收集速度和位置数据用于轨迹和热力图
+    speeds_mouse1 = features['speeds_mouse1']
+    speeds_mouse2 = features['speeds_mouse2']
+    positions = {
+        name: features[name] for name in ('mouse1_x', 'mouse1_y', 'mouse2_x', 'mouse2_y')
+    }
+    
+    # 3) 行为段合并(≥ 2 秒)
+    results = analyze_bout_duration(
+        raw_frames,
+        min_duration_sec=min_duration_sec,
+        max_duration_sec=max_duration_sec,
+        fps=fps,
+        chunk_frames=chunk_frames
+    )
+    results_df = pd.DataFrame(results)
+    
+    # 将一些可视化所需信息打包返回
+    analysis_context = {
+        'distance': raw_frames['mouse_distance'],
+        'mouse1_angle': raw_frames['facing_angles']['mouse1_angle'],
+        'mouse2_angle': raw_frames['facing_angles']['mouse2_angle'],
+        'speeds_mouse1': speeds_mouse1,
+        'speeds_mouse2': speeds_mouse2,
+        'behavior_data': raw_frames['social_types'],  # 行为数据 (SOCIAL_LABEL_TABLE 编码)
+        'positions': positions,  # 添加位置数据
+        # 每类行为段的区间集合 {'interaction': IntervalSet, 'proximity': IntervalSet}
+        'intervals': bout_intervals(
+            results_df, ('interaction', 'proximity'), 'behavior_type', inclusive=True
+        )
+    }
+    
+    return results_df, analysis_context
+
+
+def _social_coords(
+    df: Union[pd.DataFrame, PoseData],
+    chunk_frames: Optional[int] = None
+) -> dict:
+    """
+    按 SOCIAL_INDIVIDUALS / SOCIAL_BODYPARTS 取出坐标, 返回 {"个体_关键点": {x, y, likelihood}}.
+    整段模式下返回可原地插值的副本; 分块模式保持内存映射.
     """
-    # 需要的关键点
-    scorer = "DLC_Buctd-hrnetW48_SocialMar9shuffle1_detector_220_snapshot_110"  # 使用完整的scorer名称
+    # DataFrame 输入时去掉 scorer 层，按 (individual, bodypart, field) 取列，不依赖具体模型名称
+    if not isinstance(df, PoseData) and df.columns.nlevels == 4:
+        df = df.droplevel(0, axis=1)
     
     # 过滤有效的个体和关键点
-    valid_individuals = ['individual1', 'individual2']  # 只保留两只老鼠
-    valid_bodyparts = ['Mouth', 'left-ear', 'right-ear']  # 只保留有效的关键点
+    valid_individuals = SOCIAL_INDIVIDUALS  # 只保留两只老鼠
+    valid_bodyparts = SOCIAL_BODYPARTS  # 只保留有效的关键点
     
-    st.write("使用的个体:", valid_individuals)
-    st.write("使用的关键点:", valid_bodyparts)
+    report.write("使用的个体:", valid_individuals)
+    report.write("使用的关键点:", valid_bodyparts)
     
     coords = {}
     for individual in valid_individuals:
         for bp in valid_bodyparts:
             key = f"{individual}_{bp}"
             try:
-                # 直接使用列名访问
-                x = df[(scorer, individual, bp, 'x')].values
-                y = df[(scorer, individual, bp, 'y')].values
-                likelihood = df[(scorer, individual, bp, 'likelihood')].values
+                if isinstance(df, PoseData):
+                    x = df.get(bp, 'x', individual)
+                    y = df.get(bp, 'y', individual)
+                    likelihood = df.get(bp, 'likelihood', individual)
+                else:
+                    x = df[(individual, bp, 'x')].values
+                    y = df[(individual, bp, 'y')].values
+                    likelihood = df[(individual, bp, 'likelihood')].values
+                if chunk_frames is None and isinstance(df, PoseData):
+                    # 投影后的连续数组, 复制一份以便后续原地插值
+                    x, y, likelihood = np.array(x), np.array(y), np.array(likelihood)
                 
                 coords[key] = {
                     'x': x,
                     'y': y,
                     'likelihood': likelihood
                 }
-            except KeyError as e:
-                st.error(f"无法找到关键点数据: {key}, 错误: {str(e)}")
-                st.write("可用的列:", df.columns.tolist())
+            except (KeyError, ValueError) as e:
+                report.error(f"无法找到关键点数据: {key}, 错误: {str(e)}")
+                if isinstance(df, PoseData):
+                    report.write("可用的关键点:", list(df.bodyparts))
+                else:
+                    report.write("可用的列:", df.columns.tolist())
                 raise
     
-    # 1) 帧级检测
-    raw_frames = detect_social_frames(coords, threshold)
+    return coords
+
+
+def compute_social_features(coords: dict, fps: float) -> Dict[str, np.ndarray]:
+    """
+    整段计算与阈值无关的逐帧特征 (键见 SOCIAL_FEATURES): 各关键点置信度的最小值、
+    嘴部距离、朝向角、速度和插值后的嘴部位置. 嘴部缺失值在 coords 中原地插值.
+    """
+    frame_count = len(next(iter(coords.values()))['x'])
+    report.write(f"总帧数: {frame_count}")
     
-    # 2) 滑动窗口平滑(减少单帧抖动), 默认为0.5秒窗口
-    half_second_frames = int(0.5 * fps)
-    smoothed_types = smooth_behavior_sequence(
-        raw_frames['social_types'],
-        window_size=half_second_frames
-    )
-    raw_frames['social_types'] = smoothed_types
+    # 计算距离和角度 (距离计算会先插值嘴部缺失值)
+    mouse_distance = calculate_mouse_distance(coords)
+    facing_angles = calculate_facing_angles(coords)
     
-    # 3) 计算速度(示例: 嘴部在相邻帧间的移动速度)
-    speeds_mouse1 = compute_speed(coords['individual1_Mouth']['x'], coords['individual1_Mouth']['y'], fps)
-    speeds_mouse2 = compute_speed(coords['individual2_Mouth']['x'], coords['individual2_Mouth']['y'], fps)
+    features = {
+        'min_likelihood': _min_likelihood(coords),
+        'distance': mouse_distance,
+        'mouse1_angle': facing_angles['mouse1_angle'],
+        'mouse2_angle': facing_angles['mouse2_angle']
+    }
+    for mouse, individual in zip(('mouse1', 'mouse2'), SOCIAL_INDIVIDUALS):
+        x = coords[f'{individual}_Mouth']['x']
+        y = coords[f'{individual}_Mouth']['y']
+        features[f'speeds_{mouse}'] = compute_speed(x, y, fps)
+        features[f'{mouse}_x'] = x
+        features[f'{mouse}_y'] = y
+    return features
+
+
+def stream_social_features(
+    coords: dict,
+    fps: float,
+    chunk_frames: int,
+    store: FrameArrayStore
+) -> FrameArrayStore:
+    """
+    按块计算与 compute_social_features 相同的特征, 写入 store 的内存映射数组.
+    每块向前多读 1 帧 (速度), 嘴部缺失值用块两侧最近的有效点插值,
+    因此与整段结果逐帧一致.
+    """
+    frame_count = len(next(iter(coords.values()))['x'])
+    report.write(f"总帧数: {frame_count}")
     
-    # 4) 行为段合并(≥ 2 秒)
-    results = analyze_bout_duration(
-        raw_frames,
-        min_duration_sec=min_duration_sec,
-        max_duration_sec=max_duration_sec,
-        fps=fps
-    )
-    results_df = pd.DataFrame(results)
+    dtype = np.result_type(*(np.asarray(c['x'][:0]).dtype for c in coords.values()))
+    for name in SOCIAL_FEATURES:
+        store.create(name, frame_count, dtype)
     
-    # 5) 收集位置数据用于轨迹和热力图
-    positions = {
-        'mouse1_x': coords['individual1_Mouth']['x'],
-        'mouse1_y': coords['individual1_Mouth']['y'],
-        'mouse2_x': coords['individual2_Mouth']['x'],
-        'mouse2_y': coords['individual2_Mouth']['y']
+    mouth_keys = {
+        'mouse1': 'individual1_Mouth',
+        'mouse2': 'individual2_Mouth'
     }
-    
-    # 将一些可视化所需信息打包返回
-    analysis_context = {
-        'distance': raw_frames['mouse_distance'],
-        'mouse1_angle': raw_frames['facing_angles']['mouse1_angle'],
-        'mouse2_angle': raw_frames['facing_angles']['mouse2_angle'],
-        'speeds_mouse1': speeds_mouse1,
-        'speeds_mouse2': speeds_mouse2,
-        'behavior_data': raw_frames['social_types'],  # 添加行为数据
-        'positions': positions  # 添加位置数据
+    cursors = {
+        (key, field): ValidIndexCursor(coords[key][field], keep=1)
+        for key in mouth_keys.values() for field in ('x', 'y')
     }
     
-    return results_df, analysis_context
+    has_missing = False
+    has_invalid_distance = False
+    
+    for chunk in iter_frame_chunks(frame_count, chunk_frames, 1):
+        local = {
+            key: {field: np.array(values[chunk.lo:chunk.hi]) for field, values in c.items()}
+            for key, c in coords.items()
+        }
+        core = chunk.core
+        
+        # 嘴部缺失值线性插值 (与 calculate_mouse_distance 一致)
+        for key in mouth_keys.values():
+            for field in ('x', 'y'):
+                arr = local[key][field]
+                missing = np.isnan(arr)
+                if np.any(missing):
+                    has_missing = True
+                    xp, fp = bracket_valid_points(arr, chunk.lo, chunk.hi, cursors[(key, field)])
+                    if len(xp):
+                        arr[missing] = np.interp(chunk.lo + np.flatnonzero(missing), xp, fp)
+        
+        dist = pairwise_distance(*_mouth_positions(local))[:, 0, 1]
+        if np.any(np.isnan(dist)):
+            has_invalid_distance = True
+            dist = np.nan_to_num(dist, nan=1000.0)
+        angles = compute_facing_angles(local)
+        
+        out = slice(chunk.start, chunk.stop)
+        store['min_likelihood'][out] = _min_likelihood(local)[core]
+        store['distance'][out] = dist[core]
+        store['mouse1_angle'][out] = angles['mouse1_angle'][core]
+        store['mouse2_angle'][out] = angles['mouse2_angle'][core]
+        for mouse, key in mouth_keys.items():
+            store[f'{mouse}_x'][out] = local[key]['x'][core]
+            store[f'{mouse}_y'][out] = local[key]['y'][core]
+            # 块首帧为光环帧 (录像首帧除外, 其速度本就为0)
+            store[f'speeds_{mouse}'][out] = compute_speed(local[key]['x'], local[key]['y'], fps)[core]
+    
+    store.flush()
+    if has_missing:
+        report.warning("检测到坐标中存在无效值，将进行插值处理")
+    if has_invalid_distance:
+        report.error("距离计算结果仍包含无效值，请检查原始数据")
+    return store
+
+
+def classify_social_frames(
+    features: Dict[str, np.ndarray],
+    threshold: float,
+    fps: float,
+    chunk_frames: Optional[int] = None,
+    frame_dir: Optional[str] = None
+) -> dict:
+    """
+    由特征做帧级判定和多数表决平滑 (依赖阈值的部分).
+    chunk_frames 不为空时按块处理, 每块两侧带平滑半窗的光环帧,
+    valid_frames / social_types 写入 frame_dir 下的内存映射文件.
+    返回: 与 detect_social_frames 相同结构的字典, social_types 已平滑
+    """
+    frame_count = len(features['distance'])
+    half_second_frames = int(0.5 * fps)
+    
+    if chunk_frames is None:
+        valid_frames = features['min_likelihood'] > threshold
+        social_types = smooth_behavior_sequence(
+            determine_social_type(
+                features['distance'],
+                {'mouse1_angle': features['mouse1_angle'], 'mouse2_angle': features['mouse2_angle']}
+            ),
+            window_size=half_second_frames
+        )
+    else:
+        if frame_dir is None:
+            frame_dir = tempfile.mkdtemp(prefix="dlc_social_frames_")
+        store = FrameArrayStore(frame_dir)
+        valid_frames = store.create('valid_frames', frame_count, bool)
+        social_types = store.create('social_types', frame_count, LABEL_DTYPE)
+        half_w = half_second_frames // 2
+        for chunk in iter_frame_chunks(frame_count, chunk_frames, half_w, half_w):
+            window = slice(chunk.lo, chunk.hi)
+            out = slice(chunk.start, chunk.stop)
+            valid_frames[out] = np.asarray(features['min_likelihood'][out]) > threshold
+            social_types[out] = smooth_behavior_sequence(
+                determine_social_type(
+                    np.asarray(features['distance'][window]),
+                    {
+                        'mouse1_angle': np.asarray(features['mouse1_angle'][window]),
+                        'mouse2_angle': np.asarray(features['mouse2_angle'][window])
+                    }
+                ),
+                window_size=half_second_frames
+            )[chunk.core]
+        store.flush()
+    
+    report.write(f"有效帧数: {int(np.sum(valid_frames))}")
+    return {
+        'valid_frames': valid_frames,
+        'mouse_distance': features['distance'],
+        'facing_angles': {
+            'mouse1_angle': features['mouse1_angle'],
+            'mouse2_angle': features['mouse2_angle']
+        },
+        'social_types': social_types
+    }
+
+
+def _min_likelihood(coords: dict) -> np.ndarray:
+    """每帧所有关键点置信度的最小值, 高于阈值即为有效帧"""
+    return np.min(np.stack([np.asarray(c['likelihood']) for c in coords.values()]), axis=0)
 
 
 # ---------------------------------------
@@ -199,14 +490,14 @@ def detect_social_frames(coords: dict, threshold: float) -> dict:
     """
     # 获取帧数
     frame_count = len(next(iter(coords.values()))['x'])
-    st.write(f"总帧数: {frame_count}")
+    report.write(f"总帧数: {frame_count}")
     
     # 有效帧(置信度过滤)
     valid_frames = np.ones(frame_count, dtype=bool)
     for key in coords:
         valid_frames &= (coords[key]['likelihood'] > threshold)
     
-    st.write(f"有效帧数: {np.sum(valid_frames)}")
+    report.write(f"有效帧数: {np.sum(valid_frames)}")
     
     # 计算距离和角度
     mouse_distance = calculate_mouse_distance(coords)
@@ -227,25 +518,89 @@ def detect_social_frames(coords: dict, threshold: float) -> dict:
     }
 
 
+def detect_group_social_frames(
+    coords: dict,
+    individuals: Sequence[str],
+    threshold: float,
+    method: str = "dense"
+) -> dict:
+    """
+    群养笼中 N 只动物的成对帧级检测 (不输出日志).
+    coords 与 analyze_social_behavior 相同, 键为 "个体_关键点".
+    method="dense" 展开全部 (frames, N, N) 距离和朝向角; method="kdtree" 只为
+    距离小于 SOCIAL_CLOSE_THRESHOLD 的个体对计算朝向角和类型, 适合个体较多的情况,
+    两种方式的 social_types 完全相同.
+    返回: valid_frames 为 (frames, N, N), 两只动物的关键点置信度都高于阈值;
+    social_types 为 (frames, N, N) 编码; dense 时另有 geometry (SocialGeometry),
+    kdtree 时另有 neighbors (NeighborGeometry).
+    """
+    if method not in NEIGHBOR_METHODS:
+        raise ValueError(f"未知的查找方式 / Unknown neighbor method: {method}")
+    valid = np.stack([
+        np.logical_and.reduce([
+            np.asarray(coords[f"{ind}_{bp}"]['likelihood']) > threshold
+            for bp in SOCIAL_BODYPARTS
+        ])
+        for ind in individuals
+    ], axis=1)
+    frames = {'valid_frames': valid[:, :, None] & valid[:, None, :]}
+    if method == "dense":
+        geometry = social_geometry(coords, individuals)
+        frames['geometry'] = geometry
+        frames['social_types'] = pairwise_social_types(geometry)
+        return frames
+
+    neighbors = neighbor_geometry(coords, individuals, SOCIAL_CLOSE_THRESHOLD)
+    pair_types = determine_social_type(
+        neighbors.distance,
+        {'mouse1_angle': neighbors.facing_ij, 'mouse2_angle': neighbors.facing_ji}
+    )
+    n_frames, n = valid.shape
+    social_types = SOCIAL_LABEL_TABLE.full(n_frames * n * n, 'none').reshape(n_frames, n, n)
+    social_types[neighbors.frame, neighbors.i, neighbors.j] = pair_types
+    social_types[neighbors.frame, neighbors.j, neighbors.i] = pair_types
+    frames['neighbors'] = neighbors
+    frames['social_types'] = social_types
+    return frames
+
+
 def smooth_behavior_sequence(behavior_arr: np.ndarray, window_size: int = 15) -> np.ndarray:
     """
     在给定的帧序列上, 用滑动窗口内多数表决的方式做平滑.
     window_size=15相当于前后7帧共15帧做投票.
+    
+    标签先编码为整数, 每类的窗口计数由前缀和相减得到, 耗时与帧数 x 类别数成正比.
+    票数相同时取窗口内最先出现的标签, 与 Counter(window).most_common(1) 一致.
     """
     n_frames = len(behavior_arr)
     smoothed = behavior_arr.copy()
+    if n_frames == 0:
+        return smoothed
     half_w = window_size // 2
     
-    from collections import Counter
+    codes, uniques = pd.factorize(behavior_arr, use_na_sentinel=False)
+    n_classes = len(uniques)
+    frames = np.arange(n_frames)
+    # 每类标签取其首次出现处的原始元素, 保持原对象不变
+    first_seen = np.full(n_classes, n_frames)
+    np.minimum.at(first_seen, codes, frames)
+    labels = behavior_arr[first_seen]
     
-    for i in range(n_frames):
-        start_idx = max(0, i - half_w)
-        end_idx = min(n_frames, i + half_w + 1)
-        window_slice = behavior_arr[start_idx:end_idx]
-        
-        counter = Counter(window_slice)
-        top_label, _ = counter.most_common(1)[0]
-        smoothed[i] = top_label
+    onehot = codes[:, None] == np.arange(n_classes)
+    cumulative = np.zeros((n_frames + 1, n_classes), dtype=np.int64)
+    np.cumsum(onehot, axis=0, out=cumulative[1:])
+    # next_seen[i, c]: 第 i 帧及之后第一次出现标签 c 的帧 (没有则为 n_frames)
+    next_seen = np.full((n_frames + 1, n_classes), n_frames, dtype=np.int64)
+    next_seen[:-1] = np.minimum.accumulate(
+        np.where(onehot, frames[:, None], n_frames)[::-1], axis=0
+    )[::-1]
+    
+    starts = np.maximum(frames - half_w, 0)
+    ends = np.minimum(frames + half_w + 1, n_frames)
+    counts = cumulative[ends] - cumulative[starts]
+    # 先比票数, 再比窗口内首次出现的位置 (越早越优先)
+    score = counts * (n_frames + 1) + (n_frames - next_seen[starts])
+    smoothed[:] = labels[np.argmax(score, axis=1)]
     
     return smoothed
 
@@ -253,15 +608,18 @@ def smooth_behavior_sequence(behavior_arr: np.ndarray, window_size: int = 15) ->
 # ---------------------------------------
 # 4. 行为识别辅助
 # ---------------------------------------
-def determine_social_type(mouse_distance: np.ndarray, facing_angles: dict) -> np.ndarray:
+def determine_social_type(
+    mouse_distance: np.ndarray,
+    facing_angles: dict,
+    close_threshold: float = SOCIAL_CLOSE_THRESHOLD,   # 距离阈值(像素)
+    facing_threshold: float = SOCIAL_FACING_THRESHOLD  # 角度阈值(度)
+) -> np.ndarray:
     """
     判断: 'interaction', 'proximity', or 'none'.
+    返回 SOCIAL_LABEL_TABLE 的 int8 编码数组, 每帧 1 字节.
     """
     n_frames = len(mouse_distance)
-    social_types = np.full(n_frames, 'none', dtype=object)
-    
-    close_threshold = 100.0     # 距离阈值(像素)
-    facing_threshold = 45.0     # 角度阈值(度)
+    social_types = SOCIAL_LABEL_TABLE.full(n_frames, 'none')
     
     close_mask = mouse_distance < close_threshold
     
@@ -271,8 +629,8 @@ def determine_social_type(mouse_distance: np.ndarray, facing_angles: dict) -> np
         (facing_angles['mouse2_angle'] < facing_threshold)
     )
     
-    social_types[close_mask & mutual_facing] = 'interaction'
-    social_types[close_mask & ~mutual_facing] = 'proximity'
+    social_types[close_mask & mutual_facing] = SOCIAL_LABEL_TABLE.code('interaction')
+    social_types[close_mask & ~mutual_facing] = SOCIAL_LABEL_TABLE.code('proximity')
     return social_types
 
 
@@ -289,7 +647,7 @@ def calculate_mouse_distance(coords: dict) -> np.ndarray:
         
         # 检查数据有效性
         if np.any(np.isnan([mouse1_cx, mouse1_cy, mouse2_cx, mouse2_cy])):
-            st.warning("检测到坐标中存在无效值，将进行插值处理")
+            report.warning("检测到坐标中存在无效值，将进行插值处理")
             # 对无效值进行线性插值
             for arr in [mouse1_cx, mouse1_cy, mouse2_cx, mouse2_cy]:
                 if np.any(np.isnan(arr)):
@@ -302,22 +660,22 @@ def calculate_mouse_distance(coords: dict) -> np.ndarray:
                             arr[valid_mask]
                         )
         
-        # 计算欧氏距离
-        dist = np.sqrt(np.square(mouse1_cx - mouse2_cx) + np.square(mouse1_cy - mouse2_cy))
+        # 计算欧氏距离 (两只小鼠为成对距离的特例)
+        dist = pairwise_distance(*_mouth_positions(coords))[:, 0, 1]
         
         # 验证计算结果
         if np.any(np.isnan(dist)):
-            st.error("距离计算结果仍包含无效值，请检查原始数据")
+            report.error("距离计算结果仍包含无效值，请检查原始数据")
             # 将剩余的NaN替换为一个合理的默认值
             dist = np.nan_to_num(dist, nan=1000.0)  # 使用1000像素作为默认距离
         
-        st.write(f"距离数组形状: {dist.shape}")
-        st.write(f"距离范围: [{np.nanmin(dist):.2f}, {np.nanmax(dist):.2f}]")
+        report.write(f"距离数组形状: {dist.shape}")
+        report.write(f"距离范围: [{np.nanmin(dist):.2f}, {np.nanmax(dist):.2f}]")
         
         return dist
     except Exception as e:
-        st.error(f"计算距离时出错: {str(e)}")
-        st.error(f"错误详情: {traceback.format_exc()}")
+        report.error(f"计算距离时出错: {str(e)}")
+        report.error(f"错误详情: {traceback.format_exc()}")
         # 返回一个默认的距离数组
         return np.full(len(next(iter(coords.values()))['x']), 1000.0)
 
@@ -327,63 +685,67 @@ def calculate_facing_angles(coords: dict) -> dict:
     计算朝向角度
     """
     try:
-        # 计算向量（从耳朵中点到嘴部）
-        # 老鼠1
-        mouse1_ear_cx = (coords['individual1_right-ear']['x'] + coords['individual1_left-ear']['x']) / 2.0
-        mouse1_ear_cy = (coords['individual1_right-ear']['y'] + coords['individual1_left-ear']['y']) / 2.0
-        mouse1_vec_x = coords['individual1_Mouth']['x'] - mouse1_ear_cx
-        mouse1_vec_y = coords['individual1_Mouth']['y'] - mouse1_ear_cy
-        
-        # 老鼠2
-        mouse2_ear_cx = (coords['individual2_right-ear']['x'] + coords['individual2_left-ear']['x']) / 2.0
-        mouse2_ear_cy = (coords['individual2_right-ear']['y'] + coords['individual2_left-ear']['y']) / 2.0
-        mouse2_vec_x = coords['individual2_Mouth']['x'] - mouse2_ear_cx
-        mouse2_vec_y = coords['individual2_Mouth']['y'] - mouse2_ear_cy
-        
-        # 计算连接向量（从老鼠1到老鼠2）
-        conn_x = mouse2_ear_cx - mouse1_ear_cx
-        conn_y = mouse2_ear_cy - mouse1_ear_cy
-        
-        # 计算角度
-        mouse1_angle = calculate_angle((mouse1_vec_x, mouse1_vec_y), (conn_x, conn_y))
-        mouse2_angle = calculate_angle((mouse2_vec_x, mouse2_vec_y), (-conn_x, -conn_y))
+        facing_angles = compute_facing_angles(coords)
+        mouse1_angle = facing_angles['mouse1_angle']
+        mouse2_angle = facing_angles['mouse2_angle']
         
         # 验证计算结果
-        st.write(f"角度1数组形状: {mouse1_angle.shape}")
-        st.write(f"角度1范围: [{mouse1_angle.min():.2f}, {mouse1_angle.max():.2f}]")
-        st.write(f"角度2数组形状: {mouse2_angle.shape}")
-        st.write(f"角度2范围: [{mouse2_angle.min():.2f}, {mouse2_angle.max():.2f}]")
-        
-        return {
-            'mouse1_angle': mouse1_angle,
-            'mouse2_angle': mouse2_angle
-        }
+        report.write(f"角度1数组形状: {mouse1_angle.shape}")
+        report.write(f"角度1范围: [{mouse1_angle.min():.2f}, {mouse1_angle.max():.2f}]")
+        report.write(f"角度2数组形状: {mouse2_angle.shape}")
+        report.write(f"角度2范围: [{mouse2_angle.min():.2f}, {mouse2_angle.max():.2f}]")
+        
+        return facing_angles
     except Exception as e:
-        st.error(f"计算角度时出错: {str(e)}")
+        report.error(f"计算角度时出错: {str(e)}")
         raise
 
 
+def compute_facing_angles(coords: dict) -> dict:
+    """
+    计算朝向角度(纯计算, 不输出日志), 供整段和分块流式分析共用
+    两只小鼠为 social_geometry 成对朝向角的特例
+    """
+    geometry = social_geometry(coords, SOCIAL_INDIVIDUALS)
+    _, mouse1_angle, mouse2_angle = geometry.pair(*SOCIAL_INDIVIDUALS)
+    return {
+        'mouse1_angle': mouse1_angle,
+        'mouse2_angle': mouse2_angle
+    }
+
+
 def calculate_angle(vector1, vector2) -> np.ndarray:
     """
     计算两个向量之间的角度
     """
-    v1x, v1y = vector1
-    v2x, v2y = vector2
-    
-    # 计算点积
-    dot = v1x * v2x + v1y * v2y
-    
-    # 计算向量模长
-    mag1 = np.sqrt(v1x**2 + v1y**2)
-    mag2 = np.sqrt(v2x**2 + v2y**2)
-    
-    # 计算夹角余弦值
-    cos_angle = dot / (mag1 * mag2 + 1e-8)
-    cos_angle = np.clip(cos_angle, -1.0, 1.0)
-    
-    # 转换为角度
-    angles = np.degrees(np.arccos(cos_angle))
-    return angles
+    return vector_angle(*vector1, *vector2)
+
+
+def _mouth_positions(coords: dict):
+    """两只小鼠嘴部的 (frames, 2) x / y 坐标"""
+    x = np.stack([coords[f'{ind}_Mouth']['x'] for ind in SOCIAL_INDIVIDUALS], axis=1)
+    y = np.stack([coords[f'{ind}_Mouth']['y'] for ind in SOCIAL_INDIVIDUALS], axis=1)
+    return x, y
+
+
+def pairwise_social_types(
+    geometry: SocialGeometry,
+    close_threshold: float = SOCIAL_CLOSE_THRESHOLD,
+    facing_threshold: float = SOCIAL_FACING_THRESHOLD
+) -> np.ndarray:
+    """
+    N 只动物每对之间的帧级社交类型, 规则与 determine_social_type 相同.
+    返回 (frames, N, N) 的 SOCIAL_LABEL_TABLE 编码, 对称, 对角线为 'none'.
+    """
+    facing = geometry.facing < facing_threshold
+    mutual_facing = facing & facing.transpose(0, 2, 1)
+    close_mask = geometry.distance < close_threshold
+    social_types = SOCIAL_LABEL_TABLE.full(geometry.distance.size, 'none').reshape(
+        geometry.distance.shape
+    )
+    social_types[close_mask & mutual_facing] = SOCIAL_LABEL_TABLE.code('interaction')
+    social_types[close_mask & ~mutual_facing] = SOCIAL_LABEL_TABLE.code('proximity')
+    return social_types
 
 
 # ---------------------------------------
@@ -393,13 +755,22 @@ def analyze_bout_duration(
     social_frames: dict,
     min_duration_sec: float,
     max_duration_sec: float,
-    fps: float
+    fps: float,
+    chunk_frames: Optional[int] = None
 ) -> list:
     """
     (和你之前的逻辑类似) 用 2秒合并逻辑, 并仅输出≥2秒的段.
+    chunk_frames 不为空时按块读取帧级数组, 每块向后多读 2 秒的合并间隔,
+    段的状态跨块延续, 结果与整段处理一致.
+    social_types 可以是 SOCIAL_LABEL_TABLE 编码, 也可以是文字标签 (先编码再比较).
+    
+    每块对每类标签做一次反向扫描得到"下一个有效出现帧", 由此一次算出该标签的段
+    在哪些帧断开 (之后 2 秒内再没有同类有效帧); 逐段用二分查找跳到断点和下一段
+    起点, 耗时与帧数成线性, 不再在每个间隔帧上向后扫描 2 秒.
     """
     valid_frames = social_frames['valid_frames']
     social_types = social_frames['social_types']
+    none_code = SOCIAL_LABEL_TABLE.code('none')
     
     mouse_distance = social_frames['mouse_distance']
     mouse1_angle = social_frames['facing_angles']['mouse1_angle']
@@ -413,61 +784,47 @@ def analyze_bout_duration(
     current_start = None
     current_behavior = None
     
-    i = 0
-    while i < frame_count:
-        if valid_frames[i]:
-            btype = social_types[i]
-            if btype != 'none':
-                if current_start is None:
-                    current_start = i
-                    current_behavior = btype
-                else:
-                    # 如果发现新的行为和当前不一致, 检查gap
-                    if btype != current_behavior:
-                        if not can_merge_behavior(
-                            social_frames, i, current_behavior, gap_threshold_frames
-                        ):
-                            # 结束前一段
-                            results.extend(
-                                close_bout_if_valid(
-                                    current_start, i, current_behavior, 
-                                    mouse_distance, mouse1_angle, mouse2_angle,
-                                    min_duration_frames, fps
-                                )
-                            )
-                            current_start = i
-                            current_behavior = btype
-            else:
-                # 当前帧 'none'
-                if current_start is not None:
-                    if not can_merge_behavior(
-                        social_frames, i, current_behavior, gap_threshold_frames
-                    ):
-                        results.extend(
-                            close_bout_if_valid(
-                                current_start, i, current_behavior,
-                                mouse_distance, mouse1_angle, mouse2_angle,
-                                min_duration_frames, fps
-                            )
-                        )
-                        current_start = None
-                        current_behavior = None
-        else:
-            # invalid frame
-            if current_start is not None:
-                if not can_merge_behavior(
-                    social_frames, i, current_behavior, gap_threshold_frames
-                ):
-                    results.extend(
-                        close_bout_if_valid(
-                            current_start, i, current_behavior,
-                            mouse_distance, mouse1_angle, mouse2_angle,
-                            min_duration_frames, fps
-                        )
-                    )
-                    current_start = None
-                    current_behavior = None
-        i += 1
+    if chunk_frames is None:
+        chunk_frames = max(frame_count, 1)
+    for chunk in iter_frame_chunks(frame_count, chunk_frames, halo_after=gap_threshold_frames):
+        # 当前块及其后的合并间隔, 帧序号相对 chunk.lo
+        window_valid = np.asarray(valid_frames[chunk.lo:chunk.hi], dtype=bool)
+        window_types = SOCIAL_LABEL_TABLE.encode(social_types[chunk.lo:chunk.hi])
+        active = window_valid & (window_types != none_code)
+        breaks = {
+            code: np.flatnonzero(bout_break_mask(active & (window_types == code), gap_threshold_frames))
+            for code in range(len(SOCIAL_LABEL_TABLE)) if code != none_code
+        }
+        starts = np.flatnonzero(active)
+        
+        i = chunk.start - chunk.lo
+        end = chunk.stop - chunk.lo
+        while i < end:
+            if current_start is None:
+                # 下一段从块内下一个有效的非 'none' 帧开始
+                k = np.searchsorted(starts, i)
+                if k == len(starts) or starts[k] >= end:
+                    break
+                i = int(starts[k])
+                current_start = chunk.lo + i
+                current_behavior = int(window_types[i])
+                i += 1
+                continue
+            # 当前段在下一个断点结束, 断点帧本身可以开始新的一段
+            brk = breaks[current_behavior]
+            k = np.searchsorted(brk, i)
+            if k == len(brk) or brk[k] >= end:
+                break
+            i = int(brk[k])
+            results.extend(
+                close_bout_if_valid(
+                    current_start, chunk.lo + i, current_behavior,
+                    mouse_distance, mouse1_angle, mouse2_angle,
+                    min_duration_frames, fps
+                )
+            )
+            current_start = None
+            current_behavior = None
     
     # 最后一段
     if current_start is not None:
@@ -482,68 +839,62 @@ def analyze_bout_duration(
     return results
 
 
-def can_merge_behavior(
-    social_frames: dict,
-    start_idx: int,
-    prev_behavior: Optional[str],
-    gap_frames: int
-) -> bool:
-    if prev_behavior is None:
-        return False
-
-    valid_frames = social_frames['valid_frames']
-    social_types = social_frames['social_types']
-    n = len(valid_frames)
-
-    end_search = min(start_idx + gap_frames, n)
-    for j in range(start_idx, end_search):
-        if valid_frames[j] and social_types[j] == prev_behavior:
-            return True
-    return False
-
-
-def close_bout_if_valid(
-    bout_start: int,
-    bout_end: int,
-    behavior: Optional[str],
-    mouse_distance: np.ndarray,
-    mouse1_angle: np.ndarray,
-    mouse2_angle: np.ndarray,
-    min_duration_frames: int,
-    fps: float
-) -> List[Dict[str, Any]]:
+def bout_break_mask(occurrences: np.ndarray, gap_frames: int) -> np.ndarray:
+    """
+    某类标签的段在哪些帧断开.
+    occurrences 为该标签的有效帧掩码; 第 i 帧不是该标签, 且 [i, i + gap_frames)
+    内 (截止到数组末尾) 没有该标签时, 正在进行的该标签段在第 i 帧结束.
+    "下一个出现帧"由一次反向累计最小值得到, 每帧的判断为 O(1).
+    """
+    n = len(occurrences)
+    frames = np.arange(n)
+    next_seen = np.where(occurrences, frames, n + gap_frames)
+    next_seen = np.minimum.accumulate(next_seen[::-1])[::-1]
+    return ~occurrences & (next_seen - frames >= gap_frames)
+
+
+def close_bout_if_valid(
+    bout_start: int,
+    bout_end: int,
+    behavior: Optional[int],
+    mouse_distance: np.ndarray,
+    mouse1_angle: np.ndarray,
+    mouse2_angle: np.ndarray,
+    min_duration_frames: int,
+    fps: float
+) -> List[Dict[str, Any]]:
     """
     检查并关闭一个行为片段，如果其持续时间大于等于最小持续时间则返回结果
     
     Args:
         bout_start: 片段开始帧
         bout_end: 片段结束帧
-        behavior: 行为类型
+        behavior: 行为类型 (SOCIAL_LABEL_TABLE 编码)
         mouse_distance: 鼠间距离数组
         mouse1_angle: 鼠1角度数组
         mouse2_angle: 鼠2角度数组
         min_duration_frames: 最小持续帧数
         fps: 帧率
     """
-    if behavior is None:
-        return []
-
-    duration = bout_end - bout_start
-    if duration >= min_duration_frames:
-        last_idx = bout_end - 1
-        return [{
-            'behavior_type': behavior,
-            'start_frame': bout_start,
-            'end_frame': last_idx,
-            'start_s': bout_start / fps,
-            'end_s': last_idx / fps,
-            'duration_frames': duration,
-            'duration_seconds': duration / fps,
-            'distance': float(mouse_distance[last_idx]),
-            'mouse1_angle': float(mouse1_angle[last_idx]),
-            'mouse2_angle': float(mouse2_angle[last_idx])
-        }]
-    return []
+    if behavior is None:
+        return []
+
+    duration = bout_end - bout_start
+    if duration >= min_duration_frames:
+        last_idx = bout_end - 1
+        return [{
+            'behavior_type': SOCIAL_LABEL_TABLE.labels[behavior],
+            'start_frame': bout_start,
+            'end_frame': last_idx,
+            'start_s': bout_start / fps,
+            'end_s': last_idx / fps,
+            'duration_frames': duration,
+            'duration_seconds': duration / fps,
+            'distance': float(mouse_distance[last_idx]),
+            'mouse1_angle': float(mouse1_angle[last_idx]),
+            'mouse2_angle': float(mouse2_angle[last_idx])
+        }]
+    return []
 
 
 # ---------------------------------------
@@ -568,10 +919,11 @@ def compute_speed(x_arr: np.ndarray, y_arr: np.ndarray, fps: float) -> np.ndarra
 def plot_analysis_results(
     analysis_context: dict,
     figure_dir: str,
-    interaction_threshold: float = 100.0
+    interaction_threshold: float = 100.0,
+    fps: float = 30.0
 ):
     """
-    生成并保存可视化图表
+    生成并保存可视化图表, 时间轴按 fps 换算
     """
     # 提取数据
     distance = analysis_context['distance']
@@ -582,51 +934,14 @@ def plot_analysis_results(
     behavior_data = analysis_context['behavior_data']
     positions = analysis_context['positions']
     
-    # 定义时间格式化函数
-    def format_time(x, p):
-        """将帧数转换为 hh:mm:ss 格式，以整数化的分钟显示"""
-        total_seconds = int(x / 30.0)  # 假设30fps
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        return f"{hours:02d}:{minutes:02d}:00"
-    
     # ---------- 1. 行为时间线图 ----------
+    # 每个连续段画一个矩形, 图元数与段数成正比
     fig, ax = plt.subplots(figsize=(14, 4))  # 增加宽度以容纳右侧图例
-    behaviors = ['interaction', 'proximity', 'none']
     colors = {'interaction': 'green', 'proximity': 'orange', 'none': 'gray'}
+    behavior_codes = SOCIAL_LABEL_TABLE.encode(behavior_data)
+    plot_timeline(ax, state_intervals(behavior_codes, SOCIAL_LABELS), colors)
+    set_time_axis(ax, len(behavior_data), fps)
     
-    for i, behavior in enumerate(behaviors):
-        behavior_frames = [frame for frame, b in enumerate(behavior_data) if b == behavior]
-        if behavior_frames:
-            ax.scatter(behavior_frames, [i] * len(behavior_frames), 
-                      c=colors[behavior], label=behavior, s=1, alpha=0.6)
-    
-    ax.set_yticks(range(len(behaviors)))
-    ax.set_yticklabels(behaviors)
-    
-    # 设置x轴刻度 - 自适应间隔
-    total_frames = len(behavior_data)
-    total_minutes = (total_frames // 30) // 60  # 总分钟数
-    
-    # 根据总时长自适应调整间隔
-    if total_minutes <= 10:  # 小于10分钟，每1分钟一个刻度
-        interval_minutes = 1
-    elif total_minutes <= 30:  # 小于30分钟，每2分钟一个刻度
-        interval_minutes = 2
-    elif total_minutes <= 60:  # 小于1小时，每5分钟一个刻度
-        interval_minutes = 5
-    elif total_minutes <= 120:  # 小于2小时，每10分钟一个刻度
-        interval_minutes = 10
-    else:  # 大于2小时，每30分钟一个刻度
-        interval_minutes = 30
-    
-    # 计算刻度位置（以帧为单位）
-    xticks = np.arange(0, total_frames + 1, 30 * 60 * interval_minutes)
-    ax.set_xticks(xticks)
-    ax.xaxis.set_major_formatter(FuncFormatter(format_time))
-    plt.xticks(rotation=45)
-    
-    ax.set_xlabel("Time (hh:mm:ss)")
     ax.set_title("Behavior Timeline")
     # 将图例放在图的右侧
     ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
@@ -636,7 +951,9 @@ def plot_analysis_results(
     
     # ---------- 2. 行为比例柱状图 ----------
     fig, ax = plt.subplots(figsize=(8, 6))
-    behavior_counts = Counter(behavior_data)
+    behavior_counts = {
+        b: count for b, count in SOCIAL_LABEL_TABLE.counts(behavior_codes).items() if count
+    }
     total_frames = len(behavior_data)
     percentages = {b: (count/total_frames)*100 for b, count in behavior_counts.items()}
     
@@ -715,17 +1032,17 @@ def plot_analysis_results(
         
         # 创建自定义颜色映射
         from matplotlib.colors import LinearSegmentedColormap
-        heatmap_colors = [
-            (1, 1, 1, 0),          # 完全透明的白色作为背景
-            (0.6, 0.6, 1, 0.3),    # 淡紫色，用于低热力区
-            (0, 0.6, 1, 0.4),      # 天蓝色
-            (0, 1, 0.6, 0.5),      # 青绿色
-            (1, 1, 0, 0.7),        # 黄色
-            (1, 0.6, 0, 0.8),      # 橙色
-            (1, 0, 0, 1)           # 红色
-        ]
-        n_bins = 256  # 颜色分级数
-        cmap = LinearSegmentedColormap.from_list("custom", heatmap_colors, N=n_bins)
+        heatmap_colors = [
+            (1, 1, 1, 0),          # 完全透明的白色作为背景
+            (0.6, 0.6, 1, 0.3),    # 淡紫色，用于低热力区
+            (0, 0.6, 1, 0.4),      # 天蓝色
+            (0, 1, 0.6, 0.5),      # 青绿色
+            (1, 1, 0, 0.7),        # 黄色
+            (1, 0.6, 0, 0.8),      # 橙色
+            (1, 0, 0, 1)           # 红色
+        ]
+        n_bins = 256  # 颜色分级数
+        cmap = LinearSegmentedColormap.from_list("custom", heatmap_colors, N=n_bins)
         
         # Mouse 1热力图
         hist1_smooth = create_smooth_heatmap(
@@ -823,9 +1140,9 @@ def save_results(results: pd.DataFrame, output_path: str):
     """
     try:
         results.to_csv(output_path, index=False)
-        st.success(f"结果已保存 / Results saved: {output_path}")
+        report.success(f"结果已保存 / Results saved: {output_path}")
     except Exception as e:
-        st.error(f"保存结果失败 / Failed to save results: {str(e)}")
+        report.error(f"保存结果失败 / Failed to save results: {str(e)}")
 
 
 def save_analysis_data(video_name: str, video_dir: str, analysis_context: dict, results_df: pd.DataFrame):
@@ -844,20 +1161,20 @@ def save_analysis_data(video_name: str, video_dir: str, analysis_context: dict,
         try:
             os.makedirs(results_dir, exist_ok=True)
         except Exception as e:
-            st.warning(f"无法在原始目录创建文件夹: {str(e)}")
+            report.warning(f"无法在原始目录创建文件夹: {str(e)}")
             # 尝试在用户主目录下创建
             user_home = os.path.expanduser("~")
             results_dir = os.path.join(user_home, "DLCv3_Results", video_name)
             try:
                 os.makedirs(results_dir, exist_ok=True)
-                st.info(f"结果将保存至用户主目录: {results_dir}")
+                report.info(f"结果将保存至用户主目录: {results_dir}")
             except Exception as e:
-                st.error(f"无法在用户主目录创建文件夹: {str(e)}")
+                report.error(f"无法在用户主目录创建文件夹: {str(e)}")
                 # 最后尝试使用临时目录
                 import tempfile
                 results_dir = os.path.join(tempfile.gettempdir(), f"DLCv3_Results_{video_name}")
                 os.makedirs(results_dir, exist_ok=True)
-                st.warning(f"使用临时目录: {results_dir}")
+                report.warning(f"使用临时目录: {results_dir}")
         
         # 2. 保存行为分析结果
         behavior_path = os.path.join(results_dir, "behavior_analysis.csv")
@@ -865,36 +1182,110 @@ def save_analysis_data(video_name: str, video_dir: str, analysis_context: dict,
             # 如果文件已存在，直接覆盖
             results_df.to_csv(behavior_path, index=False, mode='w')
         except Exception as e:
-            st.error(f"保存行为分析结果失败: {str(e)}")
+            report.error(f"保存行为分析结果失败: {str(e)}")
             # 尝试使用时间戳创建新文件名
             behavior_path = os.path.join(results_dir, f"behavior_analysis_{int(time.time())}.csv")
             results_df.to_csv(behavior_path, index=False)
         
         # 3. 保存详细数据
-        detailed_data = pd.DataFrame({
-            'frame': np.arange(len(analysis_context['distance'])),
+        # 逐帧数据按块写出, 长录像也不在内存中拼接整张表
+        detailed_data = {
+            'frame': range(len(analysis_context['distance'])),
             'distance': analysis_context['distance'],
             'mouse1_angle': analysis_context['mouse1_angle'],
             'mouse2_angle': analysis_context['mouse2_angle'],
             'mouse1_speed': analysis_context['speeds_mouse1'],
             'mouse2_speed': analysis_context['speeds_mouse2']
-        })
+        }
         
         data_path = os.path.join(results_dir, "detailed_data.csv")
         try:
             # 如果文件已存在，直接覆盖
-            detailed_data.to_csv(data_path, index=False, mode='w')
+            write_frame_csv(data_path, detailed_data)
         except Exception as e:
-            st.error(f"保存详细数据失败: {str(e)}")
+            report.error(f"保存详细数据失败: {str(e)}")
             # 尝试使用时间戳创建新文件名
             data_path = os.path.join(results_dir, f"detailed_data_{int(time.time())}.csv")
-            detailed_data.to_csv(data_path, index=False)
+            write_frame_csv(data_path, detailed_data)
         
-        st.success(f"分析数据已保存至: {results_dir}")
+        report.success(f"分析数据已保存至: {results_dir}")
         return results_dir
         
     except Exception as e:
-        st.error(f"保存分析数据失败: {str(e)}")
-        st.error(f"错误详情: {traceback.format_exc()}")
+        report.error(f"保存分析数据失败: {str(e)}")
+        report.error(f"错误详情: {traceback.format_exc()}")
         # 返回None但不中断程序
         return None
+
+
+# ---------------------------------------
+# 9. 参数扫描
+# ---------------------------------------
+def sweep_social_parameters(
+    df: Union[pd.DataFrame, PoseData],
+    thresholds: Sequence[float],
+    close_thresholds: Sequence[float] = (SOCIAL_CLOSE_THRESHOLD,),
+    facing_thresholds: Sequence[float] = (SOCIAL_FACING_THRESHOLD,),
+    min_durations_sec: Sequence[float] = (2.0,),
+    fps: float = 30.0
+) -> pd.DataFrame:
+    """
+    社交分析的参数扫描: 坐标、距离和朝向角只计算一次, 每组 (距离阈值, 朝向阈值)
+    只做一次判定和平滑, 每个置信度阈值只合并一次行为段 (不设最小时长),
+    各最小持续时间只是对同一组段的时长过滤.
+    每行的段数与时长与 analyze_social_behavior 在对应参数下的结果表一致.
+    
+    Args:
+        df: 同 analyze_social_behavior
+        thresholds: 关键点置信度阈值
+        close_thresholds: 嘴部距离阈值(像素)
+        facing_thresholds: 朝向角阈值(度)
+        min_durations_sec: 最小持续时间(秒)
+        fps: 视频帧率
+    
+    Returns:
+        pd.DataFrame: 每组参数一行, 含 n_bouts / interaction_bouts / proximity_bouts /
+        total_duration_s / mean_duration_s
+    """
+    features = compute_social_features(_social_coords(df), fps)
+    mouse_distance = features['distance']
+    facing_angles = {
+        'mouse1_angle': features['mouse1_angle'],
+        'mouse2_angle': features['mouse2_angle']
+    }
+    min_likelihood = features['min_likelihood']
+    half_second_frames = int(0.5 * fps)
+    
+    rows = []
+    for close_threshold in close_thresholds:
+        for facing_threshold in facing_thresholds:
+            social_types = smooth_behavior_sequence(
+                determine_social_type(mouse_distance, facing_angles, close_threshold, facing_threshold),
+                window_size=half_second_frames
+            )
+            for threshold in thresholds:
+                bouts = analyze_bout_duration(
+                    {
+                        'valid_frames': min_likelihood > threshold,
+                        'mouse_distance': mouse_distance,
+                        'facing_angles': facing_angles,
+                        'social_types': social_types
+                    },
+                    min_duration_sec=0.0,
+                    max_duration_sec=np.inf,
+                    fps=fps
+                )
+                durations = np.array([b['duration_frames'] for b in bouts], dtype=np.int64)
+                labels = np.array([b['behavior_type'] for b in bouts], dtype=object)
+                for min_duration_sec in min_durations_sec:
+                    keep = durations >= int(min_duration_sec * fps)
+                    rows.append({
+                        'threshold': threshold,
+                        'close_threshold': close_threshold,
+                        'facing_threshold': facing_threshold,
+                        'min_duration_sec': min_duration_sec,
+                        **bout_summary(durations[keep], fps),
+                        'interaction_bouts': int(np.sum(labels[keep] == 'interaction')),
+                        'proximity_bouts': int(np.sum(labels[keep] == 'proximity'))
+                    })
+    return pd.DataFrame(rows)
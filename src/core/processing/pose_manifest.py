@@ -0,0 +1,416 @@
+"""DLC 输出清单
+Per-folder manifest of DeepLabCut outputs.
+
+每个工作文件夹在 .pose_cache/manifest.json 中持久化一份目录清单, 记录
+视频 → DLC 输出 (.h5 / .csv)、标注视频和结果目录的对应关系。刷新时只对
+修改时间发生变化的目录重新列出文件, 其余目录只需一次 stat, 避免在
+Streamlit 每次重新运行时扫描整个 (可能位于网络存储上的) 文件夹。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .pose_store import POSE_CACHE_DIRNAME, POSE_EXTENSIONS, get_pose_schema
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+VIDEO_EXTENSIONS: Tuple[str, ...] = (".mp4",)
+LABELED_SUFFIX = "_labeled"
+RESULTS_SUFFIX = "_results"
+
+# 修改时间距当前不足该值的目录视为不稳定, 下次刷新时重新列出
+# (部分网络文件系统的时间戳精度只有 1~2 秒)
+_RACY_WINDOW_NS = 2 * 10**9
+
+_manifests: Dict[str, "PoseManifest"] = {}
+_manifests_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class VideoOutputs:
+    """单个视频对应的 DLC 输出
+    DLC outputs that belong to one video.
+
+    Attributes:
+        video_path: 视频路径 / video path
+        pose_files: 姿态文件, 同名时 .h5 优先 / pose files, .h5 preferred
+        labeled_video: 标注视频路径 / labeled video path, if any
+        results_dir: 分析结果目录 / results directory, if any
+    """
+
+    video_path: str
+    pose_files: Tuple[str, ...]
+    labeled_video: Optional[str]
+    results_dir: Optional[str]
+
+
+class PoseManifest:
+    """工作文件夹的 DLC 输出清单
+    Manifest of the DLC outputs below a working folder.
+
+    Args:
+        folder_path (str): 工作文件夹路径
+    """
+
+    def __init__(self, folder_path: str):
+        self.folder_path = os.path.abspath(folder_path)
+        self._dirs: Dict[str, dict] = {}
+        self._videos: Dict[str, VideoOutputs] = {}
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.folder_path, POSE_CACHE_DIRNAME, MANIFEST_FILENAME)
+
+    def load(self) -> bool:
+        """读取持久化的清单, 文件不存在或版本不符时返回 False"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != MANIFEST_VERSION:
+            return False
+        self._dirs = data.get("dirs", {})
+        self._rebuild_videos()
+        return True
+
+    def save(self) -> None:
+        """原子写入清单; 目录不可写时静默跳过"""
+        cache_dir = os.path.dirname(self.manifest_path)
+        try:
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir, exist_ok=True)
+                # 新建的隐藏缓存目录不计入清单, 同步根目录的修改时间以免下次重新列出
+                root = self._dirs.get("")
+                if root is not None and root["mtime_ns"] != -1:
+                    root["mtime_ns"] = self._stable_mtime(
+                        os.stat(self.folder_path).st_mtime_ns
+                    )
+        except OSError:
+            return
+        data = {
+            "version": MANIFEST_VERSION,
+            "dirs": self._dirs,
+            "videos": {
+                self._rel(video): {
+                    "pose_files": [self._rel(path) for path in outputs.pose_files],
+                    "labeled_video": (
+                        self._rel(outputs.labeled_video)
+                        if outputs.labeled_video
+                        else None
+                    ),
+                    "results_dir": (
+                        self._rel(outputs.results_dir) if outputs.results_dir else None
+                    ),
+                }
+                for video, outputs in self._videos.items()
+            },
+        }
+        try:
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                json.dump(data, handle, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError:
+            pass
+
+    def refresh(self) -> bool:
+        """增量更新清单: 只重新列出修改时间变化的目录
+        Bring the manifest up to date, re-listing only directories whose mtime changed.
+
+        Returns:
+            bool: 清单是否发生变化
+        """
+        changed = False
+        listing_changed = False
+        seen = set()
+        pending = [""]
+        while pending:
+            rel_dir = pending.pop()
+            entry = self._dirs.get(rel_dir)
+            try:
+                mtime_ns = os.stat(self._abs(rel_dir)).st_mtime_ns
+                if entry is None or entry["mtime_ns"] != mtime_ns:
+                    scanned = self._scan(rel_dir, mtime_ns)
+                else:
+                    scanned = entry
+            except OSError:
+                continue
+            seen.add(rel_dir)
+            if scanned is not entry:
+                changed = True
+                if entry is None or (entry["files"], entry["dirs"]) != (
+                    scanned["files"],
+                    scanned["dirs"],
+                ):
+                    listing_changed = True
+                self._dirs[rel_dir] = scanned
+            pending.extend(
+                os.path.join(rel_dir, name) if rel_dir else name
+                for name in scanned["dirs"]
+            )
+        for rel_dir in set(self._dirs) - seen:
+            del self._dirs[rel_dir]
+            changed = listing_changed = True
+        if listing_changed or (changed and not self._videos):
+            self._rebuild_videos()
+        return changed
+
+    def videos(self, recursive: bool = False) -> List[str]:
+        """列出视频文件 (不含 DLC 标注视频)
+        List video files, excluding DLC labeled videos.
+
+        Args:
+            recursive (bool): 是否包含子目录中的视频
+
+        Returns:
+            List[str]: 视频路径列表
+        """
+        return [
+            video
+            for video in self._videos
+            if recursive or os.path.dirname(video) == self.folder_path
+        ]
+
+    def outputs(self, video_path: str) -> Optional[VideoOutputs]:
+        """返回视频对应的 DLC 输出, 视频不在清单中时为 None"""
+        return self._videos.get(os.path.abspath(video_path))
+
+    def find_pose_file(
+        self,
+        video_path: str,
+        suffix: str = "",
+        bodyparts: Optional[Sequence[str]] = None,
+        individuals: Optional[Sequence[str]] = None,
+    ) -> Optional[str]:
+        """查找视频对应的姿态文件, 参数含义同模块级 find_pose_file"""
+        video_path = os.path.abspath(video_path)
+        outputs = self._videos.get(video_path)
+        if outputs is not None:
+            candidates: Sequence[str] = outputs.pose_files
+        else:
+            # 视频本身不在文件夹中时, 仍按文件名前缀匹配输出
+            candidates = self._pose_files_for(
+                os.path.dirname(video_path),
+                os.path.splitext(os.path.basename(video_path))[0],
+            )
+        for path in candidates:
+            if os.path.splitext(path)[0].endswith(suffix) and _has_columns(
+                path, bodyparts, individuals
+            ):
+                return path
+        return None
+
+    def list_pose_files(
+        self,
+        suffix: str = "",
+        recursive: bool = False,
+        bodyparts: Optional[Sequence[str]] = None,
+        individuals: Optional[Sequence[str]] = None,
+    ) -> List[str]:
+        """列出姿态文件, 参数含义同模块级 list_pose_files"""
+        found: Dict[str, str] = {}
+        for rel_dir, entry in self._dirs.items():
+            if rel_dir and not recursive:
+                continue
+            abs_dir = self._abs(rel_dir)
+            for name in entry["files"]:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() not in POSE_EXTENSIONS or not stem.endswith(suffix):
+                    continue
+                base = os.path.join(abs_dir, stem)
+                path = os.path.join(abs_dir, name)
+                current = found.get(base)
+                if current is None or _extension_rank(path) < _extension_rank(current):
+                    found[base] = path
+        return [
+            found[base]
+            for base in sorted(found)
+            if _has_columns(found[base], bodyparts, individuals)
+        ]
+
+    def _abs(self, rel_path: str) -> str:
+        return (
+            os.path.join(self.folder_path, rel_path) if rel_path else self.folder_path
+        )
+
+    def _rel(self, path: str) -> str:
+        return os.path.relpath(path, self.folder_path)
+
+    def _scan(self, rel_dir: str, mtime_ns: int) -> dict:
+        files: List[str] = []
+        dirs: List[str] = []
+        with os.scandir(self._abs(rel_dir)) as entries:
+            for entry in entries:
+                # 跳过隐藏文件和目录 (如缓存目录)
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    dirs.append(entry.name)
+                else:
+                    files.append(entry.name)
+        return {
+            "mtime_ns": self._stable_mtime(mtime_ns),
+            "files": sorted(files),
+            "dirs": sorted(dirs),
+        }
+
+    @staticmethod
+    def _stable_mtime(mtime_ns: int) -> int:
+        """目录刚被修改时, 同一时间戳内可能还有新文件, 记为 -1 使下次刷新重新列出"""
+        if time.time_ns() - mtime_ns < _RACY_WINDOW_NS:
+            return -1
+        return mtime_ns
+
+    def _pose_files_for(self, abs_dir: str, video_name: str) -> List[str]:
+        rel_dir = os.path.relpath(abs_dir, self.folder_path)
+        entry = self._dirs.get("" if rel_dir == "." else rel_dir)
+        if entry is None:
+            return []
+        prefix = video_name + "DLC"
+        by_stem: Dict[str, str] = {}
+        for name in entry["files"]:
+            stem, ext = os.path.splitext(name)
+            if not name.startswith(prefix) or ext.lower() not in POSE_EXTENSIONS:
+                continue
+            path = os.path.join(abs_dir, name)
+            current = by_stem.get(stem)
+            if current is None or _extension_rank(path) < _extension_rank(current):
+                by_stem[stem] = path
+        return sorted(by_stem.values(), key=lambda path: (_extension_rank(path), path))
+
+    def _rebuild_videos(self) -> None:
+        videos: Dict[str, VideoOutputs] = {}
+        for rel_dir in sorted(self._dirs):
+            entry = self._dirs[rel_dir]
+            abs_dir = self._abs(rel_dir)
+            for name in entry["files"]:
+                stem, ext = os.path.splitext(name)
+                if ext.lower() not in VIDEO_EXTENSIONS or stem.endswith(LABELED_SUFFIX):
+                    continue
+                prefix = stem + "DLC"
+                labeled = next(
+                    (
+                        os.path.join(abs_dir, other)
+                        for other in entry["files"]
+                        if other.startswith(prefix)
+                        and os.path.splitext(other)[0].endswith(LABELED_SUFFIX)
+                        and os.path.splitext(other)[1].lower() in VIDEO_EXTENSIONS
+                    ),
+                    None,
+                )
+                results = stem + RESULTS_SUFFIX
+                video_path = os.path.join(abs_dir, name)
+                videos[video_path] = VideoOutputs(
+                    video_path=video_path,
+                    pose_files=tuple(self._pose_files_for(abs_dir, stem)),
+                    labeled_video=labeled,
+                    results_dir=(
+                        os.path.join(abs_dir, results)
+                        if results in entry["dirs"]
+                        else None
+                    ),
+                )
+        self._videos = videos
+
+
+def get_manifest(folder_path: str) -> PoseManifest:
+    """获取文件夹的最新清单 (进程内复用, 变化时写回磁盘)
+    Return an up-to-date manifest for a folder, shared within the process.
+
+    Args:
+        folder_path (str): 工作文件夹路径
+
+    Returns:
+        PoseManifest: 已刷新的清单
+    """
+    key = os.path.abspath(folder_path)
+    with _manifests_lock:
+        manifest = _manifests.get(key)
+        if manifest is None:
+            manifest = PoseManifest(key)
+            manifest.load()
+            _manifests[key] = manifest
+        if manifest.refresh():
+            manifest.save()
+        return manifest
+
+
+def find_pose_file(
+    video_path: str,
+    suffix: str = "",
+    bodyparts: Optional[Sequence[str]] = None,
+    individuals: Optional[Sequence[str]] = None,
+) -> Optional[str]:
+    """查找视频对应的 DLC 输出文件 (.h5 优先, 回退 .csv)
+    Find the DLC output written next to a video, preferring .h5 over .csv.
+
+    不依赖 scorer 名称: 指定 bodyparts / individuals 时通过表头判断输出
+    是否来自所需的模型, 重新训练模型后无需改名。
+    Matching does not rely on the scorer name; when bodyparts / individuals are
+    given the header decides whether an output belongs to the required model.
+
+    Args:
+        video_path (str): 视频文件路径
+        suffix (str): 输出文件名(不含扩展名)需要的结尾, 如多动物的 '_el'
+        bodyparts (Sequence[str], optional): 表头中必须包含的关键点
+        individuals (Sequence[str], optional): 表头中必须包含的个体
+
+    Returns:
+        Optional[str]: 输出文件路径, 找不到时为 None
+    """
+    manifest = get_manifest(os.path.dirname(os.path.abspath(video_path)))
+    return manifest.find_pose_file(video_path, suffix, bodyparts, individuals)
+
+
+def list_pose_files(
+    folder_path: str,
+    suffix: str = "",
+    recursive: bool = False,
+    bodyparts: Optional[Sequence[str]] = None,
+    individuals: Optional[Sequence[str]] = None,
+) -> List[str]:
+    """列出文件夹中的 DLC 输出, 同名的 .h5 和 .csv 只保留 .h5
+    List DLC outputs in a folder; when both .h5 and .csv exist only .h5 is kept.
+
+    Args:
+        folder_path (str): 文件夹路径
+        suffix (str): 输出文件名(不含扩展名)需要的结尾, 如 '00000' 或 '_el'
+        recursive (bool): 是否递归子目录
+        bodyparts (Sequence[str], optional): 表头中必须包含的关键点
+        individuals (Sequence[str], optional): 表头中必须包含的个体
+
+    Returns:
+        List[str]: 输出文件路径列表
+    """
+    return get_manifest(folder_path).list_pose_files(
+        suffix, recursive, bodyparts, individuals
+    )
+
+
+def _extension_rank(path: str) -> int:
+    return POSE_EXTENSIONS.index(os.path.splitext(path)[1].lower())
+
+
+def _has_columns(
+    path: str,
+    bodyparts: Optional[Sequence[str]],
+    individuals: Optional[Sequence[str]],
+) -> bool:
+    """表头是否包含所需的关键点和个体, 非 DLC 文件返回 False"""
+    if bodyparts is None and individuals is None:
+        return True
+    try:
+        schema = get_pose_schema(path)
+    except (OSError, ValueError):
+        return False
+    return set(bodyparts or ()) <= set(schema.bodyparts) and set(
+        individuals or ()
+    ) <= set(schema.individuals)
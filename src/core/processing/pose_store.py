@@ -0,0 +1,703 @@
+"""DLC 姿态数据列式缓存
+Columnar pose cache for DeepLabCut outputs.
+
+DLC 的多行表头 CSV / H5 只解析一次, 之后以 float64 内存映射数组
+(frames × individuals × bodyparts × {x, y, likelihood}) 的形式复用,
+缓存以文件路径 + 大小 + 修改时间为键。
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import itertools
+import json
+import os
+from dataclasses import dataclass, replace
+from functools import cached_property, lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+POSE_FIELDS: Tuple[str, ...] = ("x", "y", "likelihood")
+POSE_CACHE_DIRNAME = ".pose_cache"
+POSE_CACHE_VERSION = 2
+
+# 坐标与置信度保持 float64, 与 pd.read_csv 的结果逐位一致 (阈值判定不受精度影响)
+POSE_DTYPE = np.float64
+
+# DLC 输出格式, 按读取优先级排序 (H5 远快于 CSV)
+POSE_EXTENSIONS: Tuple[str, ...] = (".h5", ".csv")
+
+# 单动物 DLC 输出没有 individuals 表头行, 以空字符串占位
+SINGLE_ANIMAL = ""
+
+_HEADER_LABELS = ("scorer", "individuals", "bodyparts", "coords")
+
+# H5 中 DLC 数据表的键名
+_H5_KEY = "df_with_missing"
+
+ColumnKey = Tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class PoseSchema:
+    """DLC 输出的表头结构, 只读取表头即可得到
+    Header layout of a DLC output file, obtained without parsing data rows.
+
+    Attributes:
+        source_path: 源文件路径 / source file path
+        scorer: DLC scorer 名称 / scorer name
+        multi_animal: 是否有 individuals 表头行 / whether an individuals row exists
+        header_rows: CSV 表头行数, H5 为 0 / number of CSV header rows (0 for H5)
+        columns: 每个数据列的 (individual, bodypart, field), 与文件列顺序一致,
+            不含帧索引列 / (individual, bodypart, field) per data column, in file order
+    """
+
+    source_path: str
+    scorer: str
+    multi_animal: bool
+    header_rows: int
+    columns: Tuple[ColumnKey, ...]
+
+    @cached_property
+    def individuals(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(key[0] for key in self._pose_columns))
+
+    @cached_property
+    def bodyparts(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(key[1] for key in self._pose_columns))
+
+    @cached_property
+    def column_map(self) -> Dict[ColumnKey, int]:
+        """(individual, bodypart, field) -> 数据列序号 (不含帧索引列)"""
+        return {key: j for j, key in enumerate(self.columns)}
+
+    @property
+    def _pose_columns(self) -> List[ColumnKey]:
+        return [key for key in self.columns if key[2] in POSE_FIELDS]
+
+    def column_index(
+        self, bodypart: str, field: str, individual: Optional[str] = None
+    ) -> int:
+        """返回某个关键点坐标所在的数据列序号
+        Return the data column position of one (individual, bodypart, field).
+
+        Args:
+            bodypart (str): 关键点名称
+            field (str): 'x', 'y' 或 'likelihood'
+            individual (str, optional): 个体名称, 默认第一个个体
+
+        Returns:
+            int: 数据列序号 (不含帧索引列)
+        """
+        if individual is None:
+            individual = self.individuals[0]
+        try:
+            return self.column_map[(individual, bodypart, field)]
+        except KeyError:
+            raise KeyError(
+                f"未找到列 / Unknown column: {(individual, bodypart, field)}"
+            ) from None
+
+    def resolve(
+        self,
+        individuals: Optional[Sequence[str]] = None,
+        bodyparts: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]:
+        """校验并补全投影名称, None 表示全部
+        Validate a projection; None selects everything on that axis.
+        """
+        return (
+            _resolve(
+                "individual",
+                self.individuals,
+                individuals if self.multi_animal else None,
+            ),
+            _resolve("bodypart", self.bodyparts, bodyparts),
+            _resolve("field", POSE_FIELDS, fields),
+        )
+
+
+@dataclass(frozen=True)
+class PoseData:
+    """DLC 姿态数据
+    Pose data loaded from a DLC output file.
+
+    Attributes:
+        values: (frames, individuals, bodyparts, 3) float64 数组 / array
+        scorer: DLC scorer 名称 / scorer name
+        individuals: 个体名称 / individual names
+        bodyparts: 关键点名称 / bodypart names
+        multi_animal: 是否为多动物表头 / whether the header has an individuals row
+        source_path: 源文件路径 / source file path
+        fields: 最后一维对应的坐标字段 / fields along the last axis
+    """
+
+    values: np.ndarray
+    scorer: str
+    individuals: Tuple[str, ...]
+    bodyparts: Tuple[str, ...]
+    multi_animal: bool
+    source_path: str
+    fields: Tuple[str, ...] = POSE_FIELDS
+
+    @property
+    def n_frames(self) -> int:
+        return int(self.values.shape[0])
+
+    def get(
+        self, bodypart: str, field: str, individual: Optional[str] = None
+    ) -> np.ndarray:
+        """获取单个关键点坐标列
+        Return one (bodypart, field) column for an individual.
+
+        Args:
+            bodypart (str): 关键点名称
+            field (str): 'x', 'y' 或 'likelihood'
+            individual (str, optional): 个体名称, 默认第一个个体
+
+        Returns:
+            np.ndarray: (frames,) 数组视图
+        """
+        ind_idx = 0 if individual is None else self.individuals.index(individual)
+        return self.values[
+            :, ind_idx, self.bodyparts.index(bodypart), self.fields.index(field)
+        ]
+
+    def select(
+        self,
+        individuals: Optional[Sequence[str]] = None,
+        bodyparts: Optional[Sequence[str]] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> "PoseData":
+        """按个体 / 关键点 / 字段投影, 返回连续内存的副本
+        Project onto the requested individuals, bodyparts and fields.
+
+        Args:
+            individuals (Sequence[str], optional): 个体, 默认全部
+            bodyparts (Sequence[str], optional): 关键点, 默认全部
+            fields (Sequence[str], optional): 字段, 默认全部
+
+        Returns:
+            PoseData: 投影后的姿态数据, values 为 C 连续数组
+        """
+        ind_names = _resolve("individual", self.individuals, individuals)
+        bp_names = _resolve("bodypart", self.bodyparts, bodyparts)
+        field_names = _resolve("field", self.fields, fields)
+        ind_idx = [self.individuals.index(name) for name in ind_names]
+        bp_idx = [self.bodyparts.index(name) for name in bp_names]
+        field_idx = [self.fields.index(name) for name in field_names]
+        values = self.values[:, ind_idx][:, :, bp_idx][:, :, :, field_idx]
+        return replace(
+            self,
+            values=np.ascontiguousarray(values, dtype=POSE_DTYPE),
+            individuals=ind_names,
+            bodyparts=bp_names,
+            fields=field_names,
+        )
+
+    def coords(
+        self, bodyparts: Sequence[str], individual: Optional[str] = None
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """以 analyze_* 使用的 {bodypart: {field: array}} 结构返回坐标
+        Return coordinates in the {bodypart: {field: array}} layout used by analyze_*.
+        """
+        return {
+            bp: {
+                field: np.array(self.get(bp, field, individual))
+                for field in self.fields
+            }
+            for bp in bodyparts
+        }
+
+    def to_frame(self, include_scorer: bool = True) -> pd.DataFrame:
+        """还原为与 DLC 表头一致的 MultiIndex DataFrame
+        Rebuild a DataFrame whose columns mirror the DLC header rows.
+
+        Args:
+            include_scorer (bool): 是否保留 scorer 层; 单动物文件去掉 scorer 后
+                等价于 pd.read_csv(header=[1, 2]) 的列结构
+
+        Returns:
+            pd.DataFrame: 可写的 float64 数据副本
+        """
+        tuples: List[Tuple[str, ...]] = []
+        for individual in self.individuals:
+            for bodypart in self.bodyparts:
+                for field in self.fields:
+                    key: Tuple[str, ...] = (bodypart, field)
+                    if self.multi_animal:
+                        key = (individual,) + key
+                    if include_scorer:
+                        key = (self.scorer,) + key
+                    tuples.append(key)
+        names = ["bodyparts", "coords"]
+        if self.multi_animal:
+            names.insert(0, "individuals")
+        if include_scorer:
+            names.insert(0, "scorer")
+        columns = pd.MultiIndex.from_tuples(tuples, names=names)
+        data = np.array(self.values.reshape(self.n_frames, -1), dtype=POSE_DTYPE)
+        return pd.DataFrame(data, columns=columns)
+
+
+def load_pose(
+    path: str,
+    individuals: Optional[Sequence[str]] = None,
+    bodyparts: Optional[Sequence[str]] = None,
+    fields: Optional[Sequence[str]] = None,
+    use_cache: bool = True,
+    cache_dir: Optional[str] = None,
+    schema: Optional[PoseSchema] = None,
+    chunk_rows: Optional[int] = None,
+) -> PoseData:
+    """加载 DLC 姿态文件 (CSV 或 H5), 优先使用内存映射缓存
+    Load a DLC pose file (CSV or H5), going through the memory-mapped cache.
+
+    指定 individuals / bodyparts / fields 时只返回对应的列; 不使用缓存时
+    CSV 只解析这些列。
+    When a projection is given only those columns are returned; without the
+    cache only those CSV columns are parsed.
+
+    Args:
+        path (str): DLC 输出文件路径
+        individuals (Sequence[str], optional): 需要的个体
+        bodyparts (Sequence[str], optional): 需要的关键点
+        fields (Sequence[str], optional): 需要的字段 ('x', 'y', 'likelihood')
+        use_cache (bool): 是否读写缓存
+        cache_dir (str, optional): 缓存目录, 默认为源文件旁的 .pose_cache
+        schema (PoseSchema, optional): 已由 sniff_pose_schema 读取的表头,
+            传入后不再重复读取表头
+        chunk_rows (int, optional): 建立缓存时按该行数分块解析并直接写入
+            内存映射文件, 使超长录像的内存占用有界; 返回的数据不做投影时
+            仍为内存映射数组
+
+    Returns:
+        PoseData: 姿态数据
+
+    Raises:
+        ValueError: 文件不是 DLC 格式
+        KeyError: 投影名称不存在
+    """
+    projected = not (individuals is None and bodyparts is None and fields is None)
+    if not use_cache:
+        return _parse_pose_file(path, schema, individuals, bodyparts, fields)
+
+    cache_base = _cache_base(path, cache_dir)
+    pose = _read_cache(cache_base)
+    if pose is None and chunk_rows is not None:
+        pose = _write_cache_chunked(cache_base, path, schema, chunk_rows)
+    if pose is None:
+        pose = _parse_pose_file(path, schema)
+        try:
+            pose = _write_cache(cache_base, pose)
+        except OSError:
+            # 缓存目录不可写时直接使用内存数据
+            pass
+    return pose.select(individuals, bodyparts, fields) if projected else pose
+
+
+def sniff_pose_schema(path: str) -> PoseSchema:
+    """只读取表头, 解析 DLC 输出的结构
+    Read only the header of a DLC output file and describe its layout.
+
+    CSV 只读取前几行; H5 只读取列索引, 不加载数据。
+    For CSV only the first few lines are read; for H5 only the column index.
+
+    Args:
+        path (str): DLC 输出文件路径 (.csv 或 .h5)
+
+    Returns:
+        PoseSchema: 表头结构
+
+    Raises:
+        ValueError: 文件不是 DLC 格式
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".h5", ".hdf5"):
+        return _sniff_h5(path)
+    return _sniff_csv(path)
+
+
+def get_pose_schema(path: str) -> PoseSchema:
+    """带缓存的 sniff_pose_schema, 以路径 + 大小 + 修改时间为键
+    Cached sniff_pose_schema keyed by path, size and modification time.
+
+    同一进程内 (如 Streamlit 重新运行) 每个文件的表头只读取一次,
+    文件被重写后自动失效。
+    Each file header is read once per process and re-read after the file changes.
+
+    Args:
+        path (str): DLC 输出文件路径
+
+    Returns:
+        PoseSchema: 表头结构
+
+    Raises:
+        ValueError: 文件不是 DLC 格式
+    """
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+    return _cached_schema(abs_path, stat.st_size, stat.st_mtime_ns)
+
+
+def resolve_pose_file(base_path: str) -> Optional[str]:
+    """按扩展名优先级查找 DLC 输出 (.h5 优先, 回退 .csv)
+    Resolve a DLC output path without extension, preferring .h5 over .csv.
+
+    Args:
+        base_path (str): 不含扩展名的输出路径, 如 video + scorer
+
+    Returns:
+        Optional[str]: 存在的文件路径, 找不到时为 None
+    """
+    for ext in POSE_EXTENSIONS:
+        if os.path.exists(base_path + ext):
+            return base_path + ext
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _cached_schema(abs_path: str, size: int, mtime_ns: int) -> PoseSchema:
+    return sniff_pose_schema(abs_path)
+
+
+def _cache_base(path: str, cache_dir: Optional[str]) -> str:
+    """根据路径 + 大小 + 修改时间生成缓存文件前缀"""
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+    key = f"{abs_path}|{stat.st_size}|{stat.st_mtime_ns}|v{POSE_CACHE_VERSION}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    directory = cache_dir or os.path.join(os.path.dirname(abs_path), POSE_CACHE_DIRNAME)
+    # 前缀保留扩展名, 同名的 .h5 与 .csv 各自缓存, 互不清理
+    return os.path.join(directory, f"{os.path.basename(abs_path)}-{digest}")
+
+
+def _read_cache(cache_base: str) -> Optional[PoseData]:
+    meta_path = cache_base + ".json"
+    array_path = cache_base + ".npy"
+    if not (os.path.exists(meta_path) and os.path.exists(array_path)):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+        values = np.load(array_path, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    return PoseData(
+        values=values,
+        scorer=meta["scorer"],
+        individuals=tuple(meta["individuals"]),
+        bodyparts=tuple(meta["bodyparts"]),
+        multi_animal=bool(meta["multi_animal"]),
+        source_path=meta["source_path"],
+    )
+
+
+def _prepare_cache_dir(cache_base: str) -> None:
+    directory = os.path.dirname(cache_base)
+    os.makedirs(directory, exist_ok=True)
+
+    # 清理同一源文件 (含扩展名) 的旧缓存
+    source_name, digest = os.path.basename(cache_base).rsplit("-", 1)
+    for name in os.listdir(directory):
+        cached_name, _, rest = name.rpartition("-")
+        if cached_name == source_name and not rest.startswith(digest):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _write_cache(cache_base: str, pose: PoseData) -> PoseData:
+    _prepare_cache_dir(cache_base)
+    tmp_array = cache_base + ".tmp.npy"
+    mm = np.lib.format.open_memmap(
+        tmp_array, mode="w+", dtype=POSE_DTYPE, shape=pose.values.shape
+    )
+    mm[...] = pose.values
+    mm.flush()
+    del mm
+    os.replace(tmp_array, cache_base + ".npy")
+    _write_cache_meta(cache_base, pose)
+
+    cached = _read_cache(cache_base)
+    return cached if cached is not None else pose
+
+
+def _write_cache_chunked(
+    cache_base: str, path: str, schema: Optional[PoseSchema], chunk_rows: int
+) -> Optional[PoseData]:
+    """分块解析源文件并写入内存映射缓存, 失败时返回 None 回退到整体解析"""
+    if schema is None:
+        schema = get_pose_schema(path)
+    ind_names, bp_names, field_names = schema.resolve()
+    positions = [j for j, key in enumerate(schema.columns) if key[2] in POSE_FIELDS]
+    keys = [schema.columns[j] for j in positions]
+    ind_idx = np.array([ind_names.index(key[0]) for key in keys], dtype=np.intp)
+    bp_idx = np.array([bp_names.index(key[1]) for key in keys], dtype=np.intp)
+    field_idx = np.array([field_names.index(key[2]) for key in keys], dtype=np.intp)
+
+    tmp_array = cache_base + ".tmp.npy"
+    try:
+        n_frames = _count_rows(path, schema)
+        _prepare_cache_dir(cache_base)
+        mm = np.lib.format.open_memmap(
+            tmp_array,
+            mode="w+",
+            dtype=POSE_DTYPE,
+            shape=(n_frames, len(ind_names), len(bp_names), len(field_names)),
+        )
+        mm[...] = np.nan
+        written = 0
+        for block in _iter_row_blocks(path, schema, positions, chunk_rows):
+            stop = written + len(block)
+            if stop > n_frames:
+                raise ValueError("行数与预计不符 / Unexpected row count")
+            mm[written:stop, ind_idx, bp_idx, field_idx] = block
+            written = stop
+        if written != n_frames:
+            raise ValueError("行数与预计不符 / Unexpected row count")
+        mm.flush()
+        del mm
+        os.replace(tmp_array, cache_base + ".npy")
+    except (OSError, ValueError):
+        if os.path.exists(tmp_array):
+            os.remove(tmp_array)
+        return None
+
+    pose = PoseData(
+        values=np.empty((0, len(ind_names), len(bp_names), len(field_names))),
+        scorer=schema.scorer,
+        individuals=ind_names,
+        bodyparts=bp_names,
+        multi_animal=schema.multi_animal,
+        source_path=path,
+    )
+    _write_cache_meta(cache_base, pose)
+    return _read_cache(cache_base)
+
+
+def _count_rows(path: str, schema: PoseSchema) -> int:
+    """不解析数据, 统计数据行数"""
+    if schema.header_rows == 0:
+        with pd.HDFStore(path, mode="r") as store:
+            key = _H5_KEY if "/" + _H5_KEY in store.keys() else store.keys()[0]
+            storer = store.get_storer(key)
+            if getattr(storer, "nrows", None) is not None:
+                return int(storer.nrows)
+            return int(store.get_node(f"{key}/axis1").shape[0])
+
+    n_lines = 0
+    last = b"\n"
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            n_lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        n_lines += 1
+    return n_lines - schema.header_rows
+
+
+def _iter_row_blocks(
+    path: str, schema: PoseSchema, positions: List[int], chunk_rows: int
+) -> Iterator[np.ndarray]:
+    if schema.header_rows == 0:
+        n_rows = _count_rows(path, schema)
+        for start in range(0, n_rows, chunk_rows):
+            df = _read_h5(path, start=start, stop=min(start + chunk_rows, n_rows))
+            yield df.iloc[:, positions].to_numpy(dtype=POSE_DTYPE)
+        return
+    reader = pd.read_csv(
+        path,
+        skiprows=schema.header_rows,
+        header=None,
+        usecols=[j + 1 for j in positions],
+        dtype=POSE_DTYPE,
+        engine="c",
+        chunksize=chunk_rows,
+    )
+    with reader:
+        for df in reader:
+            yield df.to_numpy(dtype=POSE_DTYPE)
+
+
+def _write_cache_meta(cache_base: str, pose: PoseData) -> None:
+    meta = {
+        "scorer": pose.scorer,
+        "individuals": list(pose.individuals),
+        "bodyparts": list(pose.bodyparts),
+        "multi_animal": pose.multi_animal,
+        "source_path": pose.source_path,
+    }
+    tmp_meta = cache_base + ".tmp.json"
+    with open(tmp_meta, "w", encoding="utf-8") as handle:
+        json.dump(meta, handle, ensure_ascii=False)
+    os.replace(tmp_meta, cache_base + ".json")
+
+
+def _resolve(
+    kind: str, available: Tuple[str, ...], requested: Optional[Sequence[str]]
+) -> Tuple[str, ...]:
+    """校验投影名称, None 表示全部"""
+    if requested is None:
+        return available
+    if isinstance(requested, str):
+        requested = [requested]
+    missing = [name for name in requested if name not in available]
+    if missing:
+        raise KeyError(
+            f"未找到{kind} / Unknown {kind}: {missing}; 可用 / available: "
+            f"{list(available)}"
+        )
+    return tuple(requested)
+
+
+def _parse_pose_file(
+    path: str,
+    schema: Optional[PoseSchema] = None,
+    individuals: Optional[Sequence[str]] = None,
+    bodyparts: Optional[Sequence[str]] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> PoseData:
+    if schema is None:
+        schema = get_pose_schema(path)
+    ind_names, bp_names, field_names = schema.resolve(individuals, bodyparts, fields)
+    # 只解析需要的列
+    positions = [
+        j
+        for j, key in enumerate(schema.columns)
+        if key[0] in ind_names and key[1] in bp_names and key[2] in field_names
+    ]
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".h5", ".hdf5"):
+        data = _read_h5(path).iloc[:, positions].to_numpy(dtype=POSE_DTYPE)
+    else:
+        data = pd.read_csv(
+            path,
+            skiprows=schema.header_rows,
+            header=None,
+            usecols=[j + 1 for j in positions],
+            dtype=POSE_DTYPE,
+            engine="c",
+        ).to_numpy(dtype=POSE_DTYPE)
+    return _assemble(
+        data,
+        [schema.columns[j] for j in positions],
+        scorer=schema.scorer,
+        multi_animal=schema.multi_animal,
+        source_path=path,
+        individuals=ind_names,
+        bodyparts=bp_names,
+        fields=field_names,
+    )
+
+
+def _sniff_csv(path: str) -> PoseSchema:
+    header_rows: Dict[str, List[str]] = {}
+    n_header = 0
+    with open(path, "r", encoding="utf-8", newline="") as handle:
+        reader = csv.reader(handle)
+        for row in itertools.islice(reader, len(_HEADER_LABELS) + 1):
+            if not row or row[0] not in _HEADER_LABELS:
+                break
+            header_rows[row[0]] = row
+            n_header += 1
+    if "bodyparts" not in header_rows or "coords" not in header_rows:
+        raise ValueError(
+            f"不是标准的DLC格式CSV文件 / Not a DLC format CSV file: {path}"
+        )
+
+    multi_animal = "individuals" in header_rows
+    n_columns = len(header_rows["coords"])
+    columns = tuple(
+        (
+            header_rows["individuals"][j] if multi_animal else SINGLE_ANIMAL,
+            header_rows["bodyparts"][j],
+            header_rows["coords"][j],
+        )
+        for j in range(1, n_columns)
+    )
+    scorer = header_rows["scorer"][1] if "scorer" in header_rows else ""
+    return PoseSchema(
+        source_path=path,
+        scorer=scorer,
+        multi_animal=multi_animal,
+        header_rows=n_header,
+        columns=columns,
+    )
+
+
+def _read_h5(path: str, **kwargs) -> pd.DataFrame:
+    try:
+        return pd.read_hdf(path, key=_H5_KEY, **kwargs)
+    except KeyError:
+        return pd.read_hdf(path, **kwargs)
+
+
+def _sniff_h5(path: str) -> PoseSchema:
+    df = _read_h5(path, stop=0)
+    if not isinstance(df, pd.DataFrame) or not isinstance(df.columns, pd.MultiIndex):
+        raise ValueError(f"不是标准的DLC格式H5文件 / Not a DLC format H5 file: {path}")
+    names = list(df.columns.names)
+    if "bodyparts" not in names or "coords" not in names:
+        raise ValueError(f"不是标准的DLC格式H5文件 / Not a DLC format H5 file: {path}")
+    multi_animal = "individuals" in names
+    individuals = (
+        df.columns.get_level_values("individuals")
+        if multi_animal
+        else [SINGLE_ANIMAL] * len(df.columns)
+    )
+    columns = tuple(
+        zip(
+            individuals,
+            df.columns.get_level_values("bodyparts"),
+            df.columns.get_level_values("coords"),
+        )
+    )
+    scorer = df.columns.get_level_values("scorer")[0] if "scorer" in names else ""
+    return PoseSchema(
+        source_path=path,
+        scorer=str(scorer),
+        multi_animal=multi_animal,
+        header_rows=0,
+        columns=tuple((str(i), str(b), str(f)) for i, b, f in columns),
+    )
+
+
+def _assemble(
+    data: np.ndarray,
+    column_keys: List[ColumnKey],
+    scorer: str,
+    multi_animal: bool,
+    source_path: str,
+    individuals: Sequence[str],
+    bodyparts: Sequence[str],
+    fields: Sequence[str] = POSE_FIELDS,
+) -> PoseData:
+    """把扁平列按 (individual, bodypart, field) 写入四维数组"""
+    individuals, bodyparts, fields = list(individuals), list(bodyparts), list(fields)
+    ind_idx = np.array(
+        [individuals.index(key[0]) for key in column_keys], dtype=np.intp
+    )
+    bp_idx = np.array([bodyparts.index(key[1]) for key in column_keys], dtype=np.intp)
+    field_idx = np.array([fields.index(key[2]) for key in column_keys], dtype=np.intp)
+
+    values = np.full(
+        (data.shape[0], len(individuals), len(bodyparts), len(fields)),
+        np.nan,
+        dtype=POSE_DTYPE,
+    )
+    values[:, ind_idx, bp_idx, field_idx] = data
+    return PoseData(
+        values=values,
+        scorer=scorer,
+        individuals=tuple(individuals),
+        bodyparts=tuple(bodyparts),
+        multi_animal=multi_animal,
+        source_path=source_path,
+        fields=tuple(fields),
+    )
@@ -0,0 +1,211 @@
+"""计算层的进度与诊断事件
+Progress and diagnostic events emitted by the compute layer.
+
+分析模块不直接调用 Streamlit, 而是通过 report 发出结构化事件 (ReportEvent),
+由当前的 Reporter 分发给订阅者: 默认写入 logging, 可在工作进程、命令行和测试中
+运行; Streamlit 页面用 use_reporter(StreamlitReporter()) 订阅并渲染这些事件。
+批量处理的循环用 report.progress(done, total) 报告进度, 在页面上显示为进度条。
+
+Example:
+    >>> from src.core.processing.reporting import StreamlitReporter, use_reporter
+    >>> with use_reporter(StreamlitReporter()):
+    ...     process_grooming_files(folder_path)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 文字消息的级别, 与 st.write / st.info / ... 一一对应
+MESSAGE_KINDS = ("write", "info", "success", "warning", "error")
+
+_LOG_LEVELS = {
+    "write": logging.INFO,
+    "info": logging.INFO,
+    "success": logging.INFO,
+    "heading": logging.INFO,
+    "progress": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+# images 事件中的一张图: (路径, 标题, 图片不存在时的提示或 None)
+ImageItem = Tuple[str, str, Optional[str]]
+
+
+@dataclass(frozen=True)
+class ReportEvent:
+    """一条进度或诊断事件
+    One progress or diagnostic event.
+
+    Attributes:
+        kind: MESSAGE_KINDS 之一, 或 "heading" / "table" / "images" / "progress"
+        message: 文字内容 / text
+        data: 附带的结构化数据, 如 write 的原始对象、table 的 DataFrame、
+            images 的分栏图片列表、progress 的 done / total / structured payload
+    """
+
+    kind: str
+    message: str = ""
+    data: Mapping[str, Any] = field(default_factory=dict)
+
+
+Sink = Callable[[ReportEvent], None]
+
+
+class Reporter:
+    """把事件分发给订阅者
+    Dispatch events to subscribed sinks.
+
+    Args:
+        sinks (Sequence[Sink]): 初始订阅者, 每个都是接收 ReportEvent 的可调用对象
+    """
+
+    def __init__(self, sinks: Sequence[Sink] = ()):
+        self.sinks: List[Sink] = list(sinks)
+
+    def subscribe(self, sink: Sink) -> Sink:
+        """添加订阅者 / Add a sink."""
+        self.sinks.append(sink)
+        return sink
+
+    def emit(self, event: ReportEvent) -> None:
+        for sink in self.sinks:
+            sink(event)
+
+    def write(self, *objects: Any) -> None:
+        """任意对象 (与 st.write 相同的参数) / Arbitrary objects, like ``st.write``."""
+        self.emit(ReportEvent("write", " ".join(str(o) for o in objects), {"objects": objects}))
+
+    def info(self, message: str) -> None:
+        self.emit(ReportEvent("info", message))
+
+    def success(self, message: str) -> None:
+        self.emit(ReportEvent("success", message))
+
+    def warning(self, message: str) -> None:
+        self.emit(ReportEvent("warning", message))
+
+    def error(self, message: str) -> None:
+        self.emit(ReportEvent("error", message))
+
+    def heading(self, message: str) -> None:
+        """小节标题 / Section heading."""
+        self.emit(ReportEvent("heading", message))
+
+    def table(self, frame: Any, message: str = "") -> None:
+        """结果表 / A result table (DataFrame)."""
+        self.emit(ReportEvent("table", message, {"frame": frame}))
+
+    def images(self, columns: Sequence[Sequence[ImageItem]]) -> None:
+        """分栏显示的图片, 每栏为 (路径, 标题, 缺失提示) 列表
+        Images laid out in columns; each item is ``(path, caption, missing_message)``.
+        """
+        self.emit(ReportEvent("images", data={"columns": [list(c) for c in columns]}))
+
+    def progress(self, done: int, total: int, message: str = "") -> None:
+        """批量处理进度, done 为已完成的数量 (0 表示开始)
+        Batch progress: ``done`` of ``total`` items finished (0 starts a new bar).
+        """
+        self.emit(ReportEvent("progress", message, {"done": done, "total": total}))
+
+
+def log_sink(event: ReportEvent) -> None:
+    """写入 logging (默认订阅者) / Forward events to ``logging``."""
+    if event.kind == "table":
+        logger.info("%s\n%s", event.message, event.data["frame"])
+    elif event.kind == "images":
+        for column in event.data["columns"]:
+            for path, caption, _ in column:
+                logger.info("%s: %s", caption, path)
+    elif event.kind == "progress":
+        logger.info("%s (%d/%d)", event.message, event.data["done"], event.data["total"])
+    else:
+        logger.log(_LOG_LEVELS.get(event.kind, logging.INFO), event.message)
+
+
+# streamlit_sink 当前正在更新的进度条
+_progress_bar: ContextVar[Optional[Any]] = ContextVar("progress_bar", default=None)
+
+
+def streamlit_sink(event: ReportEvent) -> None:
+    """在当前 Streamlit 页面上渲染事件 / Render an event on the current Streamlit page."""
+    import streamlit as st
+
+    if event.kind == "write":
+        st.write(*event.data.get("objects", (event.message,)))
+    elif event.kind in MESSAGE_KINDS:
+        getattr(st, event.kind)(event.message)
+    elif event.kind == "heading":
+        st.subheader(event.message)
+    elif event.kind == "table":
+        st.dataframe(event.data["frame"])
+    elif event.kind == "images":
+        columns = event.data["columns"]
+        for container, items in zip(st.columns(len(columns)), columns):
+            with container:
+                for path, caption, missing in items:
+                    if os.path.exists(path):
+                        st.image(path, caption=caption)
+                    elif missing:
+                        st.info(missing)
+    elif event.kind == "progress":
+        done, total = event.data["done"], event.data["total"]
+        fraction = min(done / total, 1.0) if total else 1.0
+        text = f"{event.message} ({done}/{total})" if event.message else f"{done}/{total}"
+        bar = _progress_bar.get()
+        # done 为 0 时开始新的一组进度, 否则更新当前进度条; 完成后不再复用
+        if bar is None or done == 0:
+            bar = st.progress(fraction, text=text)
+        else:
+            bar.progress(fraction, text=text)
+        _progress_bar.set(None if done >= total else bar)
+
+
+class StreamlitReporter(Reporter):
+    """渲染到 Streamlit 页面的 Reporter, 同时写入 logging
+    A reporter that renders on the Streamlit page and also logs.
+    """
+
+    def __init__(self, sinks: Sequence[Sink] = ()):
+        super().__init__([streamlit_sink, log_sink, *sinks])
+
+
+_current: ContextVar[Optional[Reporter]] = ContextVar("reporter", default=None)
+
+
+def get_reporter() -> Reporter:
+    """当前上下文的 Reporter / The reporter active in this context.
+
+    没有 use_reporter 时每次返回一个新的只写 logging 的 Reporter, 对它 subscribe
+    不会影响其他调用方。
+    """
+    reporter = _current.get()
+    return reporter if reporter is not None else Reporter([log_sink])
+
+
+@contextmanager
+def use_reporter(reporter: Reporter) -> Iterator[Reporter]:
+    """在 with 块内把事件发给 reporter / Route events to ``reporter`` inside the block."""
+    token = _current.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current.reset(token)
+
+
+class _CurrentReporter:
+    """转发到 get_reporter() 的代理, 供各分析模块以 report.info(...) 的形式调用"""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_reporter(), name)
+
+
+report = _CurrentReporter()
@@ -0,0 +1,249 @@
+"""多只动物的成对社交几何量
+Pairwise social geometry for N animals.
+
+每只动物用嘴部位置和两耳中点表示, 所有成对的嘴部距离和朝向角一次广播算出,
+形状为 (frames, N, N); 两只小鼠的分析只是 N = 2 的特例。群养笼中个体较多时,
+neighbor_geometry 用 neighbor_pairs 的 "kdtree" 模式只取半径内的成对帧,
+只为这些个体对计算距离和朝向角, 不展开 N x N 数组。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Mapping, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# neighbor_pairs 可用的查找方式
+NEIGHBOR_METHODS = ("dense", "kdtree")
+
+
+@dataclass(frozen=True)
+class SocialGeometry:
+    """成对几何量
+    Pairwise geometry for one recording.
+
+    Attributes:
+        individuals: 个体名称, 决定第二、三维的顺序 / individual names
+        distance: (frames, N, N) 嘴部之间的距离, 对角线为 NaN / mouth-to-mouth distance
+        facing: (frames, N, N) facing[f, i, j] 为 i 的朝向 (两耳中点指向嘴部) 与
+            i 指向 j (两耳中点之间) 的夹角, 单位为度, 对角线为 NaN
+    """
+
+    individuals: Tuple[str, ...]
+    distance: np.ndarray
+    facing: np.ndarray
+
+    def pair(self, first: str, second: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """一对个体的 (距离, first 的朝向角, second 的朝向角)
+        Distance and both facing angles for one pair.
+        """
+        i, j = self.individuals.index(first), self.individuals.index(second)
+        return self.distance[:, i, j], self.facing[:, i, j], self.facing[:, j, i]
+
+
+@dataclass(frozen=True)
+class NeighborGeometry:
+    """半径内个体对的几何量 (稀疏)
+    Geometry of the pairs closer than a radius, one entry per (frame, i, j).
+
+    Attributes:
+        individuals: 个体名称 / individual names
+        frame, i, j: 按 (frame, i, j) 排序的索引, 其中 i < j
+        distance: 嘴部之间的距离 / mouth-to-mouth distance
+        facing_ij: i 朝向 j 的夹角 (度), 与 SocialGeometry.facing[frame, i, j] 相同
+        facing_ji: j 朝向 i 的夹角 (度)
+    """
+
+    individuals: Tuple[str, ...]
+    frame: np.ndarray
+    i: np.ndarray
+    j: np.ndarray
+    distance: np.ndarray
+    facing_ij: np.ndarray
+    facing_ji: np.ndarray
+
+
+def stack_individuals(
+    coords: Mapping[str, Mapping[str, np.ndarray]],
+    individuals: Sequence[str],
+    bodypart: str,
+    field: str,
+) -> np.ndarray:
+    """把 {个体_关键点: {字段: 数组}} 中同一关键点的各个体排成 (frames, N)
+    Stack one bodypart field of every individual into a (frames, N) array.
+    """
+    return np.stack([np.asarray(coords[f"{ind}_{bodypart}"][field]) for ind in individuals], axis=1)
+
+
+def vector_angle(v1x, v1y, v2x, v2y) -> np.ndarray:
+    """两个向量的夹角 (度), 支持广播 / Angle between two vectors in degrees, broadcasting."""
+    dot = v1x * v2x + v1y * v2y
+    mag1 = np.sqrt(v1x**2 + v1y**2)
+    mag2 = np.sqrt(v2x**2 + v2y**2)
+    cos_angle = np.clip(dot / (mag1 * mag2 + 1e-8), -1.0, 1.0)
+    return np.degrees(np.arccos(cos_angle))
+
+
+def pairwise_distance(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """(frames, N) 坐标的成对距离 (frames, N, N), 对角线为 NaN
+    Pairwise distances of (frames, N) points.
+    """
+    distance = np.sqrt(
+        np.square(x[:, :, None] - x[:, None, :]) + np.square(y[:, :, None] - y[:, None, :])
+    )
+    _fill_diagonal(distance)
+    return distance
+
+
+def pairwise_facing(
+    mouth_x: np.ndarray, mouth_y: np.ndarray, ear_x: np.ndarray, ear_y: np.ndarray
+) -> np.ndarray:
+    """成对朝向角 (frames, N, N), 参数均为 (frames, N), ear_* 为两耳中点
+    Pairwise facing angles from mouth and ear-centre positions.
+    """
+    heading_x = (mouth_x - ear_x)[:, :, None]
+    heading_y = (mouth_y - ear_y)[:, :, None]
+    conn_x = ear_x[:, None, :] - ear_x[:, :, None]
+    conn_y = ear_y[:, None, :] - ear_y[:, :, None]
+    facing = vector_angle(heading_x, heading_y, conn_x, conn_y)
+    _fill_diagonal(facing)
+    return facing
+
+
+def social_geometry(
+    coords: Mapping[str, Mapping[str, np.ndarray]],
+    individuals: Sequence[str],
+    mouth: str = "Mouth",
+    ears: Tuple[str, str] = ("right-ear", "left-ear"),
+) -> SocialGeometry:
+    """由 {个体_关键点: {x, y, ...}} 坐标计算全部成对距离和朝向角
+    Compute every pairwise distance and facing angle for ``individuals``.
+
+    Args:
+        coords: analyze_social_behavior 使用的坐标字典
+        individuals (Sequence[str]): 个体名称
+        mouth (str): 嘴部关键点
+        ears (Tuple[str, str]): 两耳关键点
+
+    Returns:
+        SocialGeometry: (frames, N, N) 距离和朝向角
+    """
+    mouth_x, mouth_y, ear_x, ear_y = _head_points(coords, individuals, mouth, ears)
+    return SocialGeometry(
+        individuals=tuple(individuals),
+        distance=pairwise_distance(mouth_x, mouth_y),
+        facing=pairwise_facing(mouth_x, mouth_y, ear_x, ear_y),
+    )
+
+
+def neighbor_geometry(
+    coords: Mapping[str, Mapping[str, np.ndarray]],
+    individuals: Sequence[str],
+    radius: float,
+    mouth: str = "Mouth",
+    ears: Tuple[str, str] = ("right-ear", "left-ear"),
+) -> NeighborGeometry:
+    """只计算嘴部距离小于 radius 的个体对的距离和朝向角
+    Distance and facing angles for the pairs whose mouths are closer than ``radius``.
+
+    用 neighbor_pairs(..., method="kdtree") 查找近邻对, 内存和计算量与近邻对数成正比;
+    结果与 social_geometry 在这些位置上的取值完全相同。
+    """
+    mouth_x, mouth_y, ear_x, ear_y = _head_points(coords, individuals, mouth, ears)
+    frame, i, j = neighbor_pairs(mouth_x, mouth_y, radius, method="kdtree")
+    distance = np.sqrt(
+        np.square(mouth_x[frame, i] - mouth_x[frame, j])
+        + np.square(mouth_y[frame, i] - mouth_y[frame, j])
+    )
+
+    def facing(a, b):
+        return vector_angle(
+            mouth_x[frame, a] - ear_x[frame, a],
+            mouth_y[frame, a] - ear_y[frame, a],
+            ear_x[frame, b] - ear_x[frame, a],
+            ear_y[frame, b] - ear_y[frame, a],
+        )
+
+    return NeighborGeometry(
+        individuals=tuple(individuals),
+        frame=frame,
+        i=i,
+        j=j,
+        distance=distance,
+        facing_ij=facing(i, j),
+        facing_ji=facing(j, i),
+    )
+
+
+def neighbor_pairs(
+    x: np.ndarray, y: np.ndarray, radius: float, method: str = "dense"
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """每帧内距离小于 radius 的个体对
+    Pairs of individuals closer than ``radius`` within the same frame.
+
+    "dense" 展开 (frames, N, N) 距离数组; "kdtree" 把各帧的点沿帧号错开
+    (间隔大于 radius) 后建一棵 KD 树, 只查询半径内的点对, 适合个体较多的情况。
+    含 NaN 的点不参与配对。
+
+    Args:
+        x (np.ndarray): (frames, N) 坐标
+        y (np.ndarray): (frames, N) 坐标
+        radius (float): 距离阈值 (不含)
+        method (str): "dense" 或 "kdtree"
+
+    Returns:
+        (frame, i, j): 按 (frame, i, j) 排序的索引数组, 其中 i < j
+    """
+    if method not in NEIGHBOR_METHODS:
+        raise ValueError(f"未知的查找方式 / Unknown neighbor method: {method}")
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n_frames, n_individuals = x.shape
+    if method == "dense":
+        close = pairwise_distance(x, y) < radius
+        close &= np.triu(np.ones((n_individuals, n_individuals), dtype=bool), k=1)
+        return np.nonzero(close)
+
+    frame, individual = np.nonzero(~(np.isnan(x) | np.isnan(y)))
+    if not len(frame):
+        return (np.empty(0, dtype=np.intp),) * 3
+    # 帧间距离至少为 spacing > radius, 不会跨帧配对; 同一帧内的三维距离即平面距离
+    spacing = 2.0 * radius + 1.0
+    points = np.column_stack((frame * spacing, x[frame, individual], y[frame, individual]))
+    pairs = cKDTree(points).query_pairs(radius, output_type="ndarray")
+    if not len(pairs):
+        return (np.empty(0, dtype=np.intp),) * 3
+    a, b = pairs[:, 0], pairs[:, 1]
+    distance = np.sqrt(
+        np.square(points[a, 1] - points[b, 1]) + np.square(points[a, 2] - points[b, 2])
+    )
+    # query_pairs 包含距离恰为 radius 的点对, 与 dense 的严格小于保持一致
+    keep = distance < radius
+    a, b = a[keep], b[keep]
+    i = np.minimum(individual[a], individual[b])
+    j = np.maximum(individual[a], individual[b])
+    order = np.lexsort((j, i, frame[a]))
+    return frame[a][order], i[order], j[order]
+
+
+def _head_points(coords, individuals, mouth, ears):
+    """各个体的嘴部和两耳中点坐标, 均为 (frames, N)"""
+    mouth_x = stack_individuals(coords, individuals, mouth, "x")
+    mouth_y = stack_individuals(coords, individuals, mouth, "y")
+    ear_x = (
+        stack_individuals(coords, individuals, ears[0], "x")
+        + stack_individuals(coords, individuals, ears[1], "x")
+    ) / 2.0
+    ear_y = (
+        stack_individuals(coords, individuals, ears[0], "y")
+        + stack_individuals(coords, individuals, ears[1], "y")
+    ) / 2.0
+    return mouth_x, mouth_y, ear_x, ear_y
+
+
+def _fill_diagonal(pairwise: np.ndarray) -> None:
+    """(frames, N, N) 数组的对角线置为 NaN"""
+    n = pairwise.shape[1]
+    pairwise[:, np.arange(n), np.arange(n)] = np.nan
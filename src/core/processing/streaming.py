@@ -0,0 +1,218 @@
+"""长录像的分块流式分析工具
+Helpers for chunked, bounded-memory analysis of long recordings.
+
+按固定帧数切块处理, 每块在两侧带有光环 (halo) 帧, 以保证窗口类运算
+(多数表决平滑、Savitzky-Golay、段合并的前瞻间隔) 与整段处理结果一致。
+逐帧输出写入磁盘上的内存映射数组, 内存占用与录像长度无关。
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 默认每块帧数 (30 fps 约 55 分钟, 120 fps 约 14 分钟)
+DEFAULT_CHUNK_FRAMES = 100_000
+
+
+@dataclass(frozen=True)
+class FrameChunk:
+    """一个数据块: 输出范围 [start, stop), 读取范围 [lo, hi)
+    One chunk: output frames [start, stop) read from the padded range [lo, hi).
+    """
+
+    start: int
+    stop: int
+    lo: int
+    hi: int
+
+    @property
+    def core(self) -> slice:
+        """输出范围在读取范围内的位置"""
+        return slice(self.start - self.lo, self.stop - self.lo)
+
+
+def iter_frame_chunks(
+    n_frames: int, chunk_frames: int, halo_before: int = 0, halo_after: int = 0
+) -> Iterator[FrameChunk]:
+    """按固定帧数切块, 两侧各带光环帧 (在录像边界处截断)
+    Split [0, n_frames) into chunks padded by halo frames, clipped at the ends.
+
+    Args:
+        n_frames (int): 总帧数
+        chunk_frames (int): 每块输出的帧数
+        halo_before (int): 每块之前额外读取的帧数
+        halo_after (int): 每块之后额外读取的帧数
+
+    Yields:
+        FrameChunk: 数据块
+    """
+    if chunk_frames <= 0:
+        raise ValueError(f"chunk_frames 必须为正数 / must be positive: {chunk_frames}")
+    for start in range(0, n_frames, chunk_frames):
+        stop = min(start + chunk_frames, n_frames)
+        yield FrameChunk(
+            start=start,
+            stop=stop,
+            lo=max(0, start - halo_before),
+            hi=min(n_frames, stop + halo_after),
+        )
+
+
+class FrameArrayStore:
+    """逐帧输出的磁盘数组集合
+    A set of per-frame output arrays backed by .npy memory maps.
+
+    Args:
+        directory (str): 存放 .npy 文件的目录
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.arrays: Dict[str, np.memmap] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def create(self, name: str, length: int, dtype=np.float64) -> np.memmap:
+        """创建长度为 length 的内存映射数组"""
+        array = np.lib.format.open_memmap(
+            os.path.join(self.directory, f"{name}.npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=(max(length, 0),),
+        )
+        self.arrays[name] = array
+        return array
+
+    def __getitem__(self, name: str) -> np.memmap:
+        return self.arrays[name]
+
+    def flush(self) -> None:
+        for array in self.arrays.values():
+            array.flush()
+
+
+class ValidIndexCursor:
+    """沿一维序列查找有效值 (非 NaN) 的游标, 用于跨块插值
+    Locate non-NaN samples around a frame range without loading the full series.
+
+    记录当前位置之前最近的若干有效点, 并缓存之后的前瞻结果, 顺序扫描时
+    每帧最多被读取常数次。
+
+    Args:
+        series (np.ndarray): 一维序列, 通常为内存映射数组
+        keep (int): 保留的历史有效点个数
+        block (int): 前瞻时每次读取的帧数
+    """
+
+    def __init__(self, series: np.ndarray, keep: int = 2, block: int = 65536):
+        self.series = series
+        self.keep = keep
+        self.block = block
+        self._before: List[Tuple[int, float]] = []
+        self._scanned_to = 0
+        # _ahead 保存 [_ahead_start, _ahead_end) 内的全部有效点
+        self._ahead: List[Tuple[int, float]] = []
+        self._ahead_start = 0
+        self._ahead_end = 0
+
+    def before(self, lo: int) -> List[Tuple[int, float]]:
+        """lo 之前最近的 keep 个有效点 (需按 lo 递增调用)"""
+        if lo > self._scanned_to:
+            position = self._scanned_to
+            segment = np.asarray(self.series[position:lo])
+            index = np.flatnonzero(~np.isnan(segment))[::-1][: self.keep][::-1]
+            points = [(position + int(i), float(segment[i])) for i in index]
+            self._before = self._before + points
+            del self._before[: -self.keep]
+            self._scanned_to = lo
+        return list(self._before)
+
+    def after(self, hi: int, count: Optional[int] = None) -> List[Tuple[int, float]]:
+        """hi 及之后最近的 count 个有效点 (需按 hi 递增调用)"""
+        count = self.keep if count is None else count
+        if hi < self._ahead_start or hi > self._ahead_end:
+            self._ahead = []
+            self._ahead_end = hi
+        self._ahead = [point for point in self._ahead if point[0] >= hi]
+        self._ahead_start = hi
+        n = len(self.series)
+        while len(self._ahead) < count and self._ahead_end < n:
+            position = self._ahead_end
+            stop = min(position + self.block, n)
+            segment = np.asarray(self.series[position:stop])
+            self._ahead_end = stop
+            for i in np.flatnonzero(~np.isnan(segment)):
+                self._ahead.append((position + int(i), float(segment[i])))
+                if len(self._ahead) == count:
+                    self._ahead_end = position + int(i) + 1
+                    break
+        return self._ahead[:count]
+
+
+def bracket_valid_points(
+    chunk: np.ndarray, lo: int, hi: int, cursor: ValidIndexCursor
+) -> Tuple[np.ndarray, np.ndarray]:
+    """块内有效点及块两侧最近的有效点, 用作插值节点
+    Interpolation knots for frames [lo, hi): the valid samples inside the chunk
+    plus the nearest valid samples on either side, in global frame indices.
+
+    两侧各保留 cursor.keep 个点, 使块内插值 (含线性外推) 选用的区间与整段
+    插值完全一致。
+
+    Args:
+        chunk (np.ndarray): series[lo:hi]
+        lo (int): 块起始帧
+        hi (int): 块结束帧 (不含)
+        cursor (ValidIndexCursor): 同一序列的游标
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (帧索引, 数值)
+    """
+    before = cursor.before(lo)
+    after = cursor.after(hi)
+    inside = np.flatnonzero(~np.isnan(chunk))
+    xp = np.concatenate(
+        [
+            np.array([p[0] for p in before], dtype=np.int64),
+            lo + inside.astype(np.int64),
+            np.array([p[0] for p in after], dtype=np.int64),
+        ]
+    )
+    fp = np.concatenate(
+        [
+            np.array([p[1] for p in before], dtype=np.float64),
+            np.asarray(chunk[inside], dtype=np.float64),
+            np.array([p[1] for p in after], dtype=np.float64),
+        ]
+    )
+    return xp, fp
+
+
+def write_frame_csv(
+    path: str, columns: Dict[str, np.ndarray], chunk_frames: int = DEFAULT_CHUNK_FRAMES
+) -> None:
+    """分块写出逐帧数据 CSV, 输出与一次性 DataFrame.to_csv 相同
+    Write per-frame columns to CSV chunk by chunk, without building the full table.
+
+    Args:
+        path (str): 输出路径
+        columns (Dict[str, np.ndarray]): 列名 -> 等长一维数组 (可为内存映射)
+        chunk_frames (int): 每次写出的行数
+    """
+    n_frames = len(next(iter(columns.values()))) if columns else 0
+    if n_frames == 0:
+        pd.DataFrame({name: [] for name in columns}).to_csv(path, index=False)
+        return
+    for chunk in iter_frame_chunks(n_frames, chunk_frames):
+        block = pd.DataFrame(
+            {
+                name: np.asarray(values[chunk.start : chunk.stop])
+                for name, values in columns.items()
+            }
+        )
+        first = chunk.start == 0
+        block.to_csv(path, index=False, mode="w" if first else "a", header=first)
@@ -0,0 +1,82 @@
+"""参数扫描的公共部分
+Shared helpers for assay parameter sweeps.
+
+各实验的扫描函数 (sweep_social_parameters / sweep_catch_parameters) 只载入和
+计算一次特征, 对每组参数只重做依赖该参数的步骤, 输出每组参数一行的长表;
+这里提供汇总列、数值列表解析和两参数热图。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+# 扫描表中的汇总列 (bout_summary 的输出)
+SUMMARY_COLUMNS = ("n_bouts", "total_duration_s", "mean_duration_s")
+
+
+def bout_summary(durations: np.ndarray, fps: float) -> Dict[str, float]:
+    """一组行为段帧数的汇总: 段数、总时长和平均时长 (秒)
+    Count, total and mean duration in seconds of a set of bouts given in frames.
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    total = float(durations.sum()) / fps
+    return {
+        "n_bouts": int(len(durations)),
+        "total_duration_s": total,
+        "mean_duration_s": total / len(durations) if len(durations) else 0.0,
+    }
+
+
+def parse_sweep_values(text: str) -> List[float]:
+    """解析逗号分隔的数值列表, 如 "0.6, 0.8, 0.95"
+    Parse a comma-separated list of numbers.
+    """
+    values = [item.strip() for item in text.replace("，", ",").split(",")]
+    try:
+        return [float(item) for item in values if item]
+    except ValueError:
+        raise ValueError(f"无法解析数值列表 / Cannot parse values: {text!r}") from None
+
+
+def plot_sweep_heatmap(
+    sweep_df: pd.DataFrame,
+    x: str,
+    y: str,
+    value: str = "n_bouts",
+    ax: Optional[plt.Axes] = None,
+):
+    """扫描表中两个参数对某一汇总列的热图, 其余参数取平均
+    Heatmap of ``value`` over two swept parameters; other parameters are averaged.
+
+    Args:
+        sweep_df (pd.DataFrame): sweep_* 函数返回的扫描表
+        x (str): 横轴参数列
+        y (str): 纵轴参数列
+        value (str): 着色的汇总列, 默认段数
+        ax (plt.Axes, optional): 绘制到已有坐标轴, 默认新建图
+
+    Returns:
+        matplotlib.figure.Figure
+    """
+    table = sweep_df.pivot_table(index=y, columns=x, values=value, aggfunc="mean")
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(1.2 * len(table.columns) + 3, 0.8 * len(table.index) + 2))
+    else:
+        fig = ax.figure
+    image = ax.imshow(table.to_numpy(dtype=float), origin="lower", aspect="auto", cmap="viridis")
+    ax.set_xticks(np.arange(len(table.columns)))
+    ax.set_xticklabels([f"{v:g}" for v in table.columns])
+    ax.set_yticks(np.arange(len(table.index)))
+    ax.set_yticklabels([f"{v:g}" for v in table.index])
+    ax.set_xlabel(x)
+    ax.set_ylabel(y)
+    for (i, j), cell in np.ndenumerate(table.to_numpy(dtype=float)):
+        if not np.isnan(cell):
+            ax.text(j, i, f"{cell:.3g}", ha="center", va="center", color="white", fontsize=8)
+    fig.colorbar(image, ax=ax, label=value)
+    fig.tight_layout()
+    return fig
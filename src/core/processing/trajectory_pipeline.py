@@ -0,0 +1,284 @@
+"""可组合的轨迹清洗流水线
+Composable trajectory cleaning pipeline.
+
+各步骤在同一个预分配的 (frames, bodyparts, 2) 缓冲区上原地执行, 不再
+逐步复制 DataFrame; 每步只用布尔掩码更新有效点计数。流水线可以由
+[{"stage": 名称, 参数...}, ...] 形式的配置声明, 供各实验模块复用。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .trajectory_processing import (
+    extreme_jump_mask,
+    interpolate_missing_array,
+    kalman_smooth_array,
+    smooth_trajectory_array,
+    unreasonable_position_mask,
+    unreasonable_speed_mask,
+)
+
+
+@dataclass(frozen=True)
+class TrajectoryStage:
+    """流水线中的一步
+    One pipeline step: a registered stage name and its keyword parameters.
+    """
+
+    name: str
+    params: Mapping[str, Any] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class StageStats:
+    """单步统计
+    Per-stage bookkeeping.
+
+    Attributes:
+        name: 步骤名称 / stage name
+        dropped: 本步置为 NaN 的有效点数 / valid x samples removed by this stage
+        valid: 本步之后 x 的有效点数 / valid x samples after this stage
+    """
+
+    name: str
+    dropped: int
+    valid: int
+
+
+@dataclass
+class TrajectoryResult:
+    """流水线输出
+    Pipeline output.
+
+    Attributes:
+        xy: (frames, bodyparts, 2) 清洗后的坐标缓冲区 / cleaned coordinate buffer
+        stats: 每步统计 / per-stage statistics
+        squeeze: 输入为一维时, x / y 以一维返回 / whether the input was 1-D
+    """
+
+    xy: np.ndarray
+    stats: List[StageStats]
+    squeeze: bool = False
+
+    @property
+    def x(self) -> np.ndarray:
+        x = self.xy[..., 0]
+        return x[:, 0] if self.squeeze else x
+
+    @property
+    def y(self) -> np.ndarray:
+        y = self.xy[..., 1]
+        return y[:, 0] if self.squeeze else y
+
+
+# catch_pipeline 可选的平滑方式
+SMOOTHERS = ("savgol", "kalman")
+
+# 过滤步骤返回需要置为 NaN 的 (frames, bodyparts) 掩码; 变换步骤原地修改缓冲区并返回 None
+StageFunc = Callable[..., Optional[np.ndarray]]
+_STAGES: Dict[str, StageFunc] = {}
+
+
+def register_stage(name: str) -> Callable[[StageFunc], StageFunc]:
+    """注册流水线步骤
+    Register a stage function under ``name``.
+
+    步骤函数签名为 func(xy, likelihood, **params), xy 为 (frames, bodyparts, 2)
+    缓冲区, likelihood 为 (frames, bodyparts) 数组或 None。
+    """
+
+    def decorator(func: StageFunc) -> StageFunc:
+        _STAGES[name] = func
+        return func
+
+    return decorator
+
+
+@register_stage("likelihood")
+def _likelihood_stage(xy, likelihood, threshold=0.5):
+    """置信度低于阈值的点 (与 filter_low_likelihood 一致)"""
+    if likelihood is None:
+        raise ValueError("likelihood 步骤需要置信度数据 / likelihood stage needs likelihood values")
+    return likelihood < threshold
+
+
+@register_stage("position")
+def _position_stage(xy, likelihood, x_min=199, x_max=450, y_min=220, y_max=450):
+    """不在合理范围内的点 (与 filter_unreasonable_position 一致)"""
+    return unreasonable_position_mask(xy[..., 0], xy[..., 1], x_min, x_max, y_min, y_max)
+
+
+@register_stage("extreme_jumps")
+def _extreme_jumps_stage(xy, likelihood, extreme_dist=200.0):
+    return extreme_jump_mask(xy[..., 0], xy[..., 1], extreme_dist)
+
+
+@register_stage("speed")
+def _speed_stage(xy, likelihood, max_speed_threshold=50.0, mode="sequential"):
+    return unreasonable_speed_mask(xy[..., 0], xy[..., 1], max_speed_threshold, mode=mode)
+
+
+@register_stage("interpolate")
+def _interpolate_stage(xy, likelihood, max_gap_frames=None, kind="linear"):
+    """插值并外推缺失点, 有效点不足两个的列保持不变
+    (与 interpolate_missing_points 一致, 全部列一次完成)"""
+    interpolate_missing_array(xy, out=xy, max_gap_frames=max_gap_frames, kind=kind)
+    return None
+
+
+@register_stage("smooth")
+def _smooth_stage(xy, likelihood, window_length=7, polyorder=2, segmented=True):
+    """Savitzky-Golay 平滑, 含 NaN 的列按有效段平滑 (与 smooth_trajectory 一致)"""
+    smooth_trajectory_array(xy, window_length, polyorder, out=xy, segmented=segmented)
+    return None
+
+
+@register_stage("kalman")
+def _kalman_stage(xy, likelihood, process_noise=1.0, measurement_noise=4.0):
+    """匀速模型 Kalman/RTS 平滑, 同时补齐缺失帧 (可替代 interpolate + smooth)"""
+    kalman_smooth_array(xy, likelihood, process_noise, measurement_noise, out=xy)
+    return None
+
+
+class TrajectoryPipeline:
+    """按顺序执行的轨迹清洗步骤
+    An ordered list of trajectory cleaning stages.
+
+    Args:
+        stages (Sequence[TrajectoryStage]): 步骤列表
+
+    Example:
+        >>> pipeline = TrajectoryPipeline.from_config([
+        ...     {"stage": "likelihood", "threshold": 0.6},
+        ...     {"stage": "extreme_jumps", "extreme_dist": 200.0},
+        ...     {"stage": "interpolate"},
+        ... ])
+        >>> result = pipeline.run(x, y, likelihood)
+    """
+
+    def __init__(self, stages: Sequence[TrajectoryStage]):
+        for stage in stages:
+            if stage.name not in _STAGES:
+                raise ValueError(
+                    f"未知的步骤 / Unknown stage: {stage.name}; "
+                    f"可用 / available: {sorted(_STAGES)}"
+                )
+        self.stages: Tuple[TrajectoryStage, ...] = tuple(stages)
+
+    @classmethod
+    def from_config(cls, config: Sequence[Mapping[str, Any]]) -> "TrajectoryPipeline":
+        """由 [{"stage": 名称, 参数...}, ...] 配置构建流水线
+        Build a pipeline from a list of ``{"stage": name, **params}`` mappings.
+        """
+        stages = []
+        for entry in config:
+            params = dict(entry)
+            try:
+                name = params.pop("stage")
+            except KeyError:
+                raise ValueError(f"配置缺少 stage 字段 / Missing 'stage': {entry}") from None
+            stages.append(TrajectoryStage(name, params))
+        return cls(stages)
+
+    def run(
+        self,
+        x: np.ndarray,
+        y: np.ndarray,
+        likelihood: Optional[np.ndarray] = None,
+    ) -> TrajectoryResult:
+        """执行全部步骤
+        Run every stage over one buffer.
+
+        Args:
+            x (np.ndarray): (frames,) 或 (frames, bodyparts) 坐标
+            y (np.ndarray): 与 x 同形状
+            likelihood (np.ndarray, optional): 与 x 同形状的置信度
+
+        Returns:
+            TrajectoryResult: 清洗后的坐标和每步统计
+        """
+        x = np.asarray(x)
+        squeeze = x.ndim == 1
+        n_frames = x.shape[0]
+        xy = np.empty((n_frames, 1 if squeeze else x.shape[1], 2), dtype=np.float64)
+        xy[..., 0] = x.reshape(n_frames, -1)
+        xy[..., 1] = np.asarray(y).reshape(n_frames, -1)
+        if likelihood is not None:
+            likelihood = np.asarray(likelihood, dtype=np.float64).reshape(n_frames, -1)
+
+        valid = ~np.isnan(xy[..., 0])
+        n_valid = int(np.count_nonzero(valid))
+        stats: List[StageStats] = []
+        for stage in self.stages:
+            mask = _STAGES[stage.name](xy, likelihood, **stage.params)
+            if mask is None:
+                valid = ~np.isnan(xy[..., 0])
+                new_valid = int(np.count_nonzero(valid))
+                stats.append(StageStats(stage.name, max(n_valid - new_valid, 0), new_valid))
+                n_valid = new_valid
+                continue
+            xy[mask] = np.nan
+            dropped = int(np.count_nonzero(mask & valid))
+            valid &= ~mask
+            n_valid -= dropped
+            stats.append(StageStats(stage.name, dropped, n_valid))
+        return TrajectoryResult(xy=xy, stats=stats, squeeze=squeeze)
+
+    def clean_coords(
+        self, coords: Mapping[str, Mapping[str, np.ndarray]]
+    ) -> Dict[str, Dict[str, np.ndarray]]:
+        """清洗 analyze_* 使用的 {bodypart: {field: array}} 坐标, 所有关键点一次处理
+        Clean coordinates in the {bodypart: {field: array}} layout used by analyze_*.
+
+        Args:
+            coords: 每个关键点的 x, y, likelihood
+
+        Returns:
+            Dict[str, Dict[str, np.ndarray]]: 同结构的新字典, x / y 为清洗后的值
+        """
+        points = list(coords)
+        if not points:
+            return {}
+        columns = {
+            name: np.stack([np.asarray(coords[p][name]) for p in points], axis=1)
+            for name in ("x", "y", "likelihood")
+            if all(name in coords[p] for p in points)
+        }
+        result = self.run(columns["x"], columns["y"], columns.get("likelihood"))
+        cleaned = {}
+        for k, point in enumerate(points):
+            cleaned[point] = dict(coords[point])
+            cleaned[point]["x"] = result.xy[:, k, 0]
+            cleaned[point]["y"] = result.xy[:, k, 1]
+        return cleaned
+
+
+def catch_pipeline(
+    threshold: float, speed_threshold: float, smoother: str = "savgol"
+) -> TrajectoryPipeline:
+    """抓取实验使用的清洗流水线
+    The cleaning pipeline used by the catch assay.
+
+    smoother="kalman" 时用 Kalman/RTS 平滑代替插值和 Savitzky-Golay 两步。
+    threshold / speed_threshold 也可以是每列一个值的数组, 用于一次清洗多组参数。
+    """
+    if smoother not in SMOOTHERS:
+        raise ValueError(f"未知的平滑方式 / Unknown smoother: {smoother}")
+    config = [
+        {"stage": "likelihood", "threshold": threshold},
+        {"stage": "position"},
+        {"stage": "extreme_jumps", "extreme_dist": 200.0},
+        {"stage": "speed", "max_speed_threshold": speed_threshold},
+    ]
+    if smoother == "kalman":
+        config.append({"stage": "kalman"})
+    else:
+        config += [
+            {"stage": "interpolate"},
+            {"stage": "smooth", "window_length": 7, "polyorder": 2},
+        ]
+    return TrajectoryPipeline.from_config(config)
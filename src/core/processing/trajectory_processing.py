@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from bisect import bisect_left, bisect_right
+from collections import deque
+
 import numpy as np
 import pandas as pd
-from scipy.interpolate import interp1d
-from scipy.signal import savgol_filter
+from scipy.interpolate import CubicSpline, PchipInterpolator, interp1d
+from scipy.linalg import solveh_banded
+from scipy.ndimage import convolve1d
+from scipy.signal import savgol_coeffs, savgol_filter
 import matplotlib.pyplot as plt
 
+from .streaming import iter_frame_chunks
+
 def filter_low_likelihood(df, likelihood_threshold=0.5):
     """
     根据置信度阈值过滤数据，将低于阈值的行的 (x, y) 坐标置为 NaN。
@@ -20,66 +27,134 @@ def filter_extreme_jumps(df, extreme_dist=200.0):
     """
     第一层过滤：快速剔除极端跳变点。
     如果当前帧与前一帧之间的距离超过 extreme_dist 像素，则视为极端离群点，将当前帧标记为 NaN。
+    （与前一帧比较时使用前一帧过滤后的值，见 extreme_jump_mask）
     """
     df_filtered = df.copy()
     x = df_filtered["x"].values
     y = df_filtered["y"].values
-    
-    for i in range(1, len(df_filtered)):
-        if np.isnan(x[i]) or np.isnan(x[i-1]):
-            continue
-        dist = np.sqrt((x[i] - x[i-1])**2 + (y[i] - y[i-1])**2)
-        if dist > extreme_dist:
-            x[i] = np.nan
-            y[i] = np.nan
 
-    df_filtered["x"] = x
-    df_filtered["y"] = y
+    mask = extreme_jump_mask(x, y, extreme_dist)
+    df_filtered["x"] = np.where(mask, np.nan, x)
+    df_filtered["y"] = np.where(mask, np.nan, y)
     return df_filtered
 
-def filter_unreasonable_speed(df, max_speed_threshold=50.0, fps=60):
+def extreme_jump_mask(x, y, extreme_dist=200.0):
+    """
+    极端跳变过滤的向量化实现，返回需要置为 NaN 的帧。
+
+    逐帧语义：第 i 帧在自身与（过滤后的）第 i-1 帧都有效、且两者距离超过
+    extreme_dist 时被剔除。第 i 帧被剔除后，第 i+1 帧不再与它比较，所以在
+    连续的“超距”帧中只有第 1、3、5... 帧被剔除，按游程奇偶性即可一次算出。
+
+    参数:
+    - x, y: (frames,) 或 (frames, bodyparts) 数组，按列独立处理
+    - extreme_dist: 相邻帧最大允许距离（像素）
+
+    返回:
+    - 与 x 同形状的布尔数组
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    jump = np.zeros(x.shape, dtype=bool)
+    if len(x) > 1:
+        with np.errstate(invalid="ignore"):
+            dist = np.sqrt((x[1:] - x[:-1])**2 + (y[1:] - y[:-1])**2)
+        # 任一帧 x 为 NaN 时不比较
+        jump[1:] = (dist > extreme_dist) & ~np.isnan(x[1:]) & ~np.isnan(x[:-1])
+
+    # 每帧所在“超距”游程的起点，游程内偶数位置被剔除
+    index = np.arange(len(x)).reshape((-1,) + (1,) * (x.ndim - 1))
+    last_kept = np.maximum.accumulate(np.where(jump, -1, index), axis=0)
+    return jump & ((index - last_kept) % 2 == 1)
+
+def filter_unreasonable_speed(df, max_speed_threshold=50.0, fps=60, mode="sequential"):
     """
     第二层过滤：根据最大速度阈值剔除异常点。
     如果与前一帧或后一帧间距过大（> max_speed_threshold），则将当前帧标记为 NaN。
+    mode 含义见 unreasonable_speed_mask。
     """
     df_filtered = df.copy()
     x = df_filtered["x"].values
     y = df_filtered["y"].values
-    n = len(x)
-    
-    for i in range(n):
-        if i == 0 or i == n - 1:
-            continue
-        
-        if np.isnan(x[i]) or np.isnan(y[i]):
-            continue
-        
-        # 当前帧与前一帧
-        if not np.isnan(x[i-1]) and not np.isnan(y[i-1]):
-            dist_prev = np.sqrt((x[i] - x[i-1])**2 + (y[i] - y[i-1])**2)
-            if dist_prev > max_speed_threshold:
-                x[i] = np.nan
-                y[i] = np.nan
-                continue
-        
-        # 当前帧与下一帧
-        if i < n - 1:
-            if not np.isnan(x[i+1]) and not np.isnan(y[i+1]):
-                dist_next = np.sqrt((x[i+1] - x[i])**2 + (y[i+1] - y[i])**2)
-                if dist_next > max_speed_threshold:
-                    x[i] = np.nan
-                    y[i] = np.nan
-                    continue
-
-    df_filtered["x"] = x
-    df_filtered["y"] = y
+
+    mask = unreasonable_speed_mask(x, y, max_speed_threshold, mode=mode)
+    df_filtered["x"] = np.where(mask, np.nan, x)
+    df_filtered["y"] = np.where(mask, np.nan, y)
     return df_filtered
 
-def interpolate_missing_points(df):
+def unreasonable_speed_mask(x, y, max_speed_threshold=50.0, mode="sequential"):
     """
-    对缺失的点（NaN）进行线性插值。
+    速度过滤的向量化实现，返回需要置为 NaN 的帧（首尾两帧不处理）。
+
+    mode:
+    - "sequential": 与逐帧循环一致。与前一帧比较时使用前一帧过滤后的值，
+      与后一帧比较时使用原始值。因此“与后一帧超距”的帧一定被剔除，
+      仅“与前一帧超距”的帧在前一帧被剔除时保留、否则剔除，
+      连续这类帧的结果交替出现，按最近一个确定帧的奇偶性即可一次算出。
+    - "stateless": 只与原始前后帧比较，不依赖处理顺序。
+
+    参数:
+    - x, y: (frames,) 或 (frames, bodyparts) 数组，按列独立处理
+    - max_speed_threshold: 相邻帧最大允许距离（像素/帧）
+    - mode: "sequential" 或 "stateless"
+
+    返回:
+    - 与 x 同形状的布尔数组
+    """
+    if mode not in ("sequential", "stateless"):
+        raise ValueError(f"未知的 mode / Unknown mode: {mode}")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n < 3:
+        return np.zeros(x.shape, dtype=bool)
+
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    # far[i]: 第 i 帧与第 i+1 帧均有效且超距
+    with np.errstate(invalid="ignore"):
+        far = np.sqrt((x[1:] - x[:-1])**2 + (y[1:] - y[:-1])**2) > max_speed_threshold
+    far &= valid[1:] & valid[:-1]
+
+    interior = np.zeros(x.shape, dtype=bool)
+    interior[1:-1] = True
+    far_prev = np.zeros(x.shape, dtype=bool)
+    far_prev[1:] = far
+    far_next = np.zeros(x.shape, dtype=bool)
+    far_next[:-1] = far
+    far_prev &= interior
+    far_next &= interior
+
+    if mode == "stateless":
+        return far_prev | far_next
+
+    # 仅与前一帧超距的帧取前一帧结果的反; 其余帧结果确定 (= far_next)
+    toggle = far_prev & ~far_next
+    index = np.arange(n).reshape((-1,) + (1,) * (x.ndim - 1))
+    anchor = np.maximum.accumulate(np.where(toggle, 0, index), axis=0)
+    return np.take_along_axis(far_next, anchor, axis=0) ^ ((index - anchor) % 2 == 1)
+
+def interpolate_missing_points(df, max_gap_frames=None, kind="linear"):
+    """
+    对缺失的点（NaN）进行插值, 参数含义见 interpolate_missing_array。
+    索引为 0..n-1 的连续整数时直接在数组上计算, 否则按索引值用 interp1d 插值
+    (此时只支持默认参数)。
     """
     df_interpolated = df.copy()
+    index = df_interpolated.index
+    if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+        xy = interpolate_missing_array(
+            df_interpolated[["x", "y"]].to_numpy(dtype=float),
+            max_gap_frames=max_gap_frames,
+            kind=kind,
+        )
+        df_interpolated["x"] = xy[:, 0]
+        df_interpolated["y"] = xy[:, 1]
+        return df_interpolated
+
+    if max_gap_frames is not None or kind != "linear":
+        raise ValueError(
+            "max_gap_frames / kind 需要 0..n-1 的帧索引 / need a default RangeIndex"
+        )
     for coord in ["x", "y"]:
         valid_mask = ~df_interpolated[coord].isna()
         valid_indices = df_interpolated[valid_mask].index
@@ -92,17 +167,19 @@ def interpolate_missing_points(df):
         df_interpolated[coord] = f(df_interpolated.index)
     return df_interpolated
 
-def smooth_trajectory(df, window_length=7, polyorder=2):
+def smooth_trajectory(df, window_length=7, polyorder=2, segmented=True):
     """
     使用 Savitzky-Golay 滤波对插值完成后的 (x,y) 做平滑。
+    含 NaN 的坐标按连续有效段分别平滑 (见 smooth_trajectory_array);
+    segmented=False 时与旧版一致, 整列跳过。
     """
     df_smoothed = df.copy()
-    for coord in ["x", "y"]:
-        series = df_smoothed[coord].values
-        if np.isnan(series).any():
-            continue
-        if len(series) >= window_length:
-            df_smoothed[coord] = savgol_filter(series, window_length, polyorder)
+    xy = smooth_trajectory_array(
+        df_smoothed[["x", "y"]].to_numpy(dtype=float), window_length, polyorder,
+        segmented=segmented,
+    )
+    df_smoothed["x"] = xy[:, 0]
+    df_smoothed["y"] = xy[:, 1]
     return df_smoothed
 
 def filter_unreasonable_position(df, x_min=199, x_max=450, y_min=220, y_max=450):
@@ -117,24 +194,322 @@ def filter_unreasonable_position(df, x_min=199, x_max=450, y_min=220, y_max=450)
         y_max: y坐标最大值 (450)
     """
     df_filtered = df.copy()
-    position_mask = (
-        (df_filtered['x'] >= x_min) & 
-        (df_filtered['x'] <= x_max) & 
-        (df_filtered['y'] >= y_min) & 
-        (df_filtered['y'] <= y_max)
+    position_mask = unreasonable_position_mask(
+        df_filtered['x'].values, df_filtered['y'].values, x_min, x_max, y_min, y_max
     )
     
     # 将不合理位置的点标记为NaN
-    df_filtered.loc[~position_mask, ['x', 'y']] = np.nan
+    df_filtered.loc[position_mask, ['x', 'y']] = np.nan
     return df_filtered
 
+def unreasonable_position_mask(x, y, x_min=199, x_max=450, y_min=220, y_max=450):
+    """
+    不在合理范围内 (或为 NaN) 的点, 返回与 x 同形状的布尔数组。
+    x, y 可为 (frames,) 或 (frames, bodyparts) 数组。
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    return ~((x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max))
+
+INTERPOLATION_KINDS = ("linear", "cubic", "pchip")
+
+def interpolate_missing_array(values, out=None, max_gap_frames=None, kind="linear"):
+    """
+    interpolate_missing_points 的数组版本: 对每一列独立插值缺失点 (NaN),
+    有效点不足两个的列保持不变。线性插值在所有列上一次向量化完成, 结果与逐列
+    调用 interp1d(kind='linear', fill_value="extrapolate") 逐位一致。
+
+    参数:
+    - values: (frames, ...) 数组, 例如 (frames, bodyparts, 2); 帧号即插值横坐标
+    - out: 输出数组, 可以就是 values 本身 (原地插值); 默认新建
+    - max_gap_frames: 最长填补的连续缺失帧数; 更长的缺失段 (包括首尾需要外推的段)
+      保持 NaN, 避免跨越长时间的跟踪丢失。默认不限
+    - kind: "linear"; 或 "cubic" / "pchip", 此时内部缺失段用三次样条 / PCHIP
+      逐列插值, 首尾仍按线性外推
+
+    返回:
+    - 与 values 同形状的 float 数组
+    """
+    if kind not in INTERPOLATION_KINDS:
+        raise ValueError(f"未知的插值方式 / Unknown kind: {kind}")
+    if out is None:
+        out = np.array(values, dtype=float)
+    elif out is not values:
+        out[...] = values
+    n = out.shape[0]
+    flat = out.reshape(n, -1)
+    cols = np.count_nonzero(~np.isnan(flat), axis=0) >= 2
+    if n == 0 or not cols.any():
+        return out
+
+    series = flat[:, cols]
+    valid = ~np.isnan(series)
+    index = np.arange(n)[:, None]
+    # 每帧之前最近的有效帧 (不含自身) 与之后最近的有效帧 (含自身)
+    prev_incl = np.maximum.accumulate(np.where(valid, index, -1), axis=0)
+    prev = np.full_like(prev_incl, -1)
+    prev[1:] = prev_incl[:-1]
+    nxt = np.minimum.accumulate(np.where(valid, index, n)[::-1], axis=0)[::-1]
+
+    # 与 interp1d 相同的区间选择: 首个有效点之前用前两个有效点, 最后一个之后用后两个
+    columns = np.arange(series.shape[1])
+    first, last = nxt[0], prev_incl[-1]
+    second = nxt[first + 1, columns]
+    second_last = prev[last, columns]
+    lo = np.where(prev < 0, first, np.where(nxt >= n, second_last, prev))
+    hi = np.where(prev < 0, second, np.where(nxt >= n, last, nxt))
+
+    y_lo = np.take_along_axis(series, lo, axis=0)
+    y_hi = np.take_along_axis(series, hi, axis=0)
+    slope = (y_hi - y_lo) / (hi - lo)
+    filled = slope * (index - lo) + y_lo
+
+    if kind != "linear":
+        # 内部缺失段: 前后都有有效点
+        interior = ~valid & (prev >= 0) & (nxt < n)
+        frames = np.arange(n)
+        for c in np.flatnonzero(interior.any(axis=0)):
+            knots = valid[:, c]
+            if kind == "cubic":
+                spline = CubicSpline(frames[knots], series[knots, c])
+            else:
+                spline = PchipInterpolator(frames[knots], series[knots, c])
+            gaps = interior[:, c]
+            filled[gaps, c] = spline(frames[gaps])
+
+    if max_gap_frames is not None:
+        # 所在缺失段长度: 内部段为 nxt - prev - 1, 开头段为 nxt, 结尾段为 n - 1 - prev
+        gap = np.where(prev < 0, nxt, np.where(nxt >= n, n - 1 - prev, nxt - prev - 1))
+        filled = np.where(valid | (gap <= max_gap_frames), filled, np.nan)
+
+    flat[:, cols] = filled
+    if not np.may_share_memory(flat, out):
+        out[...] = flat.reshape(out.shape)
+    return out
+
+def smooth_trajectory_array(values, window_length=7, polyorder=2, out=None, segmented=True):
+    """
+    smooth_trajectory 的数组版本: 沿帧轴对每一列做 Savitzky-Golay 平滑。
+
+    不含 NaN 的列整列平滑, 与 savgol_filter 一致。含 NaN 的列 (如有效点不足或
+    使用了 max_gap_frames 插值) 按连续有效段分别平滑, 结果与对每段单独调用
+    savgol_filter 相同 (至多差浮点舍入); 短于 window_length 的段和 NaN 保持不变。
+    所有段在一次卷积和一次批量端点拟合中完成, 不逐段循环。
+
+    参数:
+    - values: (frames, ...) 数组
+    - out: 输出数组, 可以就是 values 本身; 默认新建
+    - segmented: False 时含 NaN 的列整列跳过 (旧版行为)
+
+    返回:
+    - 与 values 同形状的 float 数组
+    """
+    if out is None:
+        out = np.array(values, dtype=float)
+    elif out is not values:
+        out[...] = values
+    n = out.shape[0]
+    if n < window_length:
+        return out
+    flat = out.reshape(n, -1)
+    has_nan = np.isnan(flat).any(axis=0)
+    # 逐列调用, 与一维 savgol_filter 逐位一致 (多列一起拟合端点时舍入不同)
+    for c in np.flatnonzero(~has_nan):
+        flat[:, c] = savgol_filter(flat[:, c], window_length, polyorder)
+    if segmented and has_nan.any():
+        flat[:, has_nan] = _smooth_valid_runs(flat[:, has_nan], window_length, polyorder)
+    if not np.may_share_memory(flat, out):
+        out[...] = flat.reshape(out.shape)
+    return out
+
+def _smooth_valid_runs(series, window_length, polyorder):
+    """
+    对 (frames, columns) 数组中每段长度不小于 window_length 的连续有效段做
+    Savitzky-Golay 平滑 (mode='interp')。
+
+    段内部用一次 convolve1d 算出 (窗口不跨 NaN 的帧与逐段计算逐位相同);
+    段两端 window_length // 2 帧与 savgol_filter 一样取首/尾 window_length 帧
+    的多项式拟合值, 所有段的首尾窗口各堆叠成矩阵, 用一次矩阵乘法求出
+    (与逐段拟合只差浮点舍入)。
+    """
+    n_frames, n_cols = series.shape
+    half = window_length // 2
+    result = series.copy()
+
+    # 各列连续有效段 [starts, ends), 按列、再按帧排序
+    valid = np.zeros((n_cols, n_frames + 2), dtype=np.int8)
+    valid[:, 1:-1] = ~np.isnan(series.T)
+    edges = np.diff(valid, axis=1)
+    col, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    long_runs = ends - starts >= window_length
+    col, starts, ends = col[long_runs], starts[long_runs], ends[long_runs]
+    if len(col) == 0:
+        return result
+
+    interior = convolve1d(series, savgol_coeffs(window_length, polyorder),
+                          axis=0, mode="constant")
+    marks = np.zeros((n_frames + 1, n_cols), dtype=np.int64)
+    np.add.at(marks, (starts + half, col), 1)
+    np.add.at(marks, (ends - half, col), -1)
+    inside = np.cumsum(marks[:-1], axis=0) > 0
+    result[inside] = interior[inside]
+
+    # 窗口内第 p 帧处拟合多项式的取值 = 窗口 · savgol_coeffs(pos=p, use="dot")
+    offsets = np.arange(window_length)
+    tail_offsets = offsets[window_length - half:]
+    fit = np.stack([savgol_coeffs(window_length, polyorder, pos=p, use="dot")
+                    for p in offsets])
+    heads = series[starts[:, None] + offsets, col[:, None]]
+    tails = series[ends[:, None] - window_length + offsets, col[:, None]]
+    result[starts[:, None] + offsets[:half], col[:, None]] = heads @ fit[:half].T
+    result[ends[:, None] - window_length + tail_offsets, col[:, None]] = tails @ fit[tail_offsets].T
+    return result
+
+# 速度先验精度 (方差 1e6 像素²/帧²), 只有一个观测点时保证方程组可解
+_KALMAN_VELOCITY_PRECISION = 1e-6
+
+def kalman_smooth_array(values, likelihood=None, process_noise=1.0,
+                        measurement_noise=4.0, out=None):
+    """
+    匀速模型的 Kalman / Rauch-Tung-Striebel 平滑, 可替代“插值 + Savitzky-Golay”两步。
+
+    每条轨迹的状态为 (位置, 速度), 过程噪声为连续白噪声加速度
+    Q = q [[1/3, 1/2], [1/2, 1]] (以帧为时间单位), 观测方差为
+    measurement_noise / likelihood。缺失帧 (x 或 y 为 NaN, 或置信度为 NaN/0)
+    不提供观测, 直接由模型补齐, 不需要单独插值。
+
+    RTS 平滑均值就是该线性高斯模型的后验均值, 即一个带宽为 3 的块三对角
+    正定方程组的解; 这里对每条轨迹用一次带状 Cholesky 分解 (solveh_banded)
+    同时求出 x 和 y, 耗时与帧数成正比, 不逐帧在 Python 中递推。
+
+    参数:
+    - values: (frames, ..., 2) 数组, 最后一维为 (x, y), 例如 (frames, bodyparts, 2)
+    - likelihood: 与 values[..., 0] 同形状的置信度; 默认所有有效帧权重相同
+    - process_noise: 过程噪声强度 q (像素²/帧³), 越大越贴近观测
+    - measurement_noise: 置信度为 1 时的观测方差 (像素²)
+    - out: 输出数组, 可以就是 values 本身; 默认新建
+
+    返回:
+    - 与 values 同形状的 float 数组; 没有任何有效观测的轨迹保持 NaN
+    """
+    if out is None:
+        out = np.array(values, dtype=float)
+    elif out is not values:
+        out[...] = values
+    n = out.shape[0]
+    tracks = out.reshape(n, -1, 2)
+    observed = ~np.isnan(tracks).any(axis=2)
+    if likelihood is None:
+        weights = np.where(observed, 1.0 / measurement_noise, 0.0)
+    else:
+        confidence = np.asarray(likelihood, dtype=float).reshape(n, -1)
+        weights = np.where(observed & (confidence > 0), confidence / measurement_noise, 0.0)
+    if n == 0:
+        return out
+
+    # 动力学项在各轨迹间相同, 只有观测权重不同 (上三角带状存储, 行 3 为主对角线)
+    q = float(process_noise)
+    has_prev = (np.arange(n) >= 1).astype(float)
+    has_next = (np.arange(n) <= n - 2).astype(float)
+    band = np.zeros((4, 2 * n))
+    band[3, 0::2] = 12 / q * (has_prev + has_next)
+    band[3, 1::2] = 4 / q * (has_prev + has_next)
+    band[3, 1] += _KALMAN_VELOCITY_PRECISION
+    band[2, 1::2] = 6 / q * (has_next - has_prev)
+    band[2, 2::2] = -6 / q
+    band[1, 2::2] = -12 / q
+    band[1, 3::2] = 2 / q
+    band[0, 3::2] = 6 / q
+
+    for k in np.flatnonzero(weights.any(axis=0)):
+        ab = band.copy()
+        ab[3, 0::2] += weights[:, k]
+        rhs = np.zeros((2 * n, 2))
+        rhs[0::2] = np.where(observed[:, k, None], tracks[:, k], 0.0) * weights[:, k, None]
+        tracks[:, k] = solveh_banded(ab, rhs, overwrite_ab=True, overwrite_b=True)[0::2]
+    if not np.may_share_memory(tracks, out):
+        out[...] = tracks.reshape(out.shape)
+    return out
+
+class _FrameIntervals:
+    """已占用帧的有序不相交闭区间集合
+    Sorted, disjoint, inclusive frame intervals consumed by detected events.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def __contains__(self, frame):
+        k = bisect_right(self.starts, frame) - 1
+        return k >= 0 and frame <= self.ends[k]
+
+    def add(self, start, end):
+        """加入 [start, end] 并与相交或相邻的区间合并"""
+        i = bisect_left(self.ends, start - 1)
+        j = bisect_right(self.starts, end + 1)
+        if i < j:
+            start = min(start, self.starts[i])
+            end = max(end, self.ends[j - 1])
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+    def mask(self, lo, hi):
+        """[lo, hi) 内各帧是否已被占用"""
+        used = np.zeros(max(hi - lo, 0), dtype=bool)
+        for k in range(bisect_right(self.ends, lo - 1), len(self.starts)):
+            if self.starts[k] >= hi:
+                break
+            used[max(self.starts[k] - lo, 0):self.ends[k] - lo + 1] = True
+        return used
+
+
+class _WindowArgmax:
+    """单调队列实现的滑动窗口 argmax
+    Sliding-window argmax over eligible frames, using a monotonic deque.
+
+    查询窗口 [first, last] 的两端必须单调不减, 每帧最多入队出队各一次;
+    并列最大值返回最早的帧 (与逐帧 ``>`` 比较一致)。帧的可用性改变后
+    需调用 reset(), 下次查询时从窗口起点重新入队。
+    """
+
+    def __init__(self, values, eligible, free, offset):
+        self.values = values
+        self.eligible = eligible
+        self.free = free
+        self.offset = offset
+        self.reset()
+
+    def reset(self):
+        self.queue = deque()
+        self.pushed = None  # 已入队的最后一帧
+
+    def query(self, first, last):
+        values, queue, offset = self.values, self.queue, self.offset
+        begin = first if self.pushed is None else max(self.pushed + 1, first)
+        for frame in range(begin, last + 1):
+            i = frame - offset
+            if not (self.eligible[i] and self.free[i]):
+                continue
+            value = values[i]
+            while queue and values[queue[-1] - offset] < value:
+                queue.pop()
+            queue.append(frame)
+        self.pushed = last if self.pushed is None else max(self.pushed, last)
+        while queue and queue[0] < first:
+            queue.popleft()
+        return queue[0] if queue else None
+
+
 def detect_grab_trajectories(df, 
                            fps=120.0,
                            barrier_region=(330, 450, 250, 400),  # (x_min, x_max, y_min, y_max)
                            start_region=(200, 300, 350, 450),
                            max_back_time=0.5,   # 向前回溯最多0.5秒
                            max_forward_time=0.2,  # 向后查找最多0.2秒
-                           min_frame_gap=60     # 两次抓取之间的最小帧数间隔
+                           min_frame_gap=60,    # 两次抓取之间的最小帧数间隔
+                           chunk_frames=None    # 分块处理的每块帧数, None 表示整段处理
                            ):
     """
     根据给定思路检测抓取轨迹:
@@ -152,6 +527,11 @@ def detect_grab_trajectories(df,
     - max_back_time: 向前回溯的最大时间(秒)
     - max_forward_time: 向后搜寻终点的最大时间(秒)
     - min_frame_gap: 两次抓取之间的最小帧数间隔
+    - chunk_frames: 每块帧数; 每块向前多读 max_back_time、向后多读 max_forward_time
+      的帧, 已记录的事件跨块保留, 结果与整段处理一致
+
+    起点/终点用单调队列做滑动窗口 argmax, 已占用帧以有序区间保存; 每个事件
+    只重建一次窗口, 总耗时约为 O(帧数 + 事件数 x 窗口长度)。
 
     返回:
     - events: List[ dict ], 每个包含:
@@ -168,77 +548,77 @@ def detect_grab_trajectories(df,
     bxmin, bxmax, bymin, bymax = barrier_region
     sxmin, sxmax, symin, symax = start_region
 
-    # 将 df.x, df.y 取成 numpy 数组，便于快速索引
-    x = df["x"].values
-    y = df["y"].values
-    n_frames = len(df)
-
-    # 1) 找到所有落在挡板右侧区域的帧索引
-    region_mask = (x > bxmin) & (x < bxmax) & (y > bymin) & (y < bymax)
-    candidate_indices = np.where(region_mask)[0]
+    # 将 df.x, df.y 取成 numpy 数组，便于快速索引 (也可以是内存映射数组)
+    x_all = np.asarray(df["x"])
+    y_all = np.asarray(df["y"])
+    n_frames = len(x_all)
 
     startOffset = int(round(max_back_time * fps))      # 回溯最大帧数
     endOffset   = int(round(max_forward_time * fps))
 
     events = []
-    used_frames = set()  # 记录已使用的帧
+    used_frames = _FrameIntervals()  # 已被事件占用的帧区间
 
-    # 按时间顺序处理候选点
-    for i_candidate in sorted(candidate_indices):
-        # 检查当前候选点是否在已使用的帧范围内
-        if i_candidate in used_frames:
-            continue
+    if chunk_frames is None:
+        chunk_frames = max(n_frames, 1)
+    for chunk in iter_frame_chunks(n_frames, chunk_frames, startOffset, endOffset):
+        # 块内数组下标 = 帧号 - chunk.lo
+        lo = chunk.lo
+        x = np.asarray(x_all[chunk.lo:chunk.hi])
+        y = np.asarray(y_all[chunk.lo:chunk.hi])
 
-        # 检查是否与前一个事件有足够的时间间隔
-        if events and i_candidate - events[-1]['i_end'] < min_frame_gap:
-            continue
+        # 1) 找到所有落在挡板右侧区域的帧索引
+        x_core = x[chunk.core]
+        y_core = y[chunk.core]
+        region_mask = (x_core > bxmin) & (x_core < bxmax) & (y_core > bymin) & (y_core < bymax)
+        candidate_indices = chunk.start + np.where(region_mask)[0]
 
-        # 2) 向前回溯不超过 max_back_time
-        i_start_candidate_min = max(0, i_candidate - startOffset)
-        # 找 [i_start_candidate_min, i_candidate] 区间内
-        #  满足 start_region & y 值最大的帧
-        best_i_start = None
-        best_y = -np.inf
-        for i_back in range(i_start_candidate_min, i_candidate+1):
-            if i_back in used_frames:
+        # 起点/终点的候选帧: 起点须在 start_region 内, 终点须有有效 x;
+        # free 标记块内尚未被占用的帧, 新事件记录后同步更新
+        free = ~used_frames.mask(lo, chunk.hi)
+        in_start = (x > sxmin) & (x < sxmax) & (y > symin) & (y < symax)
+        best_start = _WindowArgmax(y, in_start, free, lo)
+        best_end = _WindowArgmax(x, x > -np.inf, free, lo)
+
+        # 按时间顺序处理候选点
+        for i_candidate in candidate_indices:
+            # 检查当前候选点是否在已使用的帧范围内
+            if i_candidate in used_frames:
                 continue
-            if (x[i_back] > sxmin and x[i_back] < sxmax and
-                y[i_back] > symin and y[i_back] < symax):
-                if y[i_back] > best_y:
-                    best_y = y[i_back]
-                    best_i_start = i_back
 
-        if best_i_start is None:
-            continue
+            # 检查是否与前一个事件有足够的时间间隔
+            if events and i_candidate - events[-1]['i_end'] < min_frame_gap:
+                continue
 
-        # 3) 向后找终点: 不超过 max_forward_time 的范围内 x 最大的帧
-        i_end_candidate_max = min(n_frames-1, i_candidate + endOffset)
-        best_i_end = None
-        best_x = -np.inf
-        for i_fwd in range(i_candidate, i_end_candidate_max+1):
-            if i_fwd in used_frames:
+            # 2) 向前回溯不超过 max_back_time:
+            #  [i_start_candidate_min, i_candidate] 区间内满足 start_region & y 值最大的帧
+            i_start_candidate_min = max(0, i_candidate - startOffset)
+            best_i_start = best_start.query(i_start_candidate_min, i_candidate)
+            if best_i_start is None:
                 continue
-            if x[i_fwd] > best_x:
-                best_x = x[i_fwd]
-                best_i_end = i_fwd
 
-        if best_i_end is None:
-            continue
+            # 3) 向后找终点: 不超过 max_forward_time 的范围内 x 最大的帧
+            i_end_candidate_max = min(n_frames-1, i_candidate + endOffset)
+            best_i_end = best_end.query(i_candidate, i_end_candidate_max)
+            if best_i_end is None:
+                continue
 
-        # 记录事件信息
-        event_info = {
-            'i_start': best_i_start,
-            'i_candidate': i_candidate,
-            'i_end': best_i_end,
-            'start_time': best_i_start / fps,
-            'candidate_time': i_candidate / fps,
-            'end_time': best_i_end / fps
-        }
-        events.append(event_info)
+            # 记录事件信息
+            event_info = {
+                'i_start': best_i_start,
+                'i_candidate': i_candidate,
+                'i_end': best_i_end,
+                'start_time': best_i_start / fps,
+                'candidate_time': i_candidate / fps,
+                'end_time': best_i_end / fps
+            }
+            events.append(event_info)
 
-        # 标记已使用的帧
-        for frame in range(best_i_start, best_i_end + 1):
-            used_frames.add(frame)
+            # 标记已使用的帧, 两个窗口按新的占用情况重建
+            used_frames.add(best_i_start, best_i_end)
+            free[max(best_i_start - lo, 0):best_i_end - lo + 1] = False
+            best_start.reset()
+            best_end.reset()
 
     return events
 
@@ -134,6 +134,10 @@ def create_folder_if_not_exists(folder_path: str) -> bool:
         st.error(f"创建文件夹失败 / Failed to create folder: {str(e)}")
         return False
 
+def _labeled(filename: str) -> bool:
+    """DeepLabCut 生成的标注视频 (*_labeled.mp4) / Whether a file is a DLC labeled video"""
+    return os.path.splitext(filename)[0].endswith("_labeled")
+
 def select_video_files(folder_path: str) -> List[str]:
     """选择视频文件
     Select video files
@@ -148,8 +152,11 @@ def select_video_files(folder_path: str) -> List[str]:
         if not os.path.exists(folder_path):
             return []
             
-        # 获取目录下所有MP4文件
-        video_files = [f for f in os.listdir(folder_path) if f.lower().endswith('.mp4')]
+        # 获取文件夹中所有MP4文件（不含DLC标注视频）
+        video_files = [
+            f for f in os.listdir(folder_path)
+            if f.lower().endswith('.mp4') and not _labeled(f)
+        ]
         
         if not video_files:
             st.warning("⚠️ 未找到MP4视频文件 / No MP4 files found")
@@ -0,0 +1,9 @@
+import streamlit as st
+
+def export_csv_checkbox() -> bool:
+    """是否同时导出CSV结果的选项 / Option to also export DLC results as CSV"""
+    return st.checkbox(
+        "同时导出CSV结果 / Also export CSV",
+        value=False,
+        help="分析模块直接读取DLC的H5输出，仅在需要用外部工具查看时导出CSV / Processing reads DLC .h5 output directly; export CSV only for external tools"
+    )
@@ -0,0 +1,103 @@
+"""单元测试共用的测试数据工厂
+Shared test-data factories for the unit tests.
+
+工厂以 fixture 的形式提供, 测试中按参数调用, 例如::
+
+    def test_something(tmp_path, write_dlc_csv):
+        write_dlc_csv(tmp_path / "videoDLC_test.csv", None, ["nose"])
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.processing.mouse_social_video_processing import (
+    SOCIAL_BODYPARTS,
+    SOCIAL_INDIVIDUALS,
+)
+from src.core.processing.pose_store import PoseData
+
+
+def _write_dlc_csv(path, individuals, bodyparts, n_frames=20, seed=0):
+    """写一个 DeepLabCut 格式的 CSV, 返回 (scorer, 数据矩阵)"""
+    rng = np.random.default_rng(seed)
+    scorer = "DLC_resnet50_TestFeb24shuffle1_500000"
+    columns = []
+    for individual in individuals or [None]:
+        for bodypart in bodyparts:
+            for field in ("x", "y", "likelihood"):
+                columns.append((individual, bodypart, field))
+    data = rng.uniform(0, 500, size=(n_frames, len(columns))).round(4)
+    data[:, 2::3] = rng.uniform(0, 1, size=(n_frames, len(columns) // 3)).round(6)
+
+    rows = [["scorer"] + [scorer] * len(columns)]
+    if individuals:
+        rows.append(["individuals"] + [c[0] for c in columns])
+    rows.append(["bodyparts"] + [c[1] for c in columns])
+    rows.append(["coords"] + [c[2] for c in columns])
+    with open(path, "w", encoding="utf-8") as handle:
+        for row in rows:
+            handle.write(",".join(row) + "\n")
+        for i, values in enumerate(data):
+            handle.write(",".join([str(i)] + [repr(float(v)) for v in values]) + "\n")
+    return scorer, data
+
+
+@pytest.fixture
+def write_dlc_csv():
+    """``write_dlc_csv(path, individuals, bodyparts, n_frames=20, seed=0)``"""
+    return _write_dlc_csv
+
+
+def _social_pose(n_frames=3000, seed=0, dtype=np.float32):
+    """两只小鼠在靠近/远离之间随机游走, 带缺失值和低置信度帧"""
+    rng = np.random.default_rng(seed)
+    values = np.empty((n_frames, 2, 3, 3), dtype=dtype)
+    centre = np.cumsum(rng.normal(0, 3, size=(n_frames, 2, 2)), axis=0) + 250
+    heading = np.cumsum(rng.normal(0, 0.2, size=(n_frames, 2)), axis=0)
+    for m in range(2):
+        direction = np.stack([np.cos(heading[:, m]), np.sin(heading[:, m])], axis=1)
+        normal = direction[:, ::-1] * [1, -1]
+        values[:, m, 0, :2] = centre[:, m] + 10 * direction
+        values[:, m, 1, :2] = centre[:, m] + 5 * normal
+        values[:, m, 2, :2] = centre[:, m] - 5 * normal
+    values[..., 2] = rng.uniform(0.9, 1.0, size=(n_frames, 2, 3))
+    values[rng.random(n_frames) < 0.05, 0, :, 2] = 0.1
+    for m in range(2):
+        gaps = rng.choice(n_frames, size=40, replace=False)
+        for g in gaps:
+            values[g : g + rng.integers(1, 20), m, 0, :2] = np.nan
+    values[:5, 1, 0, :2] = np.nan
+    return PoseData(
+        values=values,
+        scorer="DLC_test",
+        individuals=tuple(SOCIAL_INDIVIDUALS),
+        bodyparts=tuple(SOCIAL_BODYPARTS),
+        multi_animal=True,
+        source_path="",
+    )
+
+
+def _catch_frame(n_frames=4000, seed=1, min_likelihood=0.5):
+    """在起点区域和挡板区域之间往返的单关键点轨迹, 带跳点和开头的缺失值"""
+    rng = np.random.default_rng(seed)
+    phase = (np.arange(n_frames) % 150) / 150.0
+    x = 250 + 150 * np.clip(np.sin(np.pi * phase) * 1.3, 0, 1) + rng.normal(0, 2, n_frames)
+    y = 400 - 100 * np.clip(np.sin(np.pi * phase), 0, 1) + rng.normal(0, 2, n_frames)
+    likelihood = rng.uniform(min_likelihood, 1.0, n_frames)
+    jumps = rng.choice(n_frames, size=30, replace=False)
+    x[jumps] += rng.choice([-300, 300], size=30)
+    x[:3] = np.nan
+    return pd.DataFrame({"x": x, "y": y, "likelihood": likelihood})
+
+
+@pytest.fixture
+def social_pose():
+    """``social_pose(n_frames=3000, seed=0, dtype=np.float32)`` -> 两只小鼠的 PoseData"""
+    return _social_pose
+
+
+@pytest.fixture
+def catch_frame():
+    """``catch_frame(n_frames=4000, seed=1, min_likelihood=0.5)`` -> x / y / likelihood 表"""
+    return _catch_frame
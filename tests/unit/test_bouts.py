@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from src.core.processing.bouts import find_bouts
+from src.core.processing.mouse_cpp_video_processing import analyze_bout_duration as cpp_bouts
+from src.core.processing.mouse_grooming_video_processing import (
+    analyze_bout_duration as grooming_bouts,
+)
+from src.core.processing.three_chamber_video_processing import analyze_bout_duration as tc_bouts
+
+
+def _bool_bout_loop(frames, min_duration, max_duration):
+    """原始的逐帧实现 (理毛 / 游泳), 作为等价性参照"""
+    bouts, start = [], None
+    for i in range(len(frames) + 1):
+        if i < len(frames) and frames[i]:
+            if start is None:
+                start = i
+        elif start is not None:
+            if min_duration <= i - start <= max_duration:
+                bouts.append({"start_frame": start, "end_frame": i, "duration": i - start})
+            start = None
+    return bouts
+
+
+def _cpp_bout_loop(position_data, min_duration, max_duration):
+    """原始的 CPP 逐帧实现, 作为等价性参照"""
+    valid = position_data["valid_frames"]
+    n = len(valid)
+    bouts, start, current = [], None, None
+
+    def close(end, center):
+        if min_duration <= end - start <= max_duration:
+            bouts.append({
+                "start_frame": start, "end_frame": end, "duration": end - start,
+                "area": current,
+                "center_x": float(position_data["center_x"][center]),
+                "center_y": float(position_data["center_y"][center]),
+            })
+
+    for i in range(n):
+        if valid[i]:
+            area = "drug" if position_data["in_drug_area"][i] else "saline"
+            if start is None:
+                start, current = i, area
+            elif area != current:
+                close(i, i)
+                start, current = i, area
+    if start is not None:
+        close(n, n - 1)
+    return bouts
+
+
+def _random_runs(rng, n_runs=300, max_len=40):
+    return (rng.integers(0, 2, n_runs).repeat(rng.integers(1, max_len, n_runs))).astype(bool)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_boolean_bouts_match_frame_loop(seed):
+    rng = np.random.default_rng(seed)
+    frames = _random_runs(rng)
+
+    assert grooming_bouts(frames, 5, 30) == _bool_bout_loop(frames, 5, 30)
+    # 三箱之前漏掉了以最后一帧结尾的片段, 现在与其他实验一致
+    assert tc_bouts(frames, 5, 30) == _bool_bout_loop(frames, 5, 30)
+    assert grooming_bouts(np.zeros(0, dtype=bool), 5, 30) == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_cpp_bouts_match_frame_loop(seed):
+    rng = np.random.default_rng(seed)
+    in_drug = _random_runs(rng)
+    n_frames = len(in_drug)
+    valid = rng.random(n_frames) < 0.8
+    valid[: rng.integers(0, 20)] = False
+    position_data = {
+        "valid_frames": valid,
+        "in_drug_area": in_drug,
+        "center_x": rng.uniform(0, 750, n_frames),
+        "center_y": rng.uniform(0, 500, n_frames),
+    }
+
+    bouts = cpp_bouts(position_data, 5, 40)
+
+    assert bouts == _cpp_bout_loop(position_data, 5, 40)
+    assert cpp_bouts(dict(position_data, valid_frames=np.zeros(n_frames, bool)), 5, 40) == []
+
+
+def test_bridge_gaps_and_reductions():
+    states = np.array([0, 1, 1, 0, 0, 1, 2, 2, 0, 0, 0, 1, 1])
+    values = np.arange(len(states), dtype=float)
+
+    bouts = find_bouts(states, background=0)
+    bridged = find_bouts(states, background=0, max_gap=2)
+
+    assert list(zip(bouts.start, bouts.stop, bouts.label)) == [
+        (1, 3, 1), (5, 6, 1), (6, 8, 2), (11, 13, 1)
+    ]
+    assert list(zip(bridged.start, bridged.stop, bridged.label)) == [
+        (1, 6, 1), (6, 8, 2), (11, 13, 1)
+    ]
+    np.testing.assert_array_equal(bridged.reduce(values), [3.0, 6.5, 11.5])
+    np.testing.assert_array_equal(bridged.reduce(values, "max"), [5.0, 7.0, 12.0])
+    np.testing.assert_array_equal(bridged.reduce(values, "sum"), [15.0, 13.0, 23.0])
+    assert bridged.filter_duration(3, None).records() == [
+        {"start_frame": 1, "end_frame": 6, "duration": 5}
+    ]
+    with pytest.raises(ValueError):
+        bouts.reduce(values, "median")
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.processing.feature_cache import FeatureCache, pose_digest
+from src.core.processing.mouse_social_video_processing import (
+    SOCIAL_BODYPARTS,
+    SOCIAL_FEATURE_VERSION,
+    SOCIAL_FEATURES,
+    SOCIAL_INDIVIDUALS,
+    analyze_social_behavior,
+)
+from src.core.processing.pose_store import load_pose
+from src.core.processing.reporting import Reporter, use_reporter
+
+
+@pytest.fixture
+def pose_file(tmp_path):
+    path = tmp_path / "miceDLC_el.h5"
+    path.write_bytes(b"pose v1")
+    return str(path)
+
+
+def test_feature_cache_round_trip_and_key(tmp_path, pose_file):
+    cache = FeatureCache(str(tmp_path / "cache"), pose_file, version=1, params={"fps": 30.0})
+    assert cache.load() is None
+
+    arrays = {"distance": np.arange(5.0), "valid": np.array([True, False, True, True, False])}
+    loaded = cache.save(arrays)
+
+    assert set(loaded) == set(arrays)
+    for name, values in arrays.items():
+        np.testing.assert_array_equal(loaded[name], values)
+        assert loaded[name].dtype == values.dtype
+    np.testing.assert_array_equal(cache.load()["distance"], arrays["distance"])
+
+    # 版本、参数或文件内容变化时键改变
+    assert FeatureCache(cache.directory, pose_file, 2, {"fps": 30.0}).load() is None
+    assert FeatureCache(cache.directory, pose_file, 1, {"fps": 60.0}).load() is None
+    digest = pose_digest(pose_file)
+    with open(pose_file, "ab") as handle:
+        handle.write(b" edited")
+    assert pose_digest(pose_file) != digest
+    assert cache.load() is None
+
+    # 新键写入后清理旧键
+    cache.save(arrays)
+    assert len([name for name in (tmp_path / "cache").iterdir()]) == 1
+
+
+@pytest.mark.parametrize("chunk_frames", [None, 301])
+def test_social_feature_cache_hit_matches_full_run(tmp_path, pose_file, chunk_frames, social_pose):
+    pose = social_pose(2000)
+    cache = FeatureCache(
+        str(tmp_path / "cache"), pose_file, SOCIAL_FEATURE_VERSION, {"fps": 30.0}
+    )
+
+    first_df, _ = analyze_social_behavior(
+        pose, 0.6, 0.5, 35.0, 30.0, chunk_frames=chunk_frames,
+        frame_dir=str(tmp_path / "frames1"), feature_cache=cache,
+    )
+    assert set(cache.load()) == set(SOCIAL_FEATURES)
+
+    # 命中缓存时不再读取姿态数据, 换阈值只重做判定和段合并
+    for threshold in (0.6, 0.8):
+        cached_df, cached = analyze_social_behavior(
+            None, threshold, 0.5, 35.0, 30.0, chunk_frames=chunk_frames,
+            frame_dir=str(tmp_path / "frames2"), feature_cache=cache,
+        )
+        expected_df, expected = analyze_social_behavior(
+            social_pose(2000), threshold, 0.5, 35.0, 30.0, chunk_frames=chunk_frames,
+            frame_dir=str(tmp_path / "frames3"),
+        )
+        pd.testing.assert_frame_equal(cached_df, expected_df)
+        for key in ("distance", "mouse1_angle", "speeds_mouse2", "behavior_data"):
+            np.testing.assert_array_equal(cached[key], expected[key])
+        np.testing.assert_array_equal(cached["positions"]["mouse1_x"], expected["positions"]["mouse1_x"])
+    pd.testing.assert_frame_equal(first_df, analyze_social_behavior(
+        social_pose(2000), 0.6, 0.5, 35.0, 30.0
+    )[0])
+
+
+def test_process_skips_pose_loading_on_cache_hit(tmp_path, monkeypatch, write_dlc_csv):
+    from src.core.processing import mouse_social_video_processing as social
+
+    video = tmp_path / "mice.mp4"
+    video.write_bytes(b"")
+    write_dlc_csv(
+        tmp_path / "miceDLC_resnet50_el.csv", list(SOCIAL_INDIVIDUALS), list(SOCIAL_BODYPARTS),
+        n_frames=300,
+    )
+    results_dir = tmp_path / "mice_results"
+    outputs = ("behavior_analysis.csv", "detailed_data.csv")
+    loads = []
+    monkeypatch.setattr(social, "load_pose", lambda *a, **k: loads.append(a) or load_pose(*a, **k))
+
+    events = []
+    with use_reporter(Reporter([events.append])):
+        social.process_mouse_social_video(str(video), threshold=0.5, min_duration_sec=0.1)
+        first = [(results_dir / name).read_bytes() for name in outputs]
+        social.process_mouse_social_video(str(video), threshold=0.5, min_duration_sec=0.1)
+
+    assert len(loads) == 1
+    assert sum(e.message.startswith("分析完成") for e in events) == 2
+    assert "error" not in [e.kind for e in events]
+    assert [(results_dir / name).read_bytes() for name in outputs] == first
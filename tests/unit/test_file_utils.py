@@ -27,3 +27,22 @@ def test_safe_join_rejects_traversal(tmp_path):
     root.mkdir()
     with pytest.raises(ValueError):
         safe_join(str(root), "..", "outside.txt")
+
+
+def test_select_video_files_skips_labeled_videos(tmp_path, monkeypatch):
+    from src.core.utils import file_utils
+
+    for name in ("a.mp4", "b.MP4", "aDLC_resnet50_labeled.mp4", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    offered = {}
+
+    def fake_multiselect(label, options, help=None):
+        offered["options"] = options
+        return options
+
+    monkeypatch.setattr(file_utils.st, "multiselect", fake_multiselect)
+    selected = file_utils.select_video_files(str(tmp_path))
+
+    assert sorted(offered["options"]) == ["a.mp4", "b.MP4"]
+    assert sorted(selected) == sorted(str(tmp_path / f) for f in ("a.mp4", "b.MP4"))
+    assert not (tmp_path / ".pose_cache").exists()
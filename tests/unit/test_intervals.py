@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.processing.intervals import IntervalSet, bout_intervals
+from src.core.processing.mouse_grooming_video_processing import analyze_grooming_behavior
+from src.core.processing.mouse_social_video_processing import analyze_social_behavior
+
+
+def _random_set(rng, n_frames):
+    return IntervalSet.from_mask(rng.random(n_frames).repeat(3)[:n_frames] < 0.4)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_set_algebra_matches_frame_masks(seed):
+    rng = np.random.default_rng(seed)
+    n_frames = 500
+    a, b = _random_set(rng, n_frames), _random_set(rng, n_frames)
+    mask_a, mask_b = a.mask(n_frames), b.mask(n_frames)
+
+    assert (a | b) == IntervalSet.from_mask(mask_a | mask_b)
+    assert (a & b) == IntervalSet.from_mask(mask_a & mask_b)
+    assert (a - b) == IntervalSet.from_mask(mask_a & ~mask_b)
+    assert a.complement(0, n_frames) == IntervalSet.from_mask(~mask_a)
+    assert (a & b).total + (a - b).total == a.total
+
+    values = rng.normal(size=n_frames)
+    assert a.mean(values) == pytest.approx(values[mask_a].mean())
+
+
+def test_mean_ignores_nan_and_checks_bounds():
+    values = np.arange(10.0)
+    values[1] = np.nan
+    assert IntervalSet([5], [8]).mean(values) == 6.0
+
+    values[6] = np.nan
+    expected = np.nanmean(values[[0, 1, 2, 5, 6, 7]])
+    assert IntervalSet([0, 5], [3, 8]).mean(values) == pytest.approx(expected)
+    assert np.isnan(IntervalSet([6], [7]).mean(values))
+    with pytest.raises(ValueError):
+        IntervalSet([5], [11]).mean(values)
+
+
+def test_normalization_gaps_and_summary():
+    intervals = IntervalSet([10, 0, 5, 30, 40], [20, 5, 8, 30, 44])
+
+    assert list(intervals.start) == [0, 10, 40] and list(intervals.stop) == [8, 20, 44]
+    assert IntervalSet([0], [5]) & IntervalSet([5], [9]) == IntervalSet()
+    closed = intervals.close_gaps(2)
+    assert list(closed.start) == [0, 40] and list(closed.stop) == [20, 44]
+    assert intervals.filter_duration(5, 9) == IntervalSet([0], [8])
+    assert intervals.summary(fps=2.0) == {
+        "count": 3,
+        "total": 11.0,
+        "mean_duration": 11.0 / 3,
+        "weighted_mean_duration": (64 + 100 + 16) / 22 / 2.0,
+    }
+    with pytest.raises(ValueError):
+        IntervalSet([0, 1], [2])
+
+
+def test_analysis_returns_intervals_on_request(social_pose):
+    rng = np.random.default_rng(0)
+    n_frames = 600
+    columns = pd.MultiIndex.from_product(
+        [["nose", "leftPaw", "rightPaw", "mouth"], ["x", "y", "likelihood"]]
+    )
+    df = pd.DataFrame(np.ones((n_frames, 12)), columns=columns)
+    near = (rng.random(60) < 0.5).repeat(10)
+    for paw in ("leftPaw", "rightPaw"):
+        df[(paw, "x")] = np.where(near, 1.0, 100.0)
+
+    results, intervals = analyze_grooming_behavior(df, 0.5, 5, 50, intervals=True)
+
+    assert not results.empty
+    assert list(intervals) == ["grooming"]
+    assert intervals["grooming"] == IntervalSet(results["start_frame"], results["end_frame"])
+    pd.testing.assert_frame_equal(analyze_grooming_behavior(df, 0.5, 5, 50), results)
+    assert not results.attrs
+    # 区间按需从表中计算, 过滤后的表得到过滤后的区间
+    long_bouts = results[results["duration"] > results["duration"].median()]
+    assert bout_intervals(long_bouts, ["grooming"])["grooming"] == IntervalSet(
+        long_bouts["start_frame"], long_bouts["end_frame"]
+    )
+
+    social_df, context = analyze_social_behavior(social_pose(), 0.5, 0.5, 35.0, 30.0)
+    assert not social_df.empty
+    for label in ("interaction", "proximity"):
+        bouts = social_df[social_df["behavior_type"] == label]
+        assert context["intervals"][label] == IntervalSet(
+            bouts["start_frame"], bouts["end_frame"] + 1
+        )
+
+    social = pd.DataFrame({
+        "behavior_type": ["interaction", "proximity", "interaction"],
+        "start_frame": [0, 10, 20],
+        "end_frame": [9, 14, 29],
+    })
+    by_label = bout_intervals(social, ["interaction", "proximity"], "behavior_type", inclusive=True)
+    assert by_label["interaction"] == IntervalSet([0, 20], [10, 30])
+    assert by_label["proximity"] == IntervalSet([10], [15])
+    assert bout_intervals(pd.DataFrame(), ["a", "b"], "behavior_type")["a"] == IntervalSet()
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from src.core.processing.labels import LABEL_DTYPE, LabelTable
+
+
+def test_label_table_round_trip():
+    table = LabelTable(("interaction", "proximity", "none"))
+    labels = np.array(["none", "interaction", "none", "proximity"], dtype=object)
+
+    codes = table.encode(labels)
+
+    assert codes.dtype == LABEL_DTYPE
+    assert codes.tolist() == [2, 0, 2, 1]
+    assert table.decode(codes).tolist() == labels.tolist()
+    assert table.encode(codes) is codes
+    assert table.counts(codes) == {"interaction": 1, "proximity": 1, "none": 2}
+    assert table.full(3, "proximity").tolist() == [1, 1, 1]
+
+
+def test_label_table_rejects_bad_input():
+    table = LabelTable(("drug", "saline"))
+    with pytest.raises(ValueError):
+        table.encode(np.array(["drug", "water"]))
+    with pytest.raises(ValueError):
+        table.encode(np.array([0, 2]))
+    with pytest.raises(ValueError):
+        table.code("water")
+    with pytest.raises(ValueError):
+        LabelTable(("a", "a"))
+    assert table.encode(np.array([], dtype=object)).size == 0
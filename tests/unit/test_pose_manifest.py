@@ -0,0 +1,123 @@
+import json
+import os
+
+from src.core.processing import pose_manifest
+from src.core.processing.pose_manifest import (
+    PoseManifest,
+    find_pose_file,
+    get_manifest,
+    list_pose_files,
+)
+from src.core.processing.pose_store import POSE_CACHE_DIRNAME, resolve_pose_file
+
+
+def _age(path, seconds=60):
+    """把目录修改时间往前调, 使其脱离不稳定窗口"""
+    stat = os.stat(path)
+    mtime_ns = stat.st_mtime_ns - seconds * 10**9
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_find_pose_file_prefers_h5(tmp_path):
+    video = tmp_path / "mouse1.mp4"
+    video.write_bytes(b"")
+    (tmp_path / "mouse1DLC_resnet50_el.csv").write_text("", encoding="utf-8")
+    assert find_pose_file(str(video), suffix="_el").endswith(".csv")
+
+    (tmp_path / "mouse1DLC_resnet50_el.h5").write_bytes(b"")
+    assert find_pose_file(str(video), suffix="_el").endswith(".h5")
+    assert find_pose_file(str(video), suffix="00000") is None
+    assert resolve_pose_file(str(tmp_path / "mouse1DLC_resnet50_el")).endswith(".h5")
+
+
+def test_list_pose_files_dedupes_and_skips_hidden(tmp_path):
+    for name in ("aDLC_00000.h5", "aDLC_00000.csv", "bDLC_00000.csv", "c_filtered.csv"):
+        (tmp_path / name).write_text("", encoding="utf-8")
+    hidden = tmp_path / POSE_CACHE_DIRNAME
+    hidden.mkdir()
+    (hidden / "dDLC_00000.csv").write_text("", encoding="utf-8")
+
+    found = list_pose_files(str(tmp_path), suffix="00000", recursive=True)
+    assert [os.path.basename(p) for p in found] == ["aDLC_00000.h5", "bDLC_00000.csv"]
+
+
+def test_find_pose_file_matches_header_not_scorer(tmp_path, write_dlc_csv):
+    video = tmp_path / "mouse1.mp4"
+    video.write_bytes(b"")
+    write_dlc_csv(
+        tmp_path / "mouse1DLC_resnet50_TCMar1shuffle1_1000.csv", None, ["tail"]
+    )
+    groom = tmp_path / "mouse1DLC_hrnet_GroomingApr2shuffle2_2000.csv"
+    write_dlc_csv(groom, None, ["nose", "mouth"])
+
+    assert find_pose_file(str(video), bodyparts=["mouth", "nose"]) == str(groom)
+    assert find_pose_file(str(video), bodyparts=["paw"]) is None
+    assert find_pose_file(str(video), individuals=["individual1"]) is None
+    assert list_pose_files(str(tmp_path), bodyparts=["mouth"]) == [str(groom)]
+
+
+def test_manifest_maps_video_outputs(tmp_path):
+    for name in (
+        "m1.mp4",
+        "m1DLC_resnet50_00000.h5",
+        "m1DLC_resnet50_00000.csv",
+        "m1DLC_resnet50_00000_labeled.mp4",
+        "m2.MP4",
+    ):
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "m1_results").mkdir()
+
+    manifest = get_manifest(str(tmp_path))
+    assert [os.path.basename(v) for v in manifest.videos()] == ["m1.mp4", "m2.MP4"]
+    outputs = manifest.outputs(str(tmp_path / "m1.mp4"))
+    assert [os.path.basename(p) for p in outputs.pose_files] == [
+        "m1DLC_resnet50_00000.h5"
+    ]
+    assert outputs.labeled_video.endswith("_labeled.mp4")
+    assert outputs.results_dir == str(tmp_path / "m1_results")
+    assert manifest.outputs(str(tmp_path / "m2.MP4")).results_dir is None
+
+    with open(manifest.manifest_path, encoding="utf-8") as handle:
+        saved = json.load(handle)
+    assert saved["videos"]["m1.mp4"]["results_dir"] == "m1_results"
+
+
+def test_manifest_rescans_only_changed_dirs(tmp_path, monkeypatch):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "v.mp4").write_bytes(b"")
+    for path in (tmp_path, tmp_path / "a", tmp_path / "b"):
+        _age(path)
+    manifest = PoseManifest(str(tmp_path))
+    manifest.refresh()
+    manifest.save()
+    _age(tmp_path)  # 创建 .pose_cache 会更新根目录的修改时间
+    assert manifest.refresh()
+    manifest.save()
+
+    scanned = []
+    original = PoseManifest._scan
+
+    def spy(self, rel_dir, mtime_ns):
+        scanned.append(rel_dir)
+        return original(self, rel_dir, mtime_ns)
+
+    monkeypatch.setattr(PoseManifest, "_scan", spy)
+    reloaded = PoseManifest(str(tmp_path))
+    assert reloaded.load()
+    assert not reloaded.refresh()
+    assert scanned == []
+
+    (tmp_path / "b" / "vDLC_x.csv").write_text("", encoding="utf-8")
+    assert reloaded.refresh()
+    assert scanned == ["b"]
+    assert reloaded.list_pose_files(recursive=True) == [
+        str(tmp_path / "b" / "vDLC_x.csv")
+    ]
+    assert reloaded.videos(recursive=True) == [str(tmp_path / "a" / "v.mp4")]
+    assert reloaded.videos() == []
+
+
+def test_get_manifest_shared_within_process(tmp_path):
+    pose_manifest._manifests.clear()
+    assert get_manifest(str(tmp_path)) is get_manifest(str(tmp_path))
@@ -0,0 +1,206 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.processing.pose_store import (
+    POSE_CACHE_DIRNAME,
+    get_pose_schema,
+    load_pose,
+    sniff_pose_schema,
+)
+
+
+def test_single_animal_matches_read_csv(tmp_path, write_dlc_csv):
+    path = tmp_path / "videoDLC_test.csv"
+    write_dlc_csv(path, None, ["nose", "leftPaw"])
+
+    pose = load_pose(str(path))
+    expected = pd.read_csv(path, header=[1, 2])
+
+    assert not pose.multi_animal
+    assert pose.bodyparts == ("nose", "leftPaw")
+    assert pose.values.dtype == np.float64
+    frame = pose.to_frame(include_scorer=False)
+    np.testing.assert_array_equal(
+        frame["leftPaw"]["likelihood"].values,
+        expected["leftPaw"]["likelihood"].values,
+    )
+
+
+def test_likelihood_keeps_read_csv_precision(tmp_path):
+    path = tmp_path / "videoDLC_test.csv"
+    path.write_text(
+        "scorer,DLC,DLC,DLC\nbodyparts,nose,nose,nose\ncoords,x,y,likelihood\n"
+        "0,1.0,2.0,0.99900001\n1,1.0,2.0,0.999\n",
+        encoding="utf-8",
+    )
+
+    for _ in range(2):  # 解析结果与缓存命中结果
+        likelihood = load_pose(str(path)).coords(["nose"])["nose"]["likelihood"]
+        assert list(likelihood > 0.999) == [True, False]
+
+
+def test_multi_animal_columns(tmp_path, write_dlc_csv):
+    path = tmp_path / "socialDLC_el.csv"
+    scorer, data = write_dlc_csv(
+        path, ["individual1", "individual2"], ["Mouth", "left-ear"]
+    )
+
+    pose = load_pose(str(path))
+    frame = pose.to_frame()
+
+    assert pose.multi_animal
+    assert pose.scorer == scorer
+    assert pose.values.shape == (20, 2, 2, 3)
+    np.testing.assert_allclose(
+        frame[(scorer, "individual2", "left-ear", "y")].values, data[:, 10], rtol=1e-6
+    )
+
+
+def test_cache_reused_and_invalidated(tmp_path, write_dlc_csv):
+    path = tmp_path / "videoDLC_test.csv"
+    write_dlc_csv(path, None, ["nose"])
+
+    first = load_pose(str(path))
+    cache_dir = tmp_path / POSE_CACHE_DIRNAME
+    assert isinstance(first.values, np.memmap)
+    assert len(list(cache_dir.glob("*.npy"))) == 1
+
+    second = load_pose(str(path))
+    np.testing.assert_array_equal(first.values, second.values)
+
+    write_dlc_csv(path, None, ["nose"], seed=1)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    third = load_pose(str(path))
+    assert not np.array_equal(first.values, third.values)
+    assert len(list(cache_dir.glob("*.npy"))) == 1
+
+
+def test_h5_matches_csv(tmp_path, write_dlc_csv):
+    pytest.importorskip("tables")
+    csv_path = tmp_path / "videoDLC_test.csv"
+    write_dlc_csv(csv_path, None, ["nose", "tail"])
+    df = pd.read_csv(csv_path, header=[0, 1, 2], index_col=0)
+    df.columns = df.columns.set_names(["scorer", "bodyparts", "coords"])
+    h5_path = tmp_path / "videoDLC_test.h5"
+    df.to_hdf(h5_path, key="df_with_missing")
+
+    from_csv = load_pose(str(csv_path), use_cache=False)
+    from_h5 = load_pose(str(h5_path), use_cache=False)
+    np.testing.assert_array_equal(from_csv.values, from_h5.values)
+    assert from_h5.bodyparts == from_csv.bodyparts
+
+
+def test_h5_and_csv_caches_coexist(tmp_path, write_dlc_csv):
+    pytest.importorskip("tables")
+    csv_path = tmp_path / "videoDLC_test.csv"
+    write_dlc_csv(csv_path, None, ["nose"])
+    df = pd.read_csv(csv_path, header=[0, 1, 2], index_col=0)
+    df.columns = df.columns.set_names(["scorer", "bodyparts", "coords"])
+    h5_path = tmp_path / "videoDLC_test.h5"
+    df.to_hdf(h5_path, key="df_with_missing")
+
+    load_pose(str(csv_path))
+    load_pose(str(h5_path))
+
+    cached = sorted(p.name for p in (tmp_path / POSE_CACHE_DIRNAME).glob("*.npy"))
+    assert [name.rsplit("-", 1)[0] for name in cached] == ["videoDLC_test.csv", "videoDLC_test.h5"]
+
+
+def test_rejects_non_dlc_csv(tmp_path):
+    path = tmp_path / "plain.csv"
+    path.write_text("a,b\n1,2\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_pose(str(path), use_cache=False)
+
+
+def test_projection_matches_full_load(tmp_path, write_dlc_csv):
+    path = tmp_path / "socialDLC_el.csv"
+    write_dlc_csv(
+        path, ["individual1", "individual2"], ["Mouth", "left-ear", "right-ear"]
+    )
+    full = load_pose(str(path))
+
+    for use_cache in (True, False):
+        projected = load_pose(
+            str(path),
+            individuals=["individual2"],
+            bodyparts=["right-ear", "Mouth"],
+            fields=["x", "likelihood"],
+            use_cache=use_cache,
+        )
+        assert projected.values.shape == (20, 1, 2, 2)
+        assert projected.values.flags["C_CONTIGUOUS"]
+        assert projected.bodyparts == ("right-ear", "Mouth")
+        np.testing.assert_array_equal(
+            projected.get("right-ear", "likelihood", "individual2"),
+            full.get("right-ear", "likelihood", "individual2"),
+        )
+
+
+def test_projection_unknown_bodypart(tmp_path, write_dlc_csv):
+    path = tmp_path / "videoDLC_test.csv"
+    write_dlc_csv(path, None, ["nose"])
+    with pytest.raises(KeyError):
+        load_pose(str(path), bodyparts=["tail"], use_cache=False)
+
+
+def test_sniff_reads_header_only(tmp_path, write_dlc_csv):
+    path = tmp_path / "socialDLC_el.csv"
+    scorer, _ = write_dlc_csv(path, ["individual1", "individual2"], ["Mouth", "tail"])
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write("not,a,number\n")
+
+    schema = sniff_pose_schema(str(path))
+    assert schema.scorer == scorer
+    assert schema.multi_animal
+    assert schema.header_rows == 4
+    assert schema.individuals == ("individual1", "individual2")
+    assert schema.bodyparts == ("Mouth", "tail")
+    assert schema.column_index("tail", "y", "individual2") == 10
+    assert schema.column_map[("individual1", "Mouth", "likelihood")] == 2
+    with pytest.raises(KeyError):
+        schema.column_index("nose", "x")
+
+
+def test_sniff_h5_matches_csv(tmp_path, write_dlc_csv):
+    pytest.importorskip("tables")
+    csv_path = tmp_path / "videoDLC_test.csv"
+    write_dlc_csv(csv_path, None, ["nose", "tail"])
+    df = pd.read_csv(csv_path, header=[0, 1, 2], index_col=0)
+    df.columns = df.columns.set_names(["scorer", "bodyparts", "coords"])
+    h5_path = tmp_path / "videoDLC_test.h5"
+    df.to_hdf(h5_path, key="df_with_missing")
+
+    from_csv = sniff_pose_schema(str(csv_path))
+    from_h5 = sniff_pose_schema(str(h5_path))
+    assert from_h5.columns == from_csv.columns
+    assert from_h5.scorer == from_csv.scorer
+    assert from_h5.header_rows == 0
+
+
+def test_load_with_sniffed_schema(tmp_path, write_dlc_csv):
+    path = tmp_path / "videoDLC_test.csv"
+    write_dlc_csv(path, None, ["nose", "tail"])
+    schema = sniff_pose_schema(str(path))
+
+    pose = load_pose(str(path), bodyparts=["tail"], schema=schema, use_cache=False)
+    expected = pd.read_csv(path, header=[1, 2])
+    np.testing.assert_allclose(
+        pose.get("tail", "x"), expected["tail"]["x"].values, rtol=1e-6
+    )
+
+
+def test_get_pose_schema_cached_per_file_version(tmp_path, write_dlc_csv):
+    path = tmp_path / "videoDLC_test.csv"
+    write_dlc_csv(path, None, ["nose"])
+    first = get_pose_schema(str(path))
+    assert get_pose_schema(str(path)) is first
+
+    write_dlc_csv(path, None, ["nose", "tail"])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert get_pose_schema(str(path)).bodyparts == ("nose", "tail")
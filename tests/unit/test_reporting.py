@@ -0,0 +1,108 @@
+import logging
+import subprocess
+import sys
+from pathlib import Path
+
+import streamlit
+
+from src.core.processing.mouse_grooming_video_processing import process_grooming_files
+from src.core.processing.mouse_social_video_processing import analyze_social_behavior
+from src.core.processing.reporting import (
+    Reporter,
+    ReportEvent,
+    get_reporter,
+    report,
+    streamlit_sink,
+    use_reporter,
+)
+
+def test_compute_layer_emits_events_to_active_reporter(social_pose):
+    events = []
+
+    with use_reporter(Reporter([events.append])) as reporter:
+        assert get_reporter() is reporter
+        analyze_social_behavior(
+            social_pose(600), threshold=0.5, min_duration_sec=0.5,
+            max_duration_sec=35.0, fps=30.0,
+        )
+
+    assert get_reporter() is not reporter
+    writes = [e for e in events if e.kind == "write"]
+    assert writes[0].message.startswith("使用的个体:")
+    assert writes[0].data["objects"][1] == ["individual1", "individual2"]
+    assert any(e.message.startswith("总帧数") for e in writes)
+
+
+def test_default_reporter_logs(caplog):
+    with caplog.at_level(logging.INFO, logger="src.core.processing.reporting"):
+        report.warning("坐标缺失 / missing coordinates")
+        report.images([[("/nonexistent.png", "图 / Figure", None)]])
+
+    assert ("src.core.processing.reporting", logging.WARNING,
+            "坐标缺失 / missing coordinates") in caplog.record_tuples
+    assert any("/nonexistent.png" in message for message in caplog.messages)
+
+
+def test_reporter_fans_out_to_subscribers():
+    first, second = [], []
+    reporter = Reporter([first.append])
+    reporter.subscribe(second.append)
+
+    reporter.table([1, 2], "结果 / Results")
+
+    assert first == second == [ReportEvent("table", "结果 / Results", {"frame": [1, 2]})]
+
+
+def test_default_reporter_is_not_shared():
+    events = []
+    get_reporter().subscribe(events.append)
+
+    report.info("不应被订阅者收到 / not delivered")
+
+    assert events == []
+
+
+def test_file_loops_report_progress(tmp_path):
+    for name in ("a.mp4", "b.mp4"):
+        (tmp_path / name).write_bytes(b"")
+    events = []
+
+    with use_reporter(Reporter([events.append])):
+        process_grooming_files(str(tmp_path))
+
+    progress = [(e.data["done"], e.data["total"], e.message) for e in events if e.kind == "progress"]
+    assert progress == [(0, 2, ""), (1, 2, "a.mp4"), (2, 2, "b.mp4")]
+
+
+def test_streamlit_sink_reuses_one_progress_bar(monkeypatch):
+    bars = []
+
+    class FakeBar:
+        def __init__(self, value, text):
+            self.values = [(value, text)]
+
+        def progress(self, value, text=None):
+            self.values.append((value, text))
+
+    def fake_progress(value, text=None):
+        bars.append(FakeBar(value, text))
+        return bars[-1]
+
+    monkeypatch.setattr(streamlit, "progress", fake_progress)
+    reporter = Reporter([streamlit_sink])
+    for done in range(3):
+        reporter.progress(done, 2, "a.mp4" if done else "")
+    reporter.progress(1, 1)
+
+    assert len(bars) == 2
+    assert bars[0].values == [(0.0, "0/2"), (0.5, "a.mp4 (1/2)"), (1.0, "a.mp4 (2/2)")]
+    assert bars[1].values == [(1.0, "1/1")]
+
+
+def test_processing_package_imports_without_streamlit():
+    code = "import sys, src.core.processing; print('streamlit' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).resolve().parents[2],
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,125 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from src.core.processing.mouse_social_video_processing import (
+    SOCIAL_LABEL_TABLE,
+    analyze_bout_duration,
+    determine_social_type,
+    smooth_behavior_sequence,
+)
+
+
+def _majority_loop(behavior_arr, window_size):
+    """原始的逐帧 Counter 实现, 作为等价性参照"""
+    smoothed = behavior_arr.copy()
+    half_w = window_size // 2
+    for i in range(len(behavior_arr)):
+        window = behavior_arr[max(0, i - half_w):min(len(behavior_arr), i + half_w + 1)]
+        smoothed[i] = Counter(window).most_common(1)[0][0]
+    return smoothed
+
+
+@pytest.mark.parametrize("window_size", [1, 4, 15, 30])
+def test_smooth_behavior_sequence_matches_counter(window_size):
+    rng = np.random.default_rng(window_size)
+    labels = np.array(["none", "proximity", "interaction"], dtype=object)
+    # 成段的标签加单帧抖动, 窗口内经常出现平票
+    runs = rng.integers(0, 3, 200).repeat(rng.integers(1, 12, 200))
+    behavior = labels[runs]
+    flips = rng.random(len(behavior)) < 0.2
+    behavior[flips] = labels[rng.integers(0, 3, flips.sum())]
+
+    result = smooth_behavior_sequence(behavior, window_size=window_size)
+
+    assert result.dtype == behavior.dtype
+    assert result.tolist() == _majority_loop(behavior, window_size).tolist()
+
+
+def test_smooth_behavior_sequence_keeps_original_labels():
+    behavior = np.array([None, "a", None, "a", "b", "b", None], dtype=object)
+
+    result = smooth_behavior_sequence(behavior, window_size=3)
+
+    assert result.tolist() == _majority_loop(behavior, 3).tolist()
+    assert result[0] is None
+    assert smooth_behavior_sequence(np.array([], dtype=object)).size == 0
+
+
+def test_social_labels_are_int8_codes_end_to_end():
+    rng = np.random.default_rng(0)
+    n_frames = 600
+    distance = np.repeat(rng.uniform(50, 150, 30), 20)
+    angles = {
+        "mouse1_angle": np.repeat(rng.uniform(0, 90, 40), 15),
+        "mouse2_angle": np.repeat(rng.uniform(0, 90, 60), 10),
+    }
+
+    codes = smooth_behavior_sequence(determine_social_type(distance, angles), 15)
+    frames = {
+        "valid_frames": rng.random(n_frames) < 0.95,
+        "mouse_distance": distance,
+        "facing_angles": angles,
+        "social_types": codes,
+    }
+    text_frames = dict(frames, social_types=SOCIAL_LABEL_TABLE.decode(codes))
+
+    assert codes.dtype == np.int8
+    bouts = analyze_bout_duration(frames, 0.5, 35.0, 30.0)
+    assert bouts
+    assert bouts == analyze_bout_duration(text_frames, 0.5, 35.0, 30.0)
+    assert {b["behavior_type"] for b in bouts} <= {"interaction", "proximity"}
+
+
+def _bout_loop(social_frames, min_duration_sec, fps):
+    """原始的逐帧合并实现 (每个间隔帧向后扫描 2 秒), 作为等价性参照"""
+    valid = social_frames["valid_frames"]
+    types = SOCIAL_LABEL_TABLE.decode(SOCIAL_LABEL_TABLE.encode(social_frames["social_types"]))
+    n = len(valid)
+    gap = int(2 * fps)
+    min_frames = int(min_duration_sec * fps)
+
+    def can_merge(i, behavior):
+        return any(valid[j] and types[j] == behavior for j in range(i, min(i + gap, n)))
+
+    bouts, start, current = [], None, None
+    for i in range(n + 1):
+        if i < n and valid[i] and types[i] != "none":
+            if start is None:
+                start, current = i, types[i]
+                continue
+            if types[i] == current or can_merge(i, current):
+                continue
+        elif start is None or (i < n and can_merge(i, current)):
+            continue
+        if i - start >= min_frames:
+            bouts.append((current, start, i - 1))
+        start, current = None, None
+        if i < n and valid[i] and types[i] != "none":
+            start, current = i, types[i]
+    return bouts
+
+
+@pytest.mark.parametrize("fps", [0.4, 5.0, 30.0])
+@pytest.mark.parametrize("chunk_frames", [None, 97, 1000])
+def test_analyze_bout_duration_matches_frame_loop(fps, chunk_frames):
+    rng = np.random.default_rng(int(fps * 10))
+    runs = rng.integers(0, 3, 400)
+    codes = runs.repeat(rng.integers(1, 40, 400)).astype(np.int8)
+    n_frames = len(codes)
+    frames = {
+        "valid_frames": rng.random(n_frames) < 0.9,
+        "mouse_distance": rng.uniform(0, 200, n_frames),
+        "facing_angles": {
+            "mouse1_angle": rng.uniform(0, 180, n_frames),
+            "mouse2_angle": rng.uniform(0, 180, n_frames),
+        },
+        "social_types": codes,
+    }
+
+    bouts = analyze_bout_duration(frames, 0.5, 35.0, fps, chunk_frames=chunk_frames)
+
+    expected = _bout_loop(frames, 0.5, fps)
+    assert len(expected) > 5
+    assert [(b["behavior_type"], b["start_frame"], b["end_frame"]) for b in bouts] == expected
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from src.core.processing.mouse_social_video_processing import (
+    SOCIAL_BODYPARTS,
+    calculate_angle,
+    detect_group_social_frames,
+    determine_social_type,
+)
+from src.core.processing.social_geometry import neighbor_pairs, social_geometry
+
+INDIVIDUALS = [f"individual{k}" for k in range(1, 6)]
+
+
+def _group_coords(n_frames=400, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = {}
+    for ind in INDIVIDUALS:
+        center = rng.uniform(0, 300, (n_frames, 2))
+        for bp in SOCIAL_BODYPARTS:
+            xy = center + rng.normal(0, 10, (n_frames, 2))
+            coords[f"{ind}_{bp}"] = {
+                "x": xy[:, 0], "y": xy[:, 1], "likelihood": rng.uniform(0.5, 1.0, n_frames)
+            }
+    return coords
+
+
+def _pair_reference(coords, a, b):
+    """按原两只小鼠的写法逐对计算"""
+    def ears(ind, field):
+        return (coords[f"{ind}_right-ear"][field] + coords[f"{ind}_left-ear"][field]) / 2.0
+
+    ma, mb = coords[f"{a}_Mouth"], coords[f"{b}_Mouth"]
+    dist = np.sqrt(np.square(ma["x"] - mb["x"]) + np.square(ma["y"] - mb["y"]))
+    conn = (ears(b, "x") - ears(a, "x"), ears(b, "y") - ears(a, "y"))
+    angle_a = calculate_angle((ma["x"] - ears(a, "x"), ma["y"] - ears(a, "y")), conn)
+    angle_b = calculate_angle((mb["x"] - ears(b, "x"), mb["y"] - ears(b, "y")), (-conn[0], -conn[1]))
+    return dist, angle_a, angle_b
+
+
+def test_pairwise_geometry_matches_two_mouse_formulas():
+    coords = _group_coords()
+    geometry = social_geometry(coords, INDIVIDUALS)
+
+    assert geometry.distance.shape == (400, 5, 5)
+    assert np.isnan(geometry.distance[:, 2, 2]).all()
+    for a in INDIVIDUALS:
+        for b in INDIVIDUALS:
+            if a == b:
+                continue
+            dist, angle_a, angle_b = geometry.pair(a, b)
+            expected = _pair_reference(coords, a, b)
+            np.testing.assert_array_equal(dist, expected[0])
+            np.testing.assert_array_equal(angle_a, expected[1])
+            np.testing.assert_array_equal(angle_b, expected[2])
+
+
+def test_group_social_types_match_pairwise_rule():
+    coords = _group_coords(seed=1)
+    frames = detect_group_social_frames(coords, INDIVIDUALS, threshold=0.7)
+    geometry = frames["geometry"]
+
+    social_types = frames["social_types"]
+    np.testing.assert_array_equal(social_types, social_types.transpose(0, 2, 1))
+    for i in range(5):
+        for j in range(i + 1, 5):
+            dist, angle_i, angle_j = geometry.pair(INDIVIDUALS[i], INDIVIDUALS[j])
+            expected = determine_social_type(
+                dist, {"mouse1_angle": angle_i, "mouse2_angle": angle_j}
+            )
+            np.testing.assert_array_equal(social_types[:, i, j], expected)
+    valid = frames["valid_frames"]
+    assert valid.shape == (400, 5, 5)
+    np.testing.assert_array_equal(valid, valid.transpose(0, 2, 1))
+
+
+@pytest.mark.parametrize("n_individuals", [2, 6, 40])
+def test_neighbor_pairs_kdtree_matches_dense(n_individuals):
+    rng = np.random.default_rng(n_individuals)
+    x = rng.uniform(0, 500, (300, n_individuals))
+    y = rng.uniform(0, 500, (300, n_individuals))
+    x[rng.random(x.shape) < 0.05] = np.nan
+
+    dense = neighbor_pairs(x, y, 80.0)
+    kdtree = neighbor_pairs(x, y, 80.0, method="kdtree")
+
+    assert len(dense[0]) > 0
+    for expected, result in zip(dense, kdtree):
+        np.testing.assert_array_equal(result, expected)
+    with pytest.raises(ValueError):
+        neighbor_pairs(x, y, 80.0, method="grid")
+
+
+@pytest.mark.parametrize("seed", [2, 3])
+def test_group_kdtree_matches_dense(seed):
+    coords = _group_coords(seed=seed)
+    coords["individual3_Mouth"]["x"][::7] = np.nan
+    dense = detect_group_social_frames(coords, INDIVIDUALS, threshold=0.7)
+    sparse = detect_group_social_frames(coords, INDIVIDUALS, threshold=0.7, method="kdtree")
+
+    assert "geometry" not in sparse
+    np.testing.assert_array_equal(sparse["valid_frames"], dense["valid_frames"])
+    np.testing.assert_array_equal(sparse["social_types"], dense["social_types"])
+    neighbors = sparse["neighbors"]
+    geometry = dense["geometry"]
+    assert len(neighbors.frame) > 0
+    index = (neighbors.frame, neighbors.i, neighbors.j)
+    np.testing.assert_array_equal(neighbors.distance, geometry.distance[index])
+    np.testing.assert_array_equal(neighbors.facing_ij, geometry.facing[index])
+    np.testing.assert_array_equal(
+        neighbors.facing_ji, geometry.facing[neighbors.frame, neighbors.j, neighbors.i]
+    )
+    with pytest.raises(ValueError):
+        detect_group_social_frames(coords, INDIVIDUALS, threshold=0.7, method="grid")
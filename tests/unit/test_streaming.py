@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.processing.mouse_catch_video_processing import analyze_catch_behavior
+from src.core.processing.mouse_social_video_processing import analyze_social_behavior
+from src.core.processing.pose_store import load_pose
+from src.core.processing.streaming import (
+    ValidIndexCursor,
+    iter_frame_chunks,
+    write_frame_csv,
+)
+
+
+def test_iter_frame_chunks_clips_halos():
+    chunks = list(iter_frame_chunks(10, 4, halo_before=2, halo_after=3))
+
+    assert [(c.start, c.stop, c.lo, c.hi) for c in chunks] == [
+        (0, 4, 0, 7),
+        (4, 8, 2, 10),
+        (8, 10, 6, 10),
+    ]
+    assert chunks[1].core == slice(2, 6)
+    with pytest.raises(ValueError):
+        list(iter_frame_chunks(10, 0))
+
+
+def test_valid_index_cursor_brackets_gaps():
+    series = np.array([np.nan, 1.0, np.nan, np.nan, 4.0, np.nan, 6.0, np.nan])
+    cursor = ValidIndexCursor(series, keep=2, block=2)
+
+    assert cursor.before(0) == []
+    assert cursor.after(2) == [(4, 4.0), (6, 6.0)]
+    assert cursor.before(5) == [(1, 1.0), (4, 4.0)]
+    assert cursor.after(7) == []
+
+
+@pytest.mark.parametrize("chunk_frames", [97, 500])
+def test_social_streaming_matches_in_memory(tmp_path, chunk_frames, social_pose):
+    pose = social_pose()
+
+    expected_df, expected = analyze_social_behavior(
+        pose, threshold=0.5, min_duration_sec=0.5, max_duration_sec=35.0, fps=30.0
+    )
+    results_df, context = analyze_social_behavior(
+        pose,
+        threshold=0.5,
+        min_duration_sec=0.5,
+        max_duration_sec=35.0,
+        fps=30.0,
+        chunk_frames=chunk_frames,
+        frame_dir=str(tmp_path),
+    )
+
+    assert not expected_df.empty
+    pd.testing.assert_frame_equal(results_df, expected_df)
+    assert isinstance(context["distance"], np.memmap)
+    for key in ("distance", "mouse1_angle", "mouse2_angle", "speeds_mouse1"):
+        np.testing.assert_array_equal(context[key], expected[key])
+    np.testing.assert_array_equal(
+        context["positions"]["mouse2_x"], expected["positions"]["mouse2_x"]
+    )
+    assert list(context["behavior_data"]) == list(expected["behavior_data"])
+
+
+@pytest.mark.parametrize("chunk_frames", [211, 1000])
+def test_catch_streaming_matches_in_memory(tmp_path, chunk_frames, catch_frame):
+    df = catch_frame()
+
+    expected_df, expected = analyze_catch_behavior(
+        df, threshold=0.6, speed_threshold=100.0, min_duration_sec=0.5,
+        max_duration_sec=1.0, fps=120.0,
+    )
+    columns = {col: df[col].to_numpy() for col in ("x", "y", "likelihood")}
+    results_df, context = analyze_catch_behavior(
+        columns, threshold=0.6, speed_threshold=100.0, min_duration_sec=0.5,
+        max_duration_sec=1.0, fps=120.0, chunk_frames=chunk_frames,
+        frame_dir=str(tmp_path),
+    )
+
+    assert not expected_df.empty
+    pd.testing.assert_frame_equal(results_df, expected_df)
+    for key in ("x_smooth", "y_smooth", "speeds_smooth", "accelerations_smooth"):
+        np.testing.assert_array_equal(context[key], expected[key])
+    assert context["events"] == expected["events"]
+
+
+def test_chunked_cache_matches_full_parse(tmp_path, write_dlc_csv):
+    path = tmp_path / "socialDLC_el.csv"
+    write_dlc_csv(path, ["individual1", "individual2"], ["Mouth"], n_frames=53)
+
+    expected = load_pose(str(path), use_cache=False)
+    pose = load_pose(str(path), chunk_rows=10)
+
+    assert isinstance(pose.values, np.memmap)
+    np.testing.assert_array_equal(pose.values, expected.values)
+
+
+def test_write_frame_csv_matches_to_csv(tmp_path):
+    columns = {"frame": range(25), "value": np.linspace(0, 1, 25, dtype=np.float32)}
+    path = tmp_path / "chunked.csv"
+
+    write_frame_csv(str(path), columns, chunk_frames=7)
+
+    expected = pd.DataFrame({"frame": np.arange(25), "value": columns["value"]})
+    assert path.read_text() == expected.to_csv(index=False)
@@ -0,0 +1,75 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.processing.mouse_catch_video_processing import (
+    analyze_catch_behavior,
+    sweep_catch_parameters,
+)
+from src.core.processing.mouse_social_video_processing import (
+    analyze_social_behavior,
+    sweep_social_parameters,
+)
+from src.core.processing.sweep import bout_summary, parse_sweep_values, plot_sweep_heatmap
+
+
+def test_social_sweep_matches_separate_runs(social_pose):
+    pose = social_pose()
+    sweep = sweep_social_parameters(
+        pose,
+        thresholds=[0.55, 0.7],
+        close_thresholds=[60.0, 100.0],
+        min_durations_sec=[0.5, 2.0],
+        fps=30.0,
+    )
+
+    assert len(sweep) == 8
+    assert sweep["n_bouts"].sum() > 0
+    # 默认距离 / 朝向阈值下的每一行应与单独运行 analyze_social_behavior 一致
+    for row in sweep[sweep["close_threshold"] == 100.0].itertuples():
+        results_df, _ = analyze_social_behavior(
+            pose, threshold=row.threshold, min_duration_sec=row.min_duration_sec,
+            max_duration_sec=35.0, fps=30.0,
+        )
+        durations = results_df["duration_frames"] if not results_df.empty else []
+        assert row.n_bouts == len(results_df)
+        assert row.total_duration_s == pytest.approx(bout_summary(durations, 30.0)["total_duration_s"])
+        assert row.interaction_bouts == list(results_df.get("behavior_type", [])).count("interaction")
+
+
+def test_catch_sweep_matches_separate_runs(catch_frame):
+    df = catch_frame(3000, min_likelihood=0.3)
+    sweep = sweep_catch_parameters(df, thresholds=[0.5, 0.8], speed_thresholds=[4.0, 150.0])
+
+    assert list(sweep[["threshold", "speed_threshold"]].itertuples(index=False, name=None)) == [
+        (0.5, 4.0), (0.5, 150.0), (0.8, 4.0), (0.8, 150.0)
+    ]
+    for row in sweep.itertuples():
+        results_df, _ = analyze_catch_behavior(
+            df, threshold=row.threshold, speed_threshold=row.speed_threshold,
+            min_duration_sec=0.5, max_duration_sec=1.0, fps=120.0,
+        )
+        assert row.n_bouts == len(results_df)
+        assert row.total_duration_s == pytest.approx(
+            results_df["duration"].sum() if len(results_df) else 0.0
+        )
+
+
+def test_parse_sweep_values_and_heatmap():
+    assert parse_sweep_values("0.6, 0.8，1") == [0.6, 0.8, 1.0]
+    assert parse_sweep_values(" 2 ,") == [2.0]
+    with pytest.raises(ValueError):
+        parse_sweep_values("0.6, high")
+
+    sweep = pd.DataFrame({
+        "threshold": [0.5, 0.5, 0.8, 0.8],
+        "speed_threshold": [50.0, 150.0, 50.0, 150.0],
+        "n_bouts": [3, 4, 1, 2],
+    })
+    fig = plot_sweep_heatmap(sweep, x="threshold", y="speed_threshold")
+    image = fig.axes[0].images[0].get_array()
+    np.testing.assert_array_equal(image, [[3, 1], [4, 2]])
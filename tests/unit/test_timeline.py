@@ -0,0 +1,60 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from src.core.processing.intervals import IntervalSet
+from src.core.processing.mouse_social_video_processing import plot_analysis_results
+from src.core.processing.timeline import plot_timeline, set_time_axis, state_intervals
+
+LABELS = ("interaction", "proximity", "none")
+
+
+def test_state_intervals_cover_each_code():
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 3, 300).repeat(rng.integers(1, 8, 300)).astype(np.int8)
+
+    intervals = state_intervals(codes, LABELS)
+
+    assert list(intervals) == list(LABELS)
+    for code, label in enumerate(LABELS):
+        np.testing.assert_array_equal(intervals[label].mask(len(codes)), codes == code)
+    assert sum(len(spans) for spans in intervals.values()) == 1 + np.count_nonzero(np.diff(codes))
+
+
+def test_plot_timeline_draws_one_bar_per_run():
+    intervals = {
+        "interaction": IntervalSet([0, 10], [5, 12]),
+        "proximity": IntervalSet(),
+        "none": IntervalSet([5], [10]),
+    }
+    fig, ax = plt.subplots()
+    plot_timeline(ax, intervals, {"interaction": "green", "none": "gray"})
+    set_time_axis(ax, 12, fps=30.0)
+
+    bars = [len(collection.get_paths()) for collection in ax.collections]
+    assert bars == [2, 1]
+    assert [t.get_text() for t in ax.get_yticklabels()] == list(LABELS)
+    assert ax.get_xlim() == (0.0, 12.0)
+    plt.close(fig)
+
+
+def test_social_plots_render_from_runs(tmp_path):
+    rng = np.random.default_rng(1)
+    n = 3000
+    walk = lambda: 250 + np.cumsum(rng.normal(0, 1, n))
+    context = {
+        "distance": rng.uniform(0, 200, n),
+        "mouse1_angle": rng.uniform(0, 180, n),
+        "mouse2_angle": rng.uniform(0, 180, n),
+        "speeds_mouse1": rng.uniform(0, 50, n),
+        "speeds_mouse2": rng.uniform(0, 50, n),
+        "behavior_data": rng.integers(0, 3, n // 10).repeat(10).astype(np.int8),
+        "positions": {k: walk() for k in ("mouse1_x", "mouse1_y", "mouse2_x", "mouse2_y")},
+    }
+
+    plot_analysis_results(context, str(tmp_path), fps=30.0)
+
+    assert (tmp_path / "behavior_timeline.png").stat().st_size > 0
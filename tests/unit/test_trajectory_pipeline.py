@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.processing.mouse_catch_video_processing import (
+    analyze_catch_behavior,
+    analyze_catch_bodyparts,
+)
+from src.core.processing.trajectory_pipeline import (
+    TrajectoryPipeline,
+    catch_pipeline,
+)
+from src.core.processing.trajectory_processing import (
+    filter_extreme_jumps,
+    kalman_smooth_array,
+    filter_low_likelihood,
+    filter_unreasonable_position,
+    filter_unreasonable_speed,
+    interpolate_missing_points,
+    smooth_trajectory,
+)
+
+
+def _catch_track(n_frames=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = 300 + np.cumsum(rng.normal(0, 8, n_frames))
+    y = 330 + np.cumsum(rng.normal(0, 8, n_frames))
+    x[rng.random(n_frames) < 0.05] += 250
+    likelihood = rng.uniform(0.3, 1.0, n_frames)
+    likelihood[rng.random(n_frames) < 0.02] = np.nan
+    return pd.DataFrame({"x": x, "y": y, "likelihood": likelihood})
+
+
+def test_catch_pipeline_matches_dataframe_chain():
+    df = _catch_track()
+
+    expected = filter_low_likelihood(df, 0.6)
+    counts = [expected["x"].notna().sum()]
+    expected = filter_unreasonable_position(expected)
+    counts.append(expected["x"].notna().sum())
+    expected = filter_extreme_jumps(expected, extreme_dist=200.0)
+    counts.append(expected["x"].notna().sum())
+    expected = filter_unreasonable_speed(expected, 30.0, 120)
+    counts.append(expected["x"].notna().sum())
+    expected = smooth_trajectory(interpolate_missing_points(expected), 7, 2)
+
+    result = catch_pipeline(0.6, 30.0).run(df["x"], df["y"], df["likelihood"])
+
+    np.testing.assert_array_equal(result.x, expected["x"].values)
+    np.testing.assert_array_equal(result.y, expected["y"].values)
+    assert [s.valid for s in result.stats[:4]] == counts
+    assert [s.name for s in result.stats] == [
+        "likelihood", "position", "extreme_jumps", "speed", "interpolate", "smooth"
+    ]
+    assert result.stats[0].dropped == len(df) - counts[0]
+    assert result.stats[-1].valid == len(df)
+
+
+def test_pipeline_runs_bodyparts_as_columns():
+    tracks = [_catch_track(500, seed) for seed in range(3)]
+    pipeline = catch_pipeline(0.5, 40.0)
+    batched = pipeline.run(
+        np.stack([t["x"] for t in tracks], axis=1),
+        np.stack([t["y"] for t in tracks], axis=1),
+        np.stack([t["likelihood"] for t in tracks], axis=1),
+    )
+
+    assert batched.x.shape == (500, 3)
+    for k, track in enumerate(tracks):
+        single = pipeline.run(track["x"], track["y"], track["likelihood"])
+        np.testing.assert_array_equal(batched.x[:, k], single.x)
+        np.testing.assert_array_equal(batched.y[:, k], single.y)
+
+
+def test_clean_coords_keeps_layout():
+    track = _catch_track(200)
+    coords = {
+        "nose": {"x": track["x"].values, "y": track["y"].values,
+                 "likelihood": track["likelihood"].values},
+        "tail": {"x": track["x"].values + 1, "y": track["y"].values,
+                 "likelihood": track["likelihood"].values},
+    }
+    pipeline = TrajectoryPipeline.from_config([{"stage": "likelihood", "threshold": 0.9}])
+
+    cleaned = pipeline.clean_coords(coords)
+
+    assert list(cleaned) == ["nose", "tail"]
+    assert cleaned["nose"]["likelihood"] is coords["nose"]["likelihood"]
+    np.testing.assert_array_equal(
+        np.isnan(cleaned["tail"]["x"]), coords["tail"]["likelihood"] < 0.9
+    )
+    assert not np.isnan(coords["nose"]["x"]).any()
+
+
+def test_catch_pipeline_kalman_replaces_interpolate_and_smooth():
+    df = _catch_track()
+    savgol = catch_pipeline(0.6, 30.0).run(df["x"], df["y"], df["likelihood"])
+
+    result = catch_pipeline(0.6, 30.0, smoother="kalman").run(df["x"], df["y"], df["likelihood"])
+
+    assert [s.name for s in result.stats] == [
+        "likelihood", "position", "extreme_jumps", "speed", "kalman"
+    ]
+    assert result.stats[:4] == savgol.stats[:4]
+    assert result.stats[-1].valid == len(df)
+    filtered = TrajectoryPipeline(catch_pipeline(0.6, 30.0).stages[:4]).run(
+        df["x"], df["y"], df["likelihood"]
+    )
+    expected = kalman_smooth_array(filtered.xy, df["likelihood"].values[:, None])
+    np.testing.assert_array_equal(result.xy, expected)
+    with pytest.raises(ValueError):
+        catch_pipeline(0.6, 30.0, smoother="median")
+
+
+def test_from_config_rejects_unknown_stage():
+    with pytest.raises(ValueError):
+        TrajectoryPipeline.from_config([{"stage": "unknown"}])
+    with pytest.raises(ValueError):
+        TrajectoryPipeline.from_config([{"threshold": 0.5}])
+
+
+def test_analyze_catch_bodyparts_matches_single_bodypart(catch_frame):
+    paws = [catch_frame(3000, seed) for seed in (1, 2)]
+    columns = {
+        col: np.stack([paw[col].values for paw in paws], axis=1)
+        for col in ("x", "y", "likelihood")
+    }
+    params = dict(threshold=0.6, speed_threshold=100.0, min_duration_sec=0.5,
+                  max_duration_sec=1.0, fps=120.0)
+
+    analyses = analyze_catch_bodyparts(columns, ["left_paw", "right_paw"], **params)
+
+    assert list(analyses) == ["left_paw", "right_paw"]
+    for paw, (results_df, context) in zip(paws, analyses.values()):
+        expected_df, expected = analyze_catch_behavior(paw, **params)
+        assert not expected_df.empty
+        pd.testing.assert_frame_equal(results_df, expected_df)
+        np.testing.assert_array_equal(context["x_smooth"], expected["x_smooth"])
+        assert context["events"] == expected["events"]
@@ -0,0 +1,412 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.interpolate import CubicSpline, PchipInterpolator, interp1d
+from scipy.signal import savgol_filter
+
+from src.core.processing.trajectory_processing import (
+    detect_grab_trajectories,
+    extreme_jump_mask,
+    filter_extreme_jumps,
+    filter_unreasonable_position,
+    filter_unreasonable_speed,
+    interpolate_missing_array,
+    interpolate_missing_points,
+    kalman_smooth_array,
+    smooth_trajectory,
+    smooth_trajectory_array,
+    unreasonable_position_mask,
+    unreasonable_speed_mask,
+)
+
+
+def _extreme_jumps_loop(x, y, extreme_dist):
+    """原始逐帧实现, 作为等价性参照"""
+    x = np.array(x, dtype=float)
+    y = np.array(y, dtype=float)
+    for i in range(1, len(x)):
+        if np.isnan(x[i]) or np.isnan(x[i - 1]):
+            continue
+        dist = np.sqrt((x[i] - x[i - 1]) ** 2 + (y[i] - y[i - 1]) ** 2)
+        if dist > extreme_dist:
+            x[i] = np.nan
+            y[i] = np.nan
+    return x, y
+
+
+def _unreasonable_speed_loop(x, y, max_speed_threshold):
+    """原始逐帧实现, 作为等价性参照"""
+    x = np.array(x, dtype=float)
+    y = np.array(y, dtype=float)
+    n = len(x)
+    for i in range(1, n - 1):
+        if np.isnan(x[i]) or np.isnan(y[i]):
+            continue
+        if not np.isnan(x[i - 1]) and not np.isnan(y[i - 1]):
+            if np.sqrt((x[i] - x[i - 1]) ** 2 + (y[i] - y[i - 1]) ** 2) > max_speed_threshold:
+                x[i] = np.nan
+                y[i] = np.nan
+                continue
+        if not np.isnan(x[i + 1]) and not np.isnan(y[i + 1]):
+            if np.sqrt((x[i + 1] - x[i]) ** 2 + (y[i + 1] - y[i]) ** 2) > max_speed_threshold:
+                x[i] = np.nan
+                y[i] = np.nan
+    return x, y
+
+
+def _grab_events_loop(x, y, fps, barrier_region, start_region,
+                      max_back_time, max_forward_time, min_frame_gap):
+    """原始的逐帧回溯实现, 作为等价性参照"""
+    bxmin, bxmax, bymin, bymax = barrier_region
+    sxmin, sxmax, symin, symax = start_region
+    n_frames = len(x)
+    start_offset = int(round(max_back_time * fps))
+    end_offset = int(round(max_forward_time * fps))
+    region = (x > bxmin) & (x < bxmax) & (y > bymin) & (y < bymax)
+    events, used = [], set()
+    for c in np.where(region)[0]:
+        if c in used or (events and c - events[-1]["i_end"] < min_frame_gap):
+            continue
+        best_start, best_y = None, -np.inf
+        for i in range(max(0, c - start_offset), c + 1):
+            if i in used:
+                continue
+            if sxmin < x[i] < sxmax and symin < y[i] < symax and y[i] > best_y:
+                best_start, best_y = i, y[i]
+        if best_start is None:
+            continue
+        best_end, best_x = None, -np.inf
+        for i in range(c, min(n_frames - 1, c + end_offset) + 1):
+            if i not in used and x[i] > best_x:
+                best_end, best_x = i, x[i]
+        if best_end is None:
+            continue
+        events.append({
+            "i_start": best_start, "i_candidate": c, "i_end": best_end,
+            "start_time": best_start / fps, "candidate_time": c / fps,
+            "end_time": best_end / fps,
+        })
+        used.update(range(best_start, best_end + 1))
+    return events
+
+
+def _reach_track(rng, n_frames, period=150):
+    """在起点区域和挡板区域之间往返, 带噪声、跳变和缺失帧"""
+    t = np.arange(n_frames)
+    phase = (t % period) / period
+    reach = np.clip(np.sin(np.pi * phase) * 1.3, 0, 1)
+    x = 250 + 150 * reach + rng.normal(0, 4, n_frames)
+    y = 400 - 100 * reach + rng.normal(0, 4, n_frames)
+    x[rng.random(n_frames) < 0.02] += 200
+    x[rng.random(n_frames) < 0.03] = np.nan
+    y = np.round(y)  # 制造并列最大值
+    return x, y
+
+
+def _noisy_track(rng, n_frames, nan_rate=0.1, jump_rate=0.2):
+    x = np.cumsum(rng.normal(0, 20, n_frames)) + 300
+    y = np.cumsum(rng.normal(0, 20, n_frames)) + 300
+    jumps = rng.random(n_frames) < jump_rate
+    x[jumps] += rng.choice([-400.0, 400.0], size=jumps.sum())
+    x[rng.random(n_frames) < nan_rate] = np.nan
+    y[rng.random(n_frames) < nan_rate / 2] = np.nan
+    return x, y
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_extreme_jumps_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    x, y = _noisy_track(rng, 2000)
+    df = pd.DataFrame({"x": x, "y": y, "likelihood": rng.random(2000)})
+
+    expected_x, expected_y = _extreme_jumps_loop(x, y, 100.0)
+    result = filter_extreme_jumps(df, extreme_dist=100.0)
+
+    np.testing.assert_array_equal(result["x"].values, expected_x)
+    np.testing.assert_array_equal(result["y"].values, expected_y)
+    np.testing.assert_array_equal(result["likelihood"].values, df["likelihood"].values)
+
+
+def test_extreme_jump_mask_batches_bodyparts():
+    rng = np.random.default_rng(42)
+    tracks = [_noisy_track(rng, 500, jump_rate=0.5) for _ in range(4)]
+    x = np.stack([t[0] for t in tracks], axis=1)
+    y = np.stack([t[1] for t in tracks], axis=1)
+
+    mask = extreme_jump_mask(x, y, 150.0)
+
+    assert mask.shape == (500, 4)
+    for k, (tx, ty) in enumerate(tracks):
+        expected_x, _ = _extreme_jumps_loop(tx, ty, 150.0)
+        np.testing.assert_array_equal(mask[:, k], np.isnan(expected_x) & ~np.isnan(tx))
+
+
+def test_extreme_jump_mask_alternates_within_runs():
+    x = np.array([0.0, 500.0, 0.0, 500.0, 0.0, 10.0])
+    y = np.zeros_like(x)
+
+    mask = extreme_jump_mask(x, y, 200.0)
+
+    assert mask.tolist() == [False, True, False, True, False, False]
+    assert extreme_jump_mask(np.array([]), np.array([])).shape == (0,)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_unreasonable_speed_matches_loop(seed):
+    rng = np.random.default_rng(seed)
+    x, y = _noisy_track(rng, 2000)
+    df = pd.DataFrame({"x": x, "y": y})
+
+    expected_x, expected_y = _unreasonable_speed_loop(x, y, 60.0)
+    result = filter_unreasonable_speed(df, 60.0, fps=120)
+
+    np.testing.assert_array_equal(result["x"].values, expected_x)
+    np.testing.assert_array_equal(result["y"].values, expected_y)
+
+
+def test_unreasonable_speed_mask_batches_bodyparts():
+    rng = np.random.default_rng(7)
+    tracks = [_noisy_track(rng, 300, jump_rate=0.4) for _ in range(3)]
+    x = np.stack([t[0] for t in tracks], axis=1)
+    y = np.stack([t[1] for t in tracks], axis=1)
+
+    mask = unreasonable_speed_mask(x, y, 80.0)
+
+    for k, (tx, ty) in enumerate(tracks):
+        expected_x, _ = _unreasonable_speed_loop(tx, ty, 80.0)
+        np.testing.assert_array_equal(mask[:, k], np.isnan(expected_x) & ~np.isnan(tx))
+
+
+def test_unreasonable_speed_stateless_uses_original_neighbours():
+    x = np.array([0.0, 100.0, 200.0, 200.0, 200.0])
+    y = np.zeros_like(x)
+
+    sequential = unreasonable_speed_mask(x, y, 50.0)
+    stateless = unreasonable_speed_mask(x, y, 50.0, mode="stateless")
+
+    # 第1帧与前后都超距; 顺序模式下第1帧被剔除后第2帧只与后一帧比较
+    assert sequential.tolist() == [False, True, False, False, False]
+    assert stateless.tolist() == [False, True, True, False, False]
+    with pytest.raises(ValueError):
+        unreasonable_speed_mask(x, y, 50.0, mode="unknown")
+
+
+@pytest.mark.parametrize(
+    "seed, min_frame_gap, max_back_time, chunk_frames",
+    [(0, 60, 0.5, None), (1, 10, 1.5, None), (2, 0, 0.8, None),
+     (3, -20, 2.0, None), (4, 60, 0.5, 333), (5, 5, 1.2, 97)],
+)
+def test_detect_grab_trajectories_matches_loop(seed, min_frame_gap, max_back_time,
+                                               chunk_frames):
+    rng = np.random.default_rng(seed)
+    x, y = _reach_track(rng, 6000, period=int(rng.integers(60, 200)))
+    kwargs = dict(
+        fps=120.0, barrier_region=(330, 450, 250, 400), start_region=(200, 300, 350, 450),
+        max_back_time=max_back_time, max_forward_time=0.2, min_frame_gap=min_frame_gap,
+    )
+
+    expected = _grab_events_loop(x, y, **kwargs)
+    events = detect_grab_trajectories(
+        pd.DataFrame({"x": x, "y": y}), chunk_frames=chunk_frames, **kwargs
+    )
+
+    assert len(expected) > 10
+    assert events == expected
+
+
+def test_detect_grab_trajectories_pins_events():
+    # 两次伸爪: 起点取 y 最大 (并列取最早), 终点取 x 最大, 第二次与第一次间隔不足被跳过
+    x = np.full(40, 250.0)
+    y = np.full(40, 360.0)
+    y[[2, 4]] = 420.0
+    x[6:10] = [340.0, 380.0, 380.0, 360.0]
+    y[6:10] = 300.0
+    x[14:16] = 350.0
+    y[14:16] = 300.0
+    x[30:32] = [350.0, 400.0]
+    y[30:32] = 300.0
+    df = pd.DataFrame({"x": x, "y": y})
+
+    events = detect_grab_trajectories(df, fps=10.0, max_back_time=1.0,
+                                      max_forward_time=0.3, min_frame_gap=10)
+
+    assert [(e["i_start"], e["i_candidate"], e["i_end"]) for e in events] == [
+        (2, 6, 7), (20, 30, 31)
+    ]
+
+
+def _interp1d_reference(series):
+    """原始的逐列 interp1d 实现, 作为等价性参照"""
+    valid = ~np.isnan(series)
+    if valid.sum() < 2:
+        return series
+    frames = np.arange(len(series))
+    return interp1d(frames[valid], series[valid], kind="linear",
+                    fill_value="extrapolate")(frames)
+
+
+def test_interpolate_missing_array_matches_interp1d_per_column():
+    rng = np.random.default_rng(11)
+    values = np.cumsum(rng.normal(0, 10, (400, 3, 2)), axis=0)
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[:30, 0, 0] = np.nan          # 开头缺失, 需要外推
+    values[-25:, 1, 1] = np.nan         # 结尾缺失
+    values[:, 2, 0] = np.nan
+    values[7, 2, 0] = 5.0               # 只有一个有效点, 保持不变
+
+    result = interpolate_missing_array(values)
+    frame = interpolate_missing_points(pd.DataFrame({"x": values[:, 1, 0], "y": values[:, 1, 1]}))
+
+    assert result.shape == values.shape
+    for k in range(3):
+        for c in range(2):
+            np.testing.assert_array_equal(result[:, k, c], _interp1d_reference(values[:, k, c]))
+    np.testing.assert_array_equal(frame["x"].values, result[:, 1, 0])
+    np.testing.assert_array_equal(frame["y"].values, result[:, 1, 1])
+    assert np.isnan(values).any()  # 默认不修改输入
+
+
+def test_interpolate_missing_array_leaves_long_gaps():
+    series = np.arange(20, dtype=float)
+    series[[0, 1]] = np.nan      # 开头 2 帧
+    series[5:8] = np.nan         # 3 帧
+    series[10:14] = np.nan       # 4 帧
+    series[19] = np.nan          # 结尾 1 帧
+
+    result = interpolate_missing_array(series, max_gap_frames=3)
+
+    np.testing.assert_allclose(result[:10], np.arange(10))
+    assert np.isnan(result[10:14]).all()
+    np.testing.assert_allclose(result[14:], np.arange(14, 20))
+    np.testing.assert_array_equal(
+        interpolate_missing_array(series, max_gap_frames=None),
+        _interp1d_reference(series),
+    )
+
+
+@pytest.mark.parametrize("kind, interpolator", [("cubic", CubicSpline), ("pchip", PchipInterpolator)])
+def test_interpolate_missing_array_spline_kinds(kind, interpolator):
+    rng = np.random.default_rng(14)
+    values = np.sin(np.linspace(0, 6, 300))[:, None] * [1.0, 2.0]
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[:4, 0] = np.nan
+
+    result = interpolate_missing_array(values, kind=kind)
+
+    frames = np.arange(300)
+    for c in range(2):
+        valid = ~np.isnan(values[:, c])
+        interior = ~valid & (frames > frames[valid][0]) & (frames < frames[valid][-1])
+        expected = interpolator(frames[valid], values[valid, c])(frames[interior])
+        np.testing.assert_array_equal(result[interior, c], expected)
+    # 首尾仍为线性外推
+    np.testing.assert_array_equal(result[:4, 0], interpolate_missing_array(values)[:4, 0])
+    with pytest.raises(ValueError):
+        interpolate_missing_array(values, kind="nearest")
+
+
+def test_smooth_trajectory_array_in_place_matches_savgol():
+    rng = np.random.default_rng(12)
+    values = np.cumsum(rng.normal(0, 5, (200, 4)), axis=0)
+    original = values.copy()
+
+    smooth_trajectory_array(values, 9, 3, out=values)
+
+    for k in range(4):
+        np.testing.assert_array_equal(values[:, k], savgol_filter(original[:, k], 9, 3))
+    frame = smooth_trajectory(pd.DataFrame({"x": original[:, 0], "y": original[:, 1]}), 9, 3)
+    np.testing.assert_array_equal(frame["x"].values, values[:, 0])
+    np.testing.assert_array_equal(smooth_trajectory_array(original[:5]), original[:5])
+
+
+def test_smooth_trajectory_array_smooths_valid_runs():
+    rng = np.random.default_rng(15)
+    values = np.cumsum(rng.normal(0, 5, (300, 3)), axis=0)
+    values[[40, 41, 120, 299], 0] = np.nan
+    values[100:104, 1] = np.nan      # 104 之后还有 3 帧有效, 短于窗口
+    values[107:, 1] = np.nan
+    values[:, 2] = np.nan
+    values[::4, 2] = 1.0             # 全部是短段
+
+    result = smooth_trajectory_array(values, 7, 2)
+
+    runs = {0: [(0, 40), (42, 120), (121, 299)], 1: [(0, 100)]}
+    for c, segments in runs.items():
+        for start, stop in segments:
+            np.testing.assert_allclose(
+                result[start:stop, c], savgol_filter(values[start:stop, c], 7, 2),
+                rtol=0, atol=1e-9,
+            )
+    np.testing.assert_array_equal(result[100:, 1], values[100:, 1])
+    np.testing.assert_array_equal(result[:, 2], values[:, 2])
+    np.testing.assert_array_equal(np.isnan(result), np.isnan(values))
+
+    legacy = smooth_trajectory_array(values, 7, 2, segmented=False)
+    np.testing.assert_array_equal(legacy, values)
+
+
+def test_unreasonable_position_mask_matches_filter():
+    rng = np.random.default_rng(13)
+    x, y = _noisy_track(rng, 500)
+    expected = filter_unreasonable_position(pd.DataFrame({"x": x, "y": y}))
+
+    mask = unreasonable_position_mask(x, y)
+
+    np.testing.assert_array_equal(mask, expected["x"].isna().values)
+
+
+def _kalman_rts_loop(z, weights, q, position_var=1e10, velocity_var=1e6):
+    """逐帧 Kalman 滤波 + RTS 反向平滑, 作为参照"""
+    F = np.array([[1.0, 1.0], [0.0, 1.0]])
+    Q = q * np.array([[1 / 3, 1 / 2], [1 / 2, 1.0]])
+    m, P = np.zeros(2), np.diag([position_var, velocity_var])
+    predicted, filtered = [], []
+    for t in range(len(z)):
+        if t:
+            m, P = F @ m, F @ P @ F.T + Q
+        predicted.append((m, P))
+        if weights[t] > 0:
+            gain = P[:, 0] / (P[0, 0] + 1 / weights[t])
+            m, P = m + gain * (z[t] - m[0]), P - np.outer(gain, P[0])
+        filtered.append((m, P))
+    smoothed = filtered[-1][0]
+    positions = [smoothed[0]]
+    for t in range(len(z) - 2, -1, -1):
+        (mf, Pf), (mp, Pp) = filtered[t], predicted[t + 1]
+        smoothed = mf + Pf @ F.T @ np.linalg.inv(Pp) @ (smoothed - mp)
+        positions.append(smoothed[0])
+    return np.array(positions[::-1])
+
+
+def test_kalman_smooth_array_matches_rts_recursion():
+    rng = np.random.default_rng(16)
+    n = 400
+    truth = np.cumsum(np.cumsum(rng.normal(0, 0.3, (n, 2, 2)), axis=0), axis=0) + 300
+    values = truth + rng.normal(0, 2, truth.shape)
+    likelihood = rng.uniform(0.2, 1.0, (n, 2))
+    values[rng.random(n) < 0.2, 0] = np.nan
+    values[150:190, 1] = np.nan
+    likelihood[[10, 11], 1] = np.nan
+
+    result = kalman_smooth_array(values, likelihood, process_noise=0.5, measurement_noise=4.0)
+
+    assert not np.isnan(result).any()
+    for k in range(2):
+        observed = ~np.isnan(values[:, k]).any(axis=1) & ~np.isnan(likelihood[:, k])
+        weights = np.where(observed, likelihood[:, k], 0.0) / 4.0
+        for c in range(2):
+            expected = _kalman_rts_loop(values[:, k, c], weights, 0.5)
+            np.testing.assert_allclose(result[:, k, c], expected, rtol=0, atol=1e-4)
+    # 平滑后比原始观测更接近真实轨迹
+    valid = ~np.isnan(values)
+    assert np.abs(result - truth)[valid].mean() < np.abs(values - truth)[valid].mean()
+
+
+def test_kalman_smooth_array_in_place_and_empty_tracks():
+    values = np.full((50, 2, 2), np.nan)
+    values[::5, 0] = np.arange(10)[:, None] * 5.0   # 匀速运动, 每 5 帧观测一次
+
+    kalman_smooth_array(values, out=values)
+
+    np.testing.assert_allclose(values[:46, 0, 0], np.arange(46), atol=0.2)
+    assert np.isnan(values[:, 1]).all()